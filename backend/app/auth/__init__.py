@@ -1,11 +1,15 @@
+from app.auth.senhas import get_password_hash
 from app.auth.auth import (
     verify_password,
-    get_password_hash,
     create_access_token,
     authenticate_user,
+    authenticate_user_async,
     get_current_user,
+    usuario_pelo_token,
     get_current_active_user,
     get_current_superuser,
+    UsuarioAutenticado,
+    cache_usuarios,
     ACCESS_TOKEN_EXPIRE_MINUTES
 )
 
@@ -14,8 +18,12 @@ __all__ = [
     "get_password_hash",
     "create_access_token",
     "authenticate_user",
+    "authenticate_user_async",
     "get_current_user",
+    "usuario_pelo_token",
     "get_current_active_user",
     "get_current_superuser",
+    "UsuarioAutenticado",
+    "cache_usuarios",
     "ACCESS_TOKEN_EXPIRE_MINUTES"
 ]
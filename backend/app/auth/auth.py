@@ -1,16 +1,23 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 import os
 from dotenv import load_dotenv
 
-from app.database import get_db
+from app.database import get_async_db
 from app.models import User
 from app.schemas.auth import TokenData
+from app.auth.senhas import verify_password, verificar_senha
 
 load_dotenv()
 
@@ -19,30 +26,13 @@ SECRET_KEY = os.getenv("JWT_SECRET_KEY", "sua-chave-secreta-mude-em-producao")
 ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
 
-# Contexto de criptografia
-pwd_context = CryptContext(
-    schemes=["bcrypt"],
-    deprecated="auto",
-    bcrypt__rounds=12
-)
+# Cache do usuário autenticado (por processo)
+AUTH_CACHE_TTL_SEGUNDOS = float(os.getenv("AUTH_CACHE_TTL_SEGUNDOS", "60"))
+AUTH_CACHE_MAX_USUARIOS = int(os.getenv("AUTH_CACHE_MAX_USUARIOS", "10000"))
 
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verifica se a senha está correta"""
-    # Truncar senha para 72 bytes (limite do bcrypt)
-    if len(plain_password.encode('utf-8')) > 72:
-        plain_password = plain_password.encode('utf-8')[:72].decode('utf-8', errors='ignore')
-    return pwd_context.verify(plain_password, hashed_password)
-
-def get_password_hash(password: str) -> str:
-    """Gera hash da senha"""
-    # Truncar senha para 72 bytes (limite do bcrypt)
-    if len(password.encode('utf-8')) > 72:
-        password = password.encode('utf-8')[:72].decode('utf-8', errors='ignore')
-    return pwd_context.hash(password)
-
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Cria um token JWT"""
     to_encode = data.copy()
@@ -55,6 +45,63 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+@dataclass(frozen=True)
+class UsuarioAutenticado:
+    """Campos do usuário necessários para autorizar uma requisição"""
+    id: int
+    username: str
+    is_active: bool
+    is_superuser: bool
+
+
+class CacheUsuarios:
+    """
+    Cache LRU com TTL de UsuarioAutenticado, indexado pelo `sub` do token (username).
+    Evita o SELECT em users a cada requisição autenticada. É por processo: update_user e
+    delete_user invalidam a entrada local; nos demais workers ela expira pelo TTL.
+    """
+
+    def __init__(self, ttl: float, max_itens: int):
+        self.ttl = ttl
+        self.max_itens = max_itens
+        self.hits = 0
+        self.misses = 0
+        self._itens: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obter(self, username: str) -> Optional[UsuarioAutenticado]:
+        with self._lock:
+            item = self._itens.get(username)
+            if item is None or item[1] < time.monotonic():
+                if item is not None:
+                    del self._itens[username]
+                self.misses += 1
+                return None
+            self._itens.move_to_end(username)
+            self.hits += 1
+            return item[0]
+
+    def guardar(self, usuario: UsuarioAutenticado):
+        if self.ttl <= 0 or self.max_itens <= 0:
+            return
+        with self._lock:
+            self._itens[usuario.username] = (usuario, time.monotonic() + self.ttl)
+            self._itens.move_to_end(usuario.username)
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+
+    def invalidar(self, username: str):
+        with self._lock:
+            self._itens.pop(username, None)
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "tamanho": len(self._itens)}
+
+
+cache_usuarios = CacheUsuarios(AUTH_CACHE_TTL_SEGUNDOS, AUTH_CACHE_MAX_USUARIOS)
+
+
 def authenticate_user(db: Session, username: str, password: str) -> Optional[User]:
     """Autentica um usuário"""
     user = db.query(User).filter(User.username == username).first()
@@ -64,35 +111,72 @@ def authenticate_user(db: Session, username: str, password: str) -> Optional[Use
         return None
     return user
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> User:
-    """Obtém o usuário atual a partir do token"""
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Não foi possível validar as credenciais",
-        headers={"WWW-Authenticate": "Bearer"},
+async def authenticate_user_async(db: Session, username: str, password: str) -> Optional[User]:
+    """Autentica um usuário verificando a senha no pool de processos"""
+    user = await run_in_threadpool(
+        lambda: db.query(User).filter(User.username == username).first()
     )
-    
+    if not user:
+        return None
+    if not await verificar_senha(password, user.hashed_password):
+        return None
+    return user
+
+async def usuario_pelo_token(token: str, db: AsyncSession) -> Optional[UsuarioAutenticado]:
+    """
+    Valida o token JWT e retorna os campos de autorização do usuário (cache, depois banco),
+    ou None se o token for inválido ou o usuário não existir.
+    """
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
         if username is None:
-            raise credentials_exception
+            return None
         token_data = TokenData(username=username)
     except JWTError:
-        raise credentials_exception
+        return None
     
-    user = db.query(User).filter(User.username == token_data.username).first()
+    usuario = cache_usuarios.obter(token_data.username)
+    if usuario is not None:
+        return usuario
+    
+    user = (await db.execute(
+        select(User.id, User.username, User.is_active, User.is_superuser)
+        .where(User.username == token_data.username)
+    )).first()
     if user is None:
-        raise credentials_exception
+        return None
     
-    return user
+    usuario = UsuarioAutenticado(
+        id=user.id,
+        username=user.username,
+        is_active=bool(user.is_active),
+        is_superuser=bool(user.is_superuser)
+    )
+    cache_usuarios.guardar(usuario)
+    return usuario
+
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db)
+) -> UsuarioAutenticado:
+    """
+    Obtém o usuário atual a partir do token.
+    Retorna apenas os campos de autorização (id, username, is_active, is_superuser);
+    rotas que precisam do registro completo devem buscá-lo pelo id.
+    """
+    usuario = await usuario_pelo_token(token, db)
+    if usuario is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Não foi possível validar as credenciais",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return usuario
 
 async def get_current_active_user(
-    current_user: User = Depends(get_current_user)
-) -> User:
+    current_user: UsuarioAutenticado = Depends(get_current_user)
+) -> UsuarioAutenticado:
     """Verifica se o usuário está ativo"""
     if not current_user.is_active:
         raise HTTPException(
@@ -102,8 +186,8 @@ async def get_current_active_user(
     return current_user
 
 async def get_current_superuser(
-    current_user: User = Depends(get_current_active_user)
-) -> User:
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
+) -> UsuarioAutenticado:
     """Verifica se o usuário é superusuário"""
     if not current_user.is_superuser:
         raise HTTPException(
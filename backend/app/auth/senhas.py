@@ -0,0 +1,102 @@
+"""
+Hash e verificação de senhas (bcrypt).
+
+O bcrypt com 12 rounds custa ~250 ms de CPU por chamada. As versões assíncronas
+executam o cálculo em um pool de processos dedicado e limitado, para que rajadas de
+login/registro não ocupem o threadpool nem a CPU dos workers que atendem o resto da API.
+Quando há mais pedidos pendentes do que BCRYPT_MAX_PENDENTES, a chamada falha na hora
+com PoolSenhasOcupado (as rotas respondem 503).
+
+Os processos do pool são criados por um forkserver (spawn onde não houver), não por
+fork do worker: um fork copiaria o event loop, as conexões do banco, o socket do
+servidor e locks presos por outras threads. O forkserver pré-carrega este módulo, então
+cada processo nasce com o passlib já importado.
+"""
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from passlib.context import CryptContext
+
+BCRYPT_PROCESSOS = int(os.getenv("BCRYPT_PROCESSOS", str(max(1, (os.cpu_count() or 2) // 2))))
+BCRYPT_MAX_PENDENTES = int(os.getenv("BCRYPT_MAX_PENDENTES", str(BCRYPT_PROCESSOS * 8)))
+
+# Contexto de criptografia
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=12
+)
+
+
+class PoolSenhasOcupado(Exception):
+    """Fila do pool de hash de senhas cheia"""
+
+
+def _truncar(senha: str) -> str:
+    # Truncar senha para 72 bytes (limite do bcrypt)
+    if len(senha.encode('utf-8')) > 72:
+        senha = senha.encode('utf-8')[:72].decode('utf-8', errors='ignore')
+    return senha
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Verifica se a senha está correta"""
+    return pwd_context.verify(_truncar(plain_password), hashed_password)
+
+
+def get_password_hash(password: str) -> str:
+    """Gera hash da senha"""
+    return pwd_context.hash(_truncar(password))
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pendentes = 0
+
+
+def _contexto_processos():
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("spawn")
+    contexto = multiprocessing.get_context("forkserver")
+    contexto.set_forkserver_preload([__name__])
+    return contexto
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=BCRYPT_PROCESSOS, mp_context=_contexto_processos())
+    return _pool
+
+
+async def _executar(funcao, *args):
+    global _pendentes
+    if _pendentes >= BCRYPT_MAX_PENDENTES:
+        raise PoolSenhasOcupado()
+    _pendentes += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_get_pool(), funcao, *args)
+    finally:
+        _pendentes -= 1
+
+
+async def verificar_senha(plain_password: str, hashed_password: str) -> bool:
+    """verify_password executado no pool de processos"""
+    return await _executar(verify_password, plain_password, hashed_password)
+
+
+async def gerar_hash_senha(password: str) -> str:
+    """get_password_hash executado no pool de processos"""
+    return await _executar(get_password_hash, password)
+
+
+def encerrar_pool():
+    """Finaliza os processos do pool (chamado no shutdown da API)"""
+    global _pool
+    if _pool is not None:
+        # wait=True: os processos do pool saem junto com o worker, sem ficarem órfãos;
+        # no máximo um hash em andamento por processo
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
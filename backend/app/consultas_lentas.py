@@ -0,0 +1,291 @@
+"""
+Log de consultas lentas com captura do plano de execução.
+
+Os hooks de cursor de app/database.py chamam `registrar` quando um comando passa de
+CONSULTA_LENTA_MS. O registro leva o SQL, os parâmetros redigidos (textos viram
+"<str 12>"; números, datas e None ficam), a duração e a função do app que fez a
+consulta (ex.: "app/crud/produto.py:88 get_produtos").
+
+O plano é capturado fora da requisição, em outra conexão: no PostgreSQL, EXPLAIN
+(ANALYZE, BUFFERS) só para SELECT sem FOR UPDATE/SHARE, e EXPLAIN simples (sem executar)
+para DML e WITH — o ANALYZE reexecutaria a escrita e esperaria pelos mesmos locks de
+linha que a deixaram lenta; no SQLite, EXPLAIN QUERY PLAN. Cada comando é explicado no
+máximo uma vez a cada CONSULTAS_LENTAS_EXPLAIN_INTERVALO segundos, já que o ANALYZE
+executa a consulta de novo; o último EXPLAIN fica guardado para os
+EXPLAIN_MAX_COMANDOS comandos mais recentes (LRU, pelo hash do SQL).
+
+Registros completos vão para um arquivo JSON lines rotativo e para a memória do
+processo (GET /metrics/consultas-lentas, só superusuário).
+Configuração (.env):
+  CONSULTA_LENTA_MS=200                     0 desliga
+  CONSULTAS_LENTAS_ARQUIVO=logs/consultas_lentas.jsonl
+  CONSULTAS_LENTAS_ARQUIVO_MAX_MB=10        tamanho antes de rotacionar
+  CONSULTAS_LENTAS_ARQUIVO_BACKUPS=5
+  CONSULTAS_LENTAS_EXPLAIN=1
+  CONSULTAS_LENTAS_EXPLAIN_INTERVALO=300
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from logging.handlers import RotatingFileHandler
+from typing import Optional
+
+try:
+    import greenlet
+except ImportError:  # pragma: no cover - dependência do SQLAlchemy assíncrono
+    greenlet = None
+
+LIMITE_MS = float(os.getenv("CONSULTA_LENTA_MS", "200"))
+ATIVO = LIMITE_MS > 0
+LIMITE_SEGUNDOS = LIMITE_MS / 1000
+ARQUIVO = os.getenv("CONSULTAS_LENTAS_ARQUIVO", "logs/consultas_lentas.jsonl")
+ARQUIVO_MAX_BYTES = int(float(os.getenv("CONSULTAS_LENTAS_ARQUIVO_MAX_MB", "10")) * 1024 * 1024)
+ARQUIVO_BACKUPS = int(os.getenv("CONSULTAS_LENTAS_ARQUIVO_BACKUPS", "5"))
+EXPLAIN_ATIVO = os.getenv("CONSULTAS_LENTAS_EXPLAIN", "1") == "1"
+EXPLAIN_INTERVALO = float(os.getenv("CONSULTAS_LENTAS_EXPLAIN_INTERVALO", "300"))
+EXPLAIN_MAX_PENDENTES = 4
+# Comandos distintos com o horário do último EXPLAIN guardado (SQL dinâmico, ex. IN com
+# tamanhos variados, geraria chaves sem fim)
+EXPLAIN_MAX_COMANDOS = 1000
+MAX_EM_MEMORIA = 200
+MAX_SQL = 10_000
+
+# Só estes comandos têm plano (DDL, PRAGMA etc. são registrados sem EXPLAIN)
+_COMANDOS_COM_PLANO = {"SELECT", "INSERT", "UPDATE", "DELETE", "WITH"}
+
+# SELECT que trava linhas: o ANALYZE esperaria pelos locks como a consulta original
+_TRAVA_LINHAS = re.compile(r"\bFOR\s+(?:NO\s+KEY\s+UPDATE|UPDATE|KEY\s+SHARE|SHARE)\b", re.IGNORECASE)
+
+# Opção de execução das conexões que rodam o EXPLAIN (não são registradas de novo)
+OPCAO_EXPLAIN = "consulta_lenta_explain"
+
+_PACOTE_APP = os.path.dirname(os.path.abspath(__file__))
+_RAIZ = os.path.dirname(_PACOTE_APP)
+# Frames ignorados ao procurar a função que originou a consulta
+_MODULOS_INSTRUMENTACAO = {
+    os.path.join(_PACOTE_APP, nome) for nome in ("database.py", "metricas.py", "consultas_lentas.py")
+}
+
+_recentes = deque(maxlen=MAX_EM_MEMORIA)
+_ultimo_explain: "OrderedDict[bytes, float]" = OrderedDict()
+_lock = threading.Lock()
+_pendentes = 0
+_executor: Optional[ThreadPoolExecutor] = None
+_tarefas = set()
+_logger = logging.getLogger("app.consultas_lentas")
+_arquivo_ok = None
+
+
+def _redigir(valor):
+    if valor is None or isinstance(valor, (bool, int, float, Decimal)):
+        return valor if not isinstance(valor, Decimal) else float(valor)
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    if isinstance(valor, (str, bytes)):
+        return f"<{type(valor).__name__} {len(valor)}>"
+    return f"<{type(valor).__name__}>"
+
+
+def redigir_parametros(parametros, executemany: bool = False):
+    if executemany:
+        lotes = list(parametros or [])
+        return {"lotes": len(lotes), "primeiro": redigir_parametros(lotes[0]) if lotes else None}
+    if isinstance(parametros, dict):
+        return {chave: _redigir(valor) for chave, valor in parametros.items()}
+    if isinstance(parametros, (list, tuple)):
+        return [_redigir(valor) for valor in parametros]
+    return _redigir(parametros)
+
+
+def _frames():
+    frame = sys._getframe()
+    while frame is not None:
+        yield frame
+        frame = frame.f_back
+    # Na AsyncSession o cursor roda em um greenlet; as corrotinas do app (CRUD, rotas)
+    # ficam na pilha do greenlet pai, suspensa no ponto em que chamou o SQLAlchemy
+    if greenlet is not None:
+        atual = greenlet.getcurrent()
+        pai = atual.parent
+        frame = pai.gr_frame if pai is not None else None
+        while frame is not None:
+            yield frame
+            frame = frame.f_back
+
+
+def origem_da_consulta() -> Optional[str]:
+    """Primeira função do pacote app (fora da instrumentação) na pilha da consulta"""
+    for frame in _frames():
+        arquivo = frame.f_code.co_filename
+        if arquivo.startswith(_PACOTE_APP) and arquivo not in _MODULOS_INSTRUMENTACAO:
+            return f"{os.path.relpath(arquivo, _RAIZ)}:{frame.f_lineno} {frame.f_code.co_name}"
+    return None
+
+
+def _gravar(registro: dict):
+    global _arquivo_ok
+    if _arquivo_ok is None:
+        with _lock:
+            if _arquivo_ok is None:
+                try:
+                    os.makedirs(os.path.dirname(ARQUIVO) or ".", exist_ok=True)
+                    handler = RotatingFileHandler(
+                        ARQUIVO, maxBytes=ARQUIVO_MAX_BYTES, backupCount=ARQUIVO_BACKUPS, encoding="utf-8"
+                    )
+                    handler.setFormatter(logging.Formatter("%(message)s"))
+                    _logger.addHandler(handler)
+                    _logger.setLevel(logging.INFO)
+                    _logger.propagate = False
+                    _arquivo_ok = True
+                except OSError as e:
+                    print(f"[CONSULTAS LENTAS] não foi possível abrir {ARQUIVO}: {e}; registrando só em memória")
+                    _arquivo_ok = False
+    if _arquivo_ok:
+        _logger.info(json.dumps(registro, ensure_ascii=False, default=str))
+
+
+def _somente_leitura(statement: str) -> bool:
+    """SELECT que pode ser reexecutado pelo ANALYZE sem escrever nem esperar por locks"""
+    comando = statement.lstrip().split(None, 1)[0].upper()
+    return comando == "SELECT" and not _TRAVA_LINHAS.search(statement)
+
+
+def _sql_explain(dialeto: str, statement: str) -> str:
+    if dialeto == "postgresql":
+        if _somente_leitura(statement):
+            return "EXPLAIN (ANALYZE, BUFFERS) " + statement
+        return "EXPLAIN " + statement
+    if dialeto == "sqlite":
+        return "EXPLAIN QUERY PLAN " + statement
+    return "EXPLAIN " + statement
+
+
+def _formatar_plano(dialeto: str, linhas) -> list:
+    if dialeto == "sqlite":
+        # (id, parent, notused, detail)
+        return [linha[-1] for linha in linhas]
+    return [" | ".join(str(coluna) for coluna in linha) for linha in linhas]
+
+
+def _concluir(registro: dict, plano=None, erro: Optional[Exception] = None):
+    if plano is not None:
+        registro["plano"] = plano
+    if erro is not None:
+        registro["erro_plano"] = f"{type(erro).__name__}: {erro}"[:500]
+    _gravar(registro)
+
+
+def _explicar_sync(engine, statement, parametros, registro):
+    global _pendentes
+    try:
+        sql = _sql_explain(engine.dialect.name, statement)
+        with engine.connect() as conn:
+            conn = conn.execution_options(**{OPCAO_EXPLAIN: True})
+            try:
+                linhas = conn.exec_driver_sql(sql, parametros).fetchall()
+            finally:
+                conn.rollback()
+        _concluir(registro, plano=_formatar_plano(engine.dialect.name, linhas))
+    except Exception as e:
+        _concluir(registro, erro=e)
+    finally:
+        with _lock:
+            _pendentes -= 1
+
+
+async def _explicar_async(async_engine, statement, parametros, registro):
+    global _pendentes
+    try:
+        dialeto = async_engine.dialect.name
+        async with async_engine.connect() as conn:
+            conn = await conn.execution_options(**{OPCAO_EXPLAIN: True})
+            try:
+                linhas = (await conn.exec_driver_sql(_sql_explain(dialeto, statement), parametros)).fetchall()
+            finally:
+                await conn.rollback()
+        _concluir(registro, plano=_formatar_plano(dialeto, linhas))
+    except Exception as e:
+        _concluir(registro, erro=e)
+    finally:
+        with _lock:
+            _pendentes -= 1
+
+
+def _reservar_explain(statement: str) -> bool:
+    """Limita a um EXPLAIN por comando a cada EXPLAIN_INTERVALO e a poucos em paralelo"""
+    global _pendentes
+    agora = time.monotonic()
+    chave = hashlib.blake2b(statement.encode(), digest_size=16).digest()
+    with _lock:
+        if _pendentes >= EXPLAIN_MAX_PENDENTES:
+            return False
+        ultimo = _ultimo_explain.get(chave)
+        if ultimo is not None and agora - ultimo < EXPLAIN_INTERVALO:
+            _ultimo_explain.move_to_end(chave)
+            return False
+        _ultimo_explain[chave] = agora
+        _ultimo_explain.move_to_end(chave)
+        while len(_ultimo_explain) > EXPLAIN_MAX_COMANDOS:
+            _ultimo_explain.popitem(last=False)
+        _pendentes += 1
+        return True
+
+
+def _agendar_explain(engine_explain, statement, parametros, registro) -> bool:
+    global _executor
+    if hasattr(engine_explain, "sync_engine"):
+        # AsyncEngine: o hook roda dentro do event loop (greenlet da AsyncSession)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+        tarefa = loop.create_task(_explicar_async(engine_explain, statement, parametros, registro))
+        _tarefas.add(tarefa)
+        tarefa.add_done_callback(_tarefas.discard)
+        return True
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="explain")
+    _executor.submit(_explicar_sync, engine_explain, statement, parametros, registro)
+    return True
+
+
+def registrar(statement: str, parametros, segundos: float, executemany: bool, engine_explain):
+    """Registra uma consulta lenta; engine_explain é o Engine/AsyncEngine que a executou"""
+    global _pendentes
+    registro = {
+        "quando": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+        "duracao_ms": round(segundos * 1000, 1),
+        "origem": origem_da_consulta(),
+        "statement": statement[:MAX_SQL],
+        "parametros": redigir_parametros(parametros, executemany),
+        "plano": None,
+    }
+    _recentes.append(registro)
+
+    comando = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    if EXPLAIN_ATIVO and not executemany and comando in _COMANDOS_COM_PLANO and _reservar_explain(statement):
+        try:
+            if _agendar_explain(engine_explain, statement, parametros, registro):
+                return
+        except RuntimeError:  # executor encerrado no shutdown
+            pass
+        with _lock:
+            _pendentes -= 1
+    _gravar(registro)
+
+
+def recentes(limite: int = 50) -> list:
+    """Registros mais recentes deste processo, do mais novo para o mais antigo"""
+    return list(_recentes)[-limite:][::-1]
@@ -1,3 +1,3 @@
-from app.crud import produto, user, lista_compras, compra, categoria, assinatura
+from app.crud import produto, user, lista_compras, compra, categoria, assinatura, email_pendente
 
-__all__ = ["produto", "user", "lista_compras", "compra", "categoria", "assinatura"]
+__all__ = ["produto", "user", "lista_compras", "compra", "categoria", "assinatura", "email_pendente"]
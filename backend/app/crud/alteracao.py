@@ -0,0 +1,283 @@
+"""
+Registro de alterações para a sincronização incremental (GET /sync).
+
+Cada lista, item, compra e produto alterado tem uma linha em `alteracoes` com a
+sequência da sua última alteração (`removido` marca as lápides). A sequência é por
+escopo — o usuário dono, ou ESCOPO_GLOBAL para produtos — e vem de
+contadores_alteracoes. A linha do contador fica travada até o commit de quem a
+incrementa, então as sequências de um escopo são confirmadas em ordem: quem já leu até
+N nunca recebe depois uma alteração confirmada com sequência menor.
+
+Escopo do usuário: o contador é incrementado na mesma transação da alteração (só
+escritas do mesmo usuário disputam a linha). Os módulos de CRUD chamam
+registrar_alteracoes antes do commit, depois de enviar as demais escritas (flush), para
+que o contador seja sempre o último lock da transação.
+
+Escopo global: todas as finalizações de lista e escritas de produtos disputariam a
+mesma linha do contador durante a transação inteira. Por isso registrar_alteracoes
+grava as alterações globais com SEQ_PENDENTE (sem tocar no contador) e, depois do
+commit, numerar_alteracoes_globais as numera numa transação curta. Pendentes que ficarem
+para trás (ex.: falha ou queda do processo entre os dois commits) são numeradas na
+próxima chamada, de qualquer processo, na inicialização da API e antes das leituras do
+escopo global (numerar_pendentes_globais: /sync e ETag de /produtos/).
+"""
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+
+from app.database import insert_com_upsert
+from app.metricas import metricas
+from app.models import Alteracao, Compra, ContadorAlteracoes, ItemListaCompras, ListaCompras, Produto
+
+ESCOPO_GLOBAL = 0
+
+# Sequência das alterações globais ainda não numeradas (o /sync lê seq > watermark >= 0)
+SEQ_PENDENTE = 0
+
+LISTA = "lista"
+ITEM = "item"
+COMPRA = "compra"
+PRODUTO = "produto"
+
+_logger = logging.getLogger("app.crud.alteracao")
+
+
+def _por_entidade(alteracoes: Iterable[Tuple[str, int, bool]]) -> Dict[Tuple[str, int], bool]:
+    por_chave = {}
+    for entidade, entidade_id, removido in alteracoes:
+        por_chave[(entidade, entidade_id)] = removido  # a última alteração da entidade vale
+    return por_chave
+
+
+def _incrementar_contador(insert, escopo: int, quantidade: int):
+    """Upsert que soma `quantidade` ao contador do escopo e retorna a última sequência reservada"""
+    stmt = insert(ContadorAlteracoes).values(escopo=escopo, seq=quantidade)
+    return stmt.on_conflict_do_update(
+        index_elements=["escopo"],
+        set_={"seq": ContadorAlteracoes.seq + stmt.excluded.seq}
+    ).returning(ContadorAlteracoes.seq)
+
+
+def _gravar_alteracoes(insert, escopo: int, ultima: Optional[int], por_chave: Dict[Tuple[str, int], bool]):
+    """Upsert das alterações com sequências até `ultima` (None: todas com SEQ_PENDENTE)"""
+    primeira = ultima - len(por_chave) + 1 if ultima is not None else None
+    stmt = insert(Alteracao).values([
+        {
+            "escopo": escopo,
+            "seq": primeira + i if primeira is not None else SEQ_PENDENTE,
+            "entidade": entidade,
+            "entidade_id": entidade_id,
+            "removido": removido
+        }
+        for i, ((entidade, entidade_id), removido) in enumerate(por_chave.items())
+    ])
+    return stmt.on_conflict_do_update(
+        index_elements=["escopo", "entidade", "entidade_id"],
+        set_={"seq": stmt.excluded.seq, "removido": stmt.excluded.removido}
+    )
+
+
+async def registrar_alteracoes(
+    db: AsyncSession,
+    escopo: int,
+    alteracoes: Iterable[Tuple[str, int, bool]]
+):
+    """
+    Registra (entidade, id, removido) no escopo com sequências novas, uma por entidade,
+    usando um upsert no contador e um em `alteracoes`. No escopo global só grava as
+    alterações como pendentes: chame numerar_alteracoes_globais depois do commit.
+    """
+    por_chave = _por_entidade(alteracoes)
+    if not por_chave:
+        return
+    insert = insert_com_upsert(db)
+    ultima = None
+    if escopo != ESCOPO_GLOBAL:
+        ultima = (await db.execute(_incrementar_contador(insert, escopo, len(por_chave)))).scalar_one()
+    await db.execute(_gravar_alteracoes(insert, escopo, ultima, por_chave))
+
+
+def registrar_alteracoes_sync(db: Session, escopo: int, alteracoes: Iterable[Tuple[str, int, bool]]):
+    """registrar_alteracoes para os módulos de CRUD síncronos"""
+    por_chave = _por_entidade(alteracoes)
+    if not por_chave:
+        return
+    insert = insert_com_upsert(db)
+    ultima = None
+    if escopo != ESCOPO_GLOBAL:
+        ultima = db.execute(_incrementar_contador(insert, escopo, len(por_chave))).scalar_one()
+    db.execute(_gravar_alteracoes(insert, escopo, ultima, por_chave))
+
+
+def _pendentes_globais():
+    # SKIP LOCKED: pendentes de transações ainda abertas ficam para a numeração delas
+    return select(Alteracao.id).where(
+        Alteracao.escopo == ESCOPO_GLOBAL,
+        Alteracao.seq == SEQ_PENDENTE
+    ).order_by(Alteracao.id).with_for_update(skip_locked=True)
+
+
+def _numerar(insert, ids: List[int]):
+    return _incrementar_contador(insert, ESCOPO_GLOBAL, len(ids))
+
+
+def _atribuir_sequencias(ids: List[int], ultima: int):
+    tabela = Alteracao.__table__
+    primeira = ultima - len(ids) + 1
+    return (
+        update(tabela).where(tabela.c.id == bindparam("b_id")).values(seq=bindparam("b_seq")),
+        [{"b_id": alteracao_id, "b_seq": primeira + i} for i, alteracao_id in enumerate(ids)]
+    )
+
+
+async def numerar_alteracoes_globais(db: AsyncSession) -> int:
+    """
+    Numera as alterações globais pendentes numa transação própria e curta (chamar depois
+    do commit da escrita, com a sessão sem transação pendente). Retorna quantas numerou.
+    Uma falha não é propagada: as pendentes ficam para a próxima chamada.
+    """
+    try:
+        ids = list(await db.scalars(_pendentes_globais()))
+        if ids:
+            ultima = (await db.execute(_numerar(insert_com_upsert(db), ids))).scalar_one()
+            await db.execute(*_atribuir_sequencias(ids, ultima))
+        await db.commit()
+        return len(ids)
+    except Exception:
+        await db.rollback()
+        _numeracao_adiada()
+        return 0
+
+
+def numerar_alteracoes_globais_sync(db: Session) -> int:
+    """numerar_alteracoes_globais para os módulos de CRUD síncronos"""
+    try:
+        ids = list(db.scalars(_pendentes_globais()))
+        if ids:
+            ultima = db.execute(_numerar(insert_com_upsert(db), ids)).scalar_one()
+            db.execute(*_atribuir_sequencias(ids, ultima))
+        db.commit()
+        return len(ids)
+    except Exception:
+        db.rollback()
+        _numeracao_adiada()
+        return 0
+
+
+def _numeracao_adiada():
+    # Chamado no except: o log leva o traceback da falha
+    _logger.error("Numeração de alterações globais adiada", exc_info=True)
+    metricas.registrar_numeracao_adiada()
+
+
+async def numerar_pendentes_globais(db: AsyncSession) -> int:
+    """
+    Numera as alterações globais que ficaram pendentes antes de ler o escopo global, para
+    que o /sync e o ETag de produtos não esperem a próxima escrita. Sem pendentes, custa
+    um SELECT pelo índice (escopo, seq).
+    """
+    pendente = await db.scalar(
+        select(Alteracao.id).where(
+            Alteracao.escopo == ESCOPO_GLOBAL,
+            Alteracao.seq == SEQ_PENDENTE
+        ).limit(1)
+    )
+    if pendente is None:
+        return 0
+    return await numerar_alteracoes_globais(db)
+
+
+async def seq_atual(db: AsyncSession, escopo: int) -> int:
+    """Última sequência confirmada do escopo (0 se nada foi registrado)"""
+    seq = await db.scalar(select(ContadorAlteracoes.seq).where(ContadorAlteracoes.escopo == escopo))
+    return seq or 0
+
+
+def seq_da_entidade(escopo: int, entidade: str, entidade_id):
+    """
+    Subconsulta com a sequência da última alteração da entidade (NULL se ela não mudou
+    desde a migração 8); usada como versão do registro nos ETags.
+    """
+    return select(Alteracao.seq).where(
+        Alteracao.escopo == escopo,
+        Alteracao.entidade == entidade,
+        Alteracao.entidade_id == entidade_id
+    ).scalar_subquery()
+
+
+async def alteracoes_desde(db: AsyncSession, escopo: int, seq: int, limite: int) -> List[Alteracao]:
+    """Até `limite` alterações do escopo com sequência maior que `seq`, em ordem (índice escopo, seq)"""
+    return list((await db.scalars(
+        select(Alteracao).where(
+            Alteracao.escopo == escopo,
+            Alteracao.seq > seq
+        ).order_by(Alteracao.seq).limit(limite)
+    )).all())
+
+
+async def _por_id(db: AsyncSession, query) -> dict:
+    return {obj.id: obj for obj in await db.scalars(query)}
+
+
+async def alteracoes_para_sincronizar(
+    db: AsyncSession,
+    user_id: int,
+    desde_usuario: int,
+    desde_global: int,
+    limite: int
+) -> dict:
+    """
+    Listas, itens e compras do usuário e produtos alterados depois das sequências
+    informadas, lidos por id (uma consulta por entidade), e os ids removidos. Registros
+    alterados que não existem mais (ex.: itens de uma lista removida) entram como removidos.
+    Com mais de `limite` alterações em um escopo, `mais` indica que há outra página.
+    """
+    do_usuario = await alteracoes_desde(db, user_id, desde_usuario, limite + 1)
+    globais = await alteracoes_desde(db, ESCOPO_GLOBAL, desde_global, limite + 1)
+    mais = len(do_usuario) > limite or len(globais) > limite
+    do_usuario, globais = do_usuario[:limite], globais[:limite]
+
+    alterados = {LISTA: set(), ITEM: set(), COMPRA: set(), PRODUTO: set()}
+    removidos = {LISTA: set(), ITEM: set(), COMPRA: set(), PRODUTO: set()}
+    for alteracao in do_usuario + globais:
+        (removidos if alteracao.removido else alterados)[alteracao.entidade].add(alteracao.entidade_id)
+
+    encontrados = {LISTA: {}, ITEM: {}, COMPRA: {}, PRODUTO: {}}
+    if alterados[LISTA]:
+        encontrados[LISTA] = await _por_id(db, select(ListaCompras).where(
+            ListaCompras.id.in_(alterados[LISTA]),
+            ListaCompras.user_id == user_id
+        ))
+    if alterados[ITEM]:
+        encontrados[ITEM] = await _por_id(db, select(ItemListaCompras).join(ListaCompras).where(
+            ItemListaCompras.id.in_(alterados[ITEM]),
+            ListaCompras.user_id == user_id
+        ))
+    if alterados[COMPRA]:
+        encontrados[COMPRA] = await _por_id(db, select(Compra).options(selectinload(Compra.itens)).where(
+            Compra.id.in_(alterados[COMPRA]),
+            Compra.user_id == user_id
+        ))
+    if alterados[PRODUTO]:
+        encontrados[PRODUTO] = await _por_id(db, select(Produto).where(Produto.id.in_(alterados[PRODUTO])))
+    for entidade, ids in alterados.items():
+        removidos[entidade] |= ids - encontrados[entidade].keys()
+
+    return {
+        "seq_usuario": do_usuario[-1].seq if do_usuario else desde_usuario,
+        "seq_global": globais[-1].seq if globais else desde_global,
+        "mais": mais,
+        "listas": list(encontrados[LISTA].values()),
+        "itens": list(encontrados[ITEM].values()),
+        "compras": list(encontrados[COMPRA].values()),
+        "produtos": list(encontrados[PRODUTO].values()),
+        "removidos": {
+            "listas": sorted(removidos[LISTA]),
+            "itens": sorted(removidos[ITEM]),
+            "compras": sorted(removidos[COMPRA]),
+            "produtos": sorted(removidos[PRODUTO])
+        }
+    }
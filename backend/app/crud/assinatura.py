@@ -6,6 +6,7 @@ from typing import Optional, List
 
 
 def create_assinatura(db: Session, user_id: int, dados: AssinaturaCreate) -> Assinatura:
+    """Adiciona a assinatura à sessão (flush); quem chama faz o commit"""
     data_inicio = datetime.utcnow()
     data_fim = None
     if dados.plano == "anual":
@@ -18,8 +19,7 @@ def create_assinatura(db: Session, user_id: int, dados: AssinaturaCreate) -> Ass
         data_fim=data_fim,
     )
     db.add(assinatura)
-    db.commit()
-    db.refresh(assinatura)
+    db.flush()
     return assinatura
 
 
@@ -2,7 +2,9 @@ from sqlalchemy.orm import Session
 from sqlalchemy import or_
 from app.models import Categoria, Produto
 from app.schemas.categoria import CategoriaCreate, CategoriaUpdate
-from typing import List, Optional
+from app.paginacao import apos_cursor
+from app.crud.alteracao import ESCOPO_GLOBAL, PRODUTO, numerar_alteracoes_globais_sync, registrar_alteracoes_sync
+from typing import List, Optional, Tuple
 
 
 def get_categoria(db: Session, categoria_id: int) -> Optional[Categoria]:
@@ -26,8 +28,10 @@ def get_categorias(
     skip: int = 0,
     limit: int = 100,
     search: Optional[str] = None,
+    cursor: Optional[Tuple[str, int]] = None,
 ) -> List[Categoria]:
-    query = db.query(Categoria)
+    """Lista categorias por (nome, id); `cursor` é o (nome, id) da última da página anterior"""
+    query = db.query(Categoria).order_by(Categoria.nome, Categoria.id)
     if search:
         query = query.filter(
             or_(
@@ -35,7 +39,11 @@ def get_categorias(
                 Categoria.descricao.ilike(f"%{search}%"),
             )
         )
-    return query.offset(skip).limit(limit).all()
+    if cursor:
+        query = query.filter(apos_cursor(db, Categoria.nome, Categoria.id, cursor))
+    else:
+        query = query.offset(skip)
+    return query.limit(limit).all()
 
 
 def create_categoria(db: Session, categoria: CategoriaCreate) -> Categoria:
@@ -62,10 +70,16 @@ def update_categoria(
 def delete_categoria(db: Session, categoria_id: int) -> bool:
     db_categoria = get_categoria(db, categoria_id)
     if db_categoria:
+        produto_ids = [
+            produto_id for (produto_id,) in
+            db.query(Produto.id).filter(Produto.categoria_id == categoria_id)
+        ]
         db.query(Produto).filter(Produto.categoria_id == categoria_id).update(
             {Produto.categoria_id: None}
         )
+        registrar_alteracoes_sync(db, ESCOPO_GLOBAL, [(PRODUTO, produto_id, False) for produto_id in produto_ids])
         db.delete(db_categoria)
         db.commit()
+        numerar_alteracoes_globais_sync(db)
         return True
     return False
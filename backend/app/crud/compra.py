@@ -1,37 +1,87 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
-from typing import List, Optional
-from datetime import datetime, timedelta
-from app.models import Compra, ItemCompra, Produto, ListaCompras, ItemListaCompras
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlalchemy import bindparam, delete, desc, func, select, update
+from typing import List, Optional, Iterable, Tuple
+from datetime import datetime, timedelta, timezone
+from app.models import (
+    Compra,
+    ItemCompra,
+    Produto,
+    ListaCompras,
+    ItemListaCompras,
+    ResumoDiarioCompras,
+    ResumoDiarioItens
+)
+from app.database import insert_com_upsert
 from app.schemas.compra import CompraCreate, CompraUpdate
+from app.indice_produtos import indice_produtos
+from app.paginacao import apos_cursor
+from app.crud.alteracao import (
+    COMPRA, ESCOPO_GLOBAL, LISTA, PRODUTO, numerar_alteracoes_globais, registrar_alteracoes, seq_da_entidade
+)
 
 # CRUD - Compras
-def get_compra(db: Session, compra_id: int, user_id: int) -> Optional[Compra]:
-    """Obtém uma compra específica do usuário"""
-    return db.query(Compra).filter(
+async def get_compra(
+    db: AsyncSession,
+    compra_id: int,
+    user_id: int,
+    recarregar: bool = False
+) -> Optional[Compra]:
+    """
+    Obtém uma compra específica do usuário (com itens carregados).
+    `recarregar` relê colunas e itens de uma compra já presente na sessão (ex.: após um commit).
+    """
+    query = select(Compra).options(
+        selectinload(Compra.itens)
+    ).where(
         Compra.id == compra_id,
         Compra.user_id == user_id
-    ).first()
+    )
+    if recarregar:
+        query = query.execution_options(populate_existing=True)
+    return (await db.scalars(query)).first()
+
+async def get_versao_compra(db: AsyncSession, compra_id: int, user_id: int) -> Optional[tuple]:
+    """(sequência da última alteração,) da compra do usuário, para o ETag; None se não existir"""
+    linha = (await db.execute(
+        select(seq_da_entidade(user_id, COMPRA, Compra.id)).where(
+            Compra.id == compra_id,
+            Compra.user_id == user_id
+        )
+    )).first()
+    return tuple(linha) if linha else None
 
-def get_compras(
-    db: Session,
+async def get_compras(
+    db: AsyncSession,
     user_id: int,
     skip: int = 0,
     limit: int = 100,
     data_inicial: Optional[datetime] = None,
-    data_final: Optional[datetime] = None
+    data_final: Optional[datetime] = None,
+    cursor: Optional[Tuple[datetime, int]] = None
 ) -> List[Compra]:
-    """Lista todas as compras do usuário"""
-    query = db.query(Compra).filter(Compra.user_id == user_id)
+    """
+    Lista todas as compras do usuário, mais recentes primeiro (itens carregados em uma única consulta extra).
+    `cursor` é o (data_compra, id) da última compra da página anterior e substitui `skip`.
+    """
+    query = select(Compra).options(
+        selectinload(Compra.itens)
+    ).where(Compra.user_id == user_id)
     
     if data_inicial:
-        query = query.filter(Compra.data_compra >= data_inicial)
+        query = query.where(Compra.data_compra >= data_inicial)
     if data_final:
-        query = query.filter(Compra.data_compra <= data_final)
+        query = query.where(Compra.data_compra <= data_final)
+    
+    query = query.order_by(desc(Compra.data_compra), desc(Compra.id))
+    if cursor:
+        query = query.where(apos_cursor(db, Compra.data_compra, Compra.id, cursor, decrescente=True))
+    else:
+        query = query.offset(skip)
     
-    return query.order_by(desc(Compra.data_compra)).offset(skip).limit(limit).all()
+    return list((await db.scalars(query.limit(limit))).all())
 
-def create_compra(db: Session, compra: CompraCreate, user_id: int) -> Compra:
+async def create_compra(db: AsyncSession, compra: CompraCreate, user_id: int) -> Compra:
     """Cria uma nova compra"""
     # Calcular valor total
     valor_total = sum(
@@ -48,7 +98,7 @@ def create_compra(db: Session, compra: CompraCreate, user_id: int) -> Compra:
         valor_total=valor_total
     )
     db.add(db_compra)
-    db.flush()
+    await db.flush()
     
     # Adicionar itens
     for item in compra.itens:
@@ -64,41 +114,57 @@ def create_compra(db: Session, compra: CompraCreate, user_id: int) -> Compra:
         )
         db.add(db_item)
     
-    db.commit()
-    db.refresh(db_compra)
-    return db_compra
+    await _atualizar_resumo_diario(
+        db,
+        db_compra,
+        [(item.nome_item, item.quantidade, item.preco_unitario * item.quantidade) for item in compra.itens]
+    )
+    await registrar_alteracoes(db, user_id, [(COMPRA, db_compra.id, False)])
+    
+    await db.commit()
+    return await get_compra(db, db_compra.id, user_id, recarregar=True)
 
-def update_compra(
-    db: Session,
+async def update_compra(
+    db: AsyncSession,
     compra_id: int,
     compra_update: CompraUpdate,
     user_id: int
 ) -> Optional[Compra]:
     """Atualiza uma compra"""
-    db_compra = get_compra(db, compra_id, user_id)
+    db_compra = await get_compra(db, compra_id, user_id)
     if not db_compra:
         return None
     
+    # Local e observação não entram nos resumos diários, que ficam inalterados
     update_data = compra_update.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         setattr(db_compra, key, value)
     
-    db.commit()
-    db.refresh(db_compra)
-    return db_compra
+    await db.flush()
+    await registrar_alteracoes(db, user_id, [(COMPRA, compra_id, False)])
+    await db.commit()
+    return await get_compra(db, compra_id, user_id, recarregar=True)
 
-def delete_compra(db: Session, compra_id: int, user_id: int) -> bool:
+async def delete_compra(db: AsyncSession, compra_id: int, user_id: int) -> bool:
     """Deleta uma compra"""
-    db_compra = get_compra(db, compra_id, user_id)
+    db_compra = await get_compra(db, compra_id, user_id)
     if not db_compra:
         return False
     
-    db.delete(db_compra)
-    db.commit()
+    await _atualizar_resumo_diario(
+        db,
+        db_compra,
+        [(item.nome_item, item.quantidade, item.preco_total) for item in db_compra.itens],
+        sinal=-1
+    )
+    await db.delete(db_compra)
+    await db.flush()
+    await registrar_alteracoes(db, user_id, [(COMPRA, compra_id, True)])
+    await db.commit()
     return True
 
-def finalizar_lista_e_criar_compra(
-    db: Session,
+async def finalizar_lista_e_criar_compra(
+    db: AsyncSession,
     lista_id: int,
     user_id: int,
     local_compra: Optional[str] = None,
@@ -111,10 +177,14 @@ def finalizar_lista_e_criar_compra(
     Opcionalmente adiciona produtos ao estoque.
     """
     # Buscar lista
-    lista = db.query(ListaCompras).filter(
-        ListaCompras.id == lista_id,
-        ListaCompras.user_id == user_id
-    ).first()
+    lista = (await db.scalars(
+        select(ListaCompras).options(
+            selectinload(ListaCompras.itens)
+        ).where(
+            ListaCompras.id == lista_id,
+            ListaCompras.user_id == user_id
+        )
+    )).first()
     
     if not lista:
         return None
@@ -140,111 +210,262 @@ def finalizar_lista_e_criar_compra(
         valor_total=valor_total
     )
     db.add(db_compra)
-    db.flush()
+    await db.flush()
     
-    # Processar cada item
-    for item in itens_comprados:
-        preco_unitario = item.preco_estimado or 0
-        preco_total = preco_unitario * item.quantidade
-        
-        # Criar item da compra
-        db_item = ItemCompra(
-            compra_id=db_compra.id,
-            produto_id=item.produto_id,
-            nome_item=item.nome_item,
-            quantidade=item.quantidade,
-            preco_unitario=preco_unitario,
-            preco_total=preco_total,
-            categoria=None
-        )
-        db.add(db_item)
-        
-        # Adicionar/atualizar no estoque
-        if adicionar_ao_estoque:
-            processar_item_no_estoque(
-                db, 
-                item, 
-                preco_unitario if atualizar_precos else None
-            )
+    # Criar itens da compra em lote (um único executemany)
+    await db.execute(ItemCompra.__table__.insert(), [
+        {
+            "compra_id": db_compra.id,
+            "produto_id": item.produto_id,
+            "nome_item": item.nome_item,
+            "quantidade": item.quantidade,
+            "preco_unitario": item.preco_estimado or 0,
+            "preco_total": (item.preco_estimado or 0) * item.quantidade,
+            "categoria": None
+        }
+        for item in itens_comprados
+    ])
+    
+    # Adicionar/atualizar no estoque
+    produtos_criados = []
+    if adicionar_ao_estoque:
+        produtos_criados = await processar_itens_no_estoque(db, itens_comprados, atualizar_precos)
+    
+    await _atualizar_resumo_diario(
+        db,
+        db_compra,
+        [
+            (item.nome_item, item.quantidade, (item.preco_estimado or 0) * item.quantidade)
+            for item in itens_comprados
+        ]
+    )
     
     # Marcar lista como concluída
     lista.concluida = True
+    # Envia as escritas pendentes antes: o contador do usuário é sempre o último lock
+    await db.flush()
+    await registrar_alteracoes(db, user_id, [(COMPRA, db_compra.id, False), (LISTA, lista_id, False)])
     
-    db.commit()
-    db.refresh(db_compra)
-    return db_compra
+    await db.commit()
+    if adicionar_ao_estoque:
+        await numerar_alteracoes_globais(db)
+    for produto_id, nome in produtos_criados:
+        indice_produtos.adicionar(produto_id, nome)
+    return await get_compra(db, db_compra.id, user_id, recarregar=True)
 
-def processar_item_no_estoque(
-    db: Session,
-    item: ItemListaCompras,
-    novo_preco: Optional[float] = None
-):
+def _normalizar_nome(nome: str) -> str:
+    """Chave usada para casar itens da lista com produtos pelo nome"""
+    return nome.lower()
+
+async def processar_itens_no_estoque(
+    db: AsyncSession,
+    itens: List[ItemListaCompras],
+    atualizar_precos: bool = True
+) -> List[Tuple[int, str]]:
     """
-    Adiciona ou atualiza produto no estoque baseado no item da lista
+    Adiciona ou atualiza no estoque os produtos dos itens da lista.
+    Retorna (id, nome) dos produtos criados.
+    Resolve todos os produtos em no máximo duas consultas (ids via IN e nomes
+    normalizados via lower(nome) IN) e aplica inserções e incrementos de estoque em lote.
     """
-    produto = None
+    ids = {item.produto_id for item in itens if item.produto_id}
+    nomes = {_normalizar_nome(item.nome_item) for item in itens if not item.produto_id}
     
-    # Se tem produto_id vinculado, usar esse produto
-    if item.produto_id:
-        produto = db.query(Produto).filter(Produto.id == item.produto_id).first()
-    else:
-        # Tentar encontrar produto pelo nome (case-insensitive)
-        produto = db.query(Produto).filter(
-            Produto.nome.ilike(item.nome_item)
-        ).first()
-    
-    if produto:
-        # Atualizar produto existente
-        produto.quantidade_estoque += item.quantidade
-        if novo_preco is not None and novo_preco > 0:
-            produto.preco = novo_preco
-    else:
-        # Criar novo produto
-        produto = Produto(
-            nome=item.nome_item,
-            descricao=item.observacao or f"Adicionado automaticamente da lista de compras",
-            preco=novo_preco or 0,
-            quantidade_estoque=item.quantidade,
-            categoria=None
+    # Produtos vinculados por id
+    existentes = set()
+    if ids:
+        existentes = set(await db.scalars(select(Produto.id).where(Produto.id.in_(ids))))
+    
+    # Produtos encontrados pelo nome (case-insensitive); o de menor id vence
+    por_nome = {}
+    if nomes:
+        for produto_id, nome_normalizado in await db.execute(
+            select(Produto.id, func.lower(Produto.nome)).where(
+                func.lower(Produto.nome).in_(nomes)
+            ).order_by(Produto.id)
+        ):
+            por_nome.setdefault(nome_normalizado, produto_id)
+    
+    incrementos = {}
+    novos_precos = {}
+    novos_produtos = {}
+    for item in itens:
+        novo_preco = (item.preco_estimado or 0) if atualizar_precos else None
+        
+        if item.produto_id:
+            produto_id = item.produto_id if item.produto_id in existentes else None
+        else:
+            produto_id = por_nome.get(_normalizar_nome(item.nome_item))
+        
+        if produto_id is not None:
+            # Atualizar produto existente
+            incrementos[produto_id] = incrementos.get(produto_id, 0) + item.quantidade
+            if novo_preco is not None and novo_preco > 0:
+                novos_precos[produto_id] = novo_preco
+            continue
+        
+        # Criar novo produto (itens repetidos com o mesmo nome viram um só produto)
+        chave = _normalizar_nome(item.nome_item)
+        if chave in novos_produtos:
+            novos_produtos[chave]["quantidade_estoque"] += item.quantidade
+            if novo_preco:
+                novos_produtos[chave]["preco"] = novo_preco
+        else:
+            novos_produtos[chave] = {
+                "nome": item.nome_item,
+                "descricao": item.observacao or "Adicionado automaticamente da lista de compras",
+                "preco": novo_preco or 0,
+                "quantidade_estoque": item.quantidade,
+                "categoria_id": None
+            }
+    
+    # Em ordem de id: finalizações concorrentes travam os produtos em comum na mesma ordem
+    incrementos = dict(sorted(incrementos.items()))
+    produtos = Produto.__table__
+    if incrementos:
+        # Incremento no servidor (quantidade_estoque = quantidade_estoque + :n): finalizações
+        # concorrentes do mesmo produto não perdem atualizações e não precisam de SELECT ... FOR UPDATE
+        await db.execute(
+            update(produtos)
+            .where(produtos.c.id == bindparam("b_id"))
+            .values(
+                quantidade_estoque=func.coalesce(produtos.c.quantidade_estoque, 0) + bindparam("b_incremento"),
+                preco=func.coalesce(bindparam("b_preco"), produtos.c.preco)
+            ),
+            [
+                {
+                    "b_id": produto_id,
+                    "b_incremento": quantidade,
+                    "b_preco": novos_precos.get(produto_id)
+                }
+                for produto_id, quantidade in incrementos.items()
+            ]
         )
-        db.add(produto)
-
-def get_estatisticas_compras(db: Session, user_id: int, dias: int = 30) -> dict:
-    """Retorna estatísticas de compras do usuário"""
-    data_inicial = datetime.now() - timedelta(days=dias)
     
-    compras = db.query(Compra).filter(
-        Compra.user_id == user_id,
-        Compra.data_compra >= data_inicial
-    ).all()
+    criados = []
+    if novos_produtos:
+        criados = [
+            tuple(linha)
+            for linha in await db.execute(
+                produtos.insert().returning(produtos.c.id, produtos.c.nome),
+                list(novos_produtos.values())
+            )
+        ]
+    await registrar_alteracoes(db, ESCOPO_GLOBAL, [
+        *((PRODUTO, produto_id, False) for produto_id in incrementos),
+        *((PRODUTO, produto_id, False) for produto_id, _ in criados)
+    ])
+    return criados
+
+def _dia_utc(momento: datetime):
+    """Dia (UTC) de um instante; datetimes sem fuso já estão em UTC (SQLite)"""
+    if momento.tzinfo is not None:
+        momento = momento.astimezone(timezone.utc)
+    return momento.date()
+
+async def _atualizar_resumo_diario(
+    db: AsyncSession,
+    compra: Compra,
+    itens: Iterable[Tuple[str, int, float]],
+    sinal: int = 1
+):
+    """
+    Soma (sinal=1) ou subtrai (sinal=-1) uma compra dos resumos diários do usuário.
+    `itens` são tuplas (nome_item, quantidade, preco_total).
+    """
+    insert = insert_com_upsert(db)
+    dia = _dia_utc(compra.data_compra)
     
-    total_gasto = sum(c.valor_total for c in compras)
-    total_compras = len(compras)
-    media_por_compra = total_gasto / total_compras if total_compras > 0 else 0
+    # Agrupar por nome antes do upsert: o ON CONFLICT não aceita a mesma chave duas vezes
+    por_item = {}
+    for nome, quantidade, preco_total in itens:
+        q, g = por_item.get(nome, (0, 0))
+        por_item[nome] = (q + quantidade, g + preco_total)
     
-    # Produtos mais comprados
-    itens = db.query(ItemCompra).join(Compra).filter(
-        Compra.user_id == user_id,
-        Compra.data_compra >= data_inicial
-    ).all()
+    stmt = insert(ResumoDiarioCompras).values(
+        user_id=compra.user_id,
+        dia=dia,
+        total_compras=sinal,
+        total_gasto=sinal * compra.valor_total
+    )
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=["user_id", "dia"],
+        set_={
+            "total_compras": ResumoDiarioCompras.total_compras + stmt.excluded.total_compras,
+            "total_gasto": ResumoDiarioCompras.total_gasto + stmt.excluded.total_gasto
+        }
+    ))
     
-    produtos_count = {}
-    for item in itens:
-        nome = item.nome_item
-        if nome in produtos_count:
-            produtos_count[nome]['quantidade'] += item.quantidade
-            produtos_count[nome]['total_gasto'] += item.preco_total
-        else:
-            produtos_count[nome] = {
-                'quantidade': item.quantidade,
-                'total_gasto': item.preco_total
+    if por_item:
+        stmt = insert(ResumoDiarioItens).values([
+            {
+                "user_id": compra.user_id,
+                "dia": dia,
+                "nome_item": nome,
+                "quantidade": sinal * quantidade,
+                "total_gasto": sinal * gasto
             }
+            for nome, (quantidade, gasto) in por_item.items()
+        ])
+        await db.execute(stmt.on_conflict_do_update(
+            index_elements=["user_id", "dia", "nome_item"],
+            set_={
+                "quantidade": ResumoDiarioItens.quantidade + stmt.excluded.quantidade,
+                "total_gasto": ResumoDiarioItens.total_gasto + stmt.excluded.total_gasto
+            }
+        ))
     
-    produtos_mais_comprados = sorted(
-        produtos_count.items(),
-        key=lambda x: x[1]['quantidade'],
-        reverse=True
-    )[:10]
+    if sinal < 0:
+        # Remover linhas zeradas para o resumo não crescer com dias/itens sem compras
+        await db.execute(delete(ResumoDiarioCompras).where(
+            ResumoDiarioCompras.user_id == compra.user_id,
+            ResumoDiarioCompras.dia == dia,
+            ResumoDiarioCompras.total_compras <= 0
+        ).execution_options(synchronize_session=False))
+        await db.execute(delete(ResumoDiarioItens).where(
+            ResumoDiarioItens.user_id == compra.user_id,
+            ResumoDiarioItens.dia == dia,
+            ResumoDiarioItens.quantidade <= 0
+        ).execution_options(synchronize_session=False))
+
+async def get_estatisticas_compras(db: AsyncSession, user_id: int, dias: int = 30) -> dict:
+    """
+    Retorna estatísticas de compras do usuário.
+    Lê apenas os resumos diários, considerando dias inteiros (UTC, como os resumos) a
+    partir da data inicial.
+    """
+    data_inicial = (datetime.now(timezone.utc) - timedelta(days=dias)).date()
+    
+    total_compras, total_gasto = (await db.execute(
+        select(
+            func.coalesce(func.sum(ResumoDiarioCompras.total_compras), 0),
+            func.coalesce(func.sum(ResumoDiarioCompras.total_gasto), 0)
+        ).where(
+            ResumoDiarioCompras.user_id == user_id,
+            ResumoDiarioCompras.dia >= data_inicial
+        )
+    )).one()
+    
+    media_por_compra = total_gasto / total_compras if total_compras > 0 else 0
+    
+    # Produtos mais comprados
+    quantidade_total = func.sum(ResumoDiarioItens.quantidade).label('quantidade')
+    produtos_mais_comprados = (await db.execute(
+        select(
+            ResumoDiarioItens.nome_item,
+            quantidade_total,
+            func.sum(ResumoDiarioItens.total_gasto).label('total_gasto')
+        ).where(
+            ResumoDiarioItens.user_id == user_id,
+            ResumoDiarioItens.dia >= data_inicial
+        ).group_by(
+            ResumoDiarioItens.nome_item
+        ).order_by(
+            # Empates em ordem alfabética: o top 10 não varia entre chamadas
+            desc(quantidade_total),
+            ResumoDiarioItens.nome_item
+        ).limit(10)
+    )).all()
     
     return {
         'total_compras': total_compras,
@@ -253,9 +474,9 @@ def get_estatisticas_compras(db: Session, user_id: int, dias: int = 30) -> dict:
         'produtos_mais_comprados': [
             {
                 'nome': nome,
-                'quantidade': dados['quantidade'],
-                'total_gasto': dados['total_gasto']
+                'quantidade': quantidade,
+                'total_gasto': gasto
             }
-            for nome, dados in produtos_mais_comprados
+            for nome, quantidade, gasto in produtos_mais_comprados
         ]
     }
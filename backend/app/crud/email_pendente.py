@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta
+from typing import List
+from sqlalchemy.orm import Session
+from app.models import EmailPendente
+
+
+def enfileirar_email(
+    db: Session,
+    destinatario: str,
+    assunto: str,
+    corpo_html: str,
+    corpo_texto: str = "",
+) -> EmailPendente:
+    """
+    Adiciona o e-mail à caixa de saída na transação de quem chama, que faz o commit junto
+    com a alteração que originou o e-mail; o envio é feito pelo worker.
+    """
+    email = EmailPendente(
+        destinatario=destinatario,
+        assunto=assunto,
+        corpo_html=corpo_html,
+        corpo_texto=corpo_texto,
+        status="pendente",
+        tentativas=0,
+        proxima_tentativa_em=datetime.utcnow(),
+    )
+    db.add(email)
+    return email
+
+
+def reservar_emails_para_envio(db: Session, limite: int = 50, prazo_segundos: float = 300) -> List[EmailPendente]:
+    """
+    Reserva (status "enviando") até `limite` e-mails pendentes com tentativa vencida, mais
+    antigos primeiro, junto com reservas vencidas (worker que caiu no meio do envio). A
+    reserva vale prazo_segundos (em proxima_tentativa_em). O chamador faz o commit antes de
+    enviar, para o SMTP rodar fora da transação, sem locks; no PostgreSQL, FOR UPDATE SKIP
+    LOCKED impede que workers de processos diferentes reservem o mesmo e-mail.
+    """
+    agora = datetime.utcnow()
+    emails = (
+        db.query(EmailPendente)
+        .filter(
+            EmailPendente.status.in_(("pendente", "enviando")),
+            EmailPendente.proxima_tentativa_em <= agora,
+        )
+        .order_by(EmailPendente.proxima_tentativa_em, EmailPendente.id)
+        .with_for_update(skip_locked=True)
+        .limit(limite)
+        .all()
+    )
+    for email in emails:
+        email.status = "enviando"
+        email.proxima_tentativa_em = agora + timedelta(seconds=prazo_segundos)
+    return emails
+
+
+def get_emails_reservados(db: Session, ids: List[int]) -> List[EmailPendente]:
+    """E-mails ainda reservados dentre `ids`, para registrar o resultado do envio"""
+    return (
+        db.query(EmailPendente)
+        .filter(EmailPendente.id.in_(ids), EmailPendente.status == "enviando")
+        .all()
+    )
+
+
+def registrar_envio(email: EmailPendente):
+    email.status = "enviado"
+    email.tentativas += 1
+    email.enviado_em = datetime.utcnow()
+    email.ultimo_erro = None
+
+
+def registrar_falha(
+    email: EmailPendente,
+    erro: str,
+    max_tentativas: int,
+    atraso_base: float,
+    atraso_max: float,
+):
+    """Reagenda com backoff exponencial (atraso_base * 2^tentativas) ou desiste após max_tentativas"""
+    email.tentativas += 1
+    email.ultimo_erro = erro
+    if email.tentativas >= max_tentativas:
+        email.status = "falhou"
+        return
+    atraso = min(atraso_max, atraso_base * 2 ** (email.tentativas - 1))
+    email.status = "pendente"
+    email.proxima_tentativa_em = datetime.utcnow() + timedelta(seconds=atraso)
+
+
+def descartar(email: EmailPendente, motivo: str):
+    email.status = "descartado"
+    email.ultimo_erro = motivo
@@ -1,56 +1,102 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List, Optional
-from app.models import ListaCompras, ItemListaCompras
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlalchemy import bindparam, delete, insert, select, update
+from typing import Iterable, List, Optional, Tuple
+from datetime import datetime
+from app.models import ListaCompras, ItemListaCompras, Produto
 from app.schemas.lista_compras import (
     ListaComprasCreate,
     ListaComprasUpdate,
     ItemListaComprasCreate,
-    ItemListaComprasUpdate
+    ItemListaComprasUpdate,
+    OperacaoItem
 )
+from app.paginacao import apos_cursor
+from app.crud.alteracao import ITEM, LISTA, registrar_alteracoes, seq_da_entidade
+from app import tempo_real
 
 # CRUD - Lista de Compras
-def get_lista_compras(db: Session, lista_id: int, user_id: int) -> Optional[ListaCompras]:
-    """Obtém uma lista de compras específica do usuário"""
-    return db.query(ListaCompras).filter(
+async def get_lista_compras(
+    db: AsyncSession,
+    lista_id: int,
+    user_id: int,
+    recarregar: bool = False,
+    bloquear: bool = False
+) -> Optional[ListaCompras]:
+    """
+    Obtém uma lista de compras específica do usuário (com itens carregados).
+    `recarregar` relê colunas e itens de uma lista já presente na sessão (ex.: após um commit).
+    `bloquear` trava a linha da lista (FOR UPDATE) até o commit.
+    """
+    query = select(ListaCompras).options(
+        selectinload(ListaCompras.itens)
+    ).where(
         ListaCompras.id == lista_id,
         ListaCompras.user_id == user_id
-    ).first()
+    )
+    if recarregar:
+        query = query.execution_options(populate_existing=True)
+    if bloquear:
+        query = query.with_for_update(of=ListaCompras)
+    return (await db.scalars(query)).first()
 
-def get_listas_compras(
-    db: Session,
+async def get_versao_lista(db: AsyncSession, lista_id: int, user_id: int) -> Optional[tuple]:
+    """(updated_at, sequência da última alteração) da lista do usuário, para o ETag; None se não existir"""
+    linha = (await db.execute(
+        select(ListaCompras.updated_at, seq_da_entidade(user_id, LISTA, ListaCompras.id)).where(
+            ListaCompras.id == lista_id,
+            ListaCompras.user_id == user_id
+        )
+    )).first()
+    return tuple(linha) if linha else None
+
+async def get_listas_compras(
+    db: AsyncSession,
     user_id: int,
     skip: int = 0,
     limit: int = 100,
-    apenas_ativas: bool = False
+    apenas_ativas: bool = False,
+    cursor: Optional[Tuple[datetime, int]] = None
 ) -> List[ListaCompras]:
-    """Lista todas as listas de compras do usuário"""
-    query = db.query(ListaCompras).filter(ListaCompras.user_id == user_id)
+    """
+    Lista todas as listas de compras do usuário, mais recentes primeiro (itens carregados em uma única consulta extra).
+    `cursor` é o (created_at, id) da última lista da página anterior e substitui `skip`.
+    """
+    query = select(ListaCompras).options(
+        selectinload(ListaCompras.itens)
+    ).where(ListaCompras.user_id == user_id)
     
     if apenas_ativas:
-        query = query.filter(ListaCompras.concluida == False)
+        query = query.where(ListaCompras.concluida == False)
+    
+    query = query.order_by(ListaCompras.created_at.desc(), ListaCompras.id.desc())
+    if cursor:
+        query = query.where(apos_cursor(db, ListaCompras.created_at, ListaCompras.id, cursor, decrescente=True))
+    else:
+        query = query.offset(skip)
     
-    return query.order_by(ListaCompras.created_at.desc()).offset(skip).limit(limit).all()
+    return list((await db.scalars(query.limit(limit))).all())
 
-def create_lista_compras(db: Session, lista: ListaComprasCreate, user_id: int) -> ListaCompras:
+async def create_lista_compras(db: AsyncSession, lista: ListaComprasCreate, user_id: int) -> ListaCompras:
     """Cria uma nova lista de compras"""
     db_lista = ListaCompras(
         **lista.model_dump(),
         user_id=user_id
     )
     db.add(db_lista)
-    db.commit()
-    db.refresh(db_lista)
-    return db_lista
+    await db.flush()
+    await registrar_alteracoes(db, user_id, [(LISTA, db_lista.id, False)])
+    await db.commit()
+    return await get_lista_compras(db, db_lista.id, user_id, recarregar=True)
 
-def update_lista_compras(
-    db: Session,
+async def update_lista_compras(
+    db: AsyncSession,
     lista_id: int,
     lista_update: ListaComprasUpdate,
     user_id: int
 ) -> Optional[ListaCompras]:
     """Atualiza uma lista de compras"""
-    db_lista = get_lista_compras(db, lista_id, user_id)
+    db_lista = await get_lista_compras(db, lista_id, user_id)
     if not db_lista:
         return None
     
@@ -58,109 +104,398 @@ def update_lista_compras(
     for key, value in update_data.items():
         setattr(db_lista, key, value)
     
-    db.commit()
-    db.refresh(db_lista)
-    return db_lista
+    await db.flush()
+    await registrar_alteracoes(db, user_id, [(LISTA, lista_id, False)])
+    await db.commit()
+    return await get_lista_compras(db, lista_id, user_id, recarregar=True)
 
-def delete_lista_compras(db: Session, lista_id: int, user_id: int) -> bool:
+async def delete_lista_compras(db: AsyncSession, lista_id: int, user_id: int) -> bool:
     """Deleta uma lista de compras"""
-    db_lista = get_lista_compras(db, lista_id, user_id)
+    # Lista antes dos itens (removidos em cascata), como nas escritas de itens
+    db_lista = await get_lista_compras(db, lista_id, user_id, bloquear=True)
     if not db_lista:
         return False
     
-    db.delete(db_lista)
-    db.commit()
+    # Itens da lista removida não ganham lápide própria: o /sync os dá como removidos
+    # ao não encontrá-los mais
+    await db.delete(db_lista)
+    await db.flush()
+    await registrar_alteracoes(db, user_id, [(LISTA, lista_id, True)])
+    await db.commit()
     return True
 
+async def get_resumos_listas(
+    db: AsyncSession,
+    user_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    apenas_ativas: bool = False,
+    cursor: Optional[Tuple[datetime, int]] = None
+) -> List[ListaCompras]:
+    """
+    Listas do usuário sem os itens, para resumos: os contadores ficam na própria lista,
+    então é uma única consulta pelo índice (user_id, created_at, id).
+    """
+    query = select(ListaCompras).where(ListaCompras.user_id == user_id)
+    if apenas_ativas:
+        query = query.where(ListaCompras.concluida == False)
+    
+    query = query.order_by(ListaCompras.created_at.desc(), ListaCompras.id.desc())
+    if cursor:
+        query = query.where(apos_cursor(db, ListaCompras.created_at, ListaCompras.id, cursor, decrescente=True))
+    else:
+        query = query.offset(skip)
+    
+    return list((await db.scalars(query.limit(limit))).all())
+
 # CRUD - Itens da Lista
-def get_item_lista(db: Session, item_id: int, user_id: int) -> Optional[ItemListaCompras]:
-    """Obtém um item específico da lista do usuário"""
-    return db.query(ItemListaCompras).join(ListaCompras).filter(
+def _valor_item(item: ItemListaCompras) -> float:
+    return (item.preco_estimado or 0) * item.quantidade
+
+def _ajustar_contadores(lista_id: int, itens: int = 0, comprados: int = 0, valor: float = 0):
+    """
+    UPDATE dos contadores da lista por incremento (total_itens = total_itens + n), atômico
+    mesmo com outras requisições alterando itens da mesma lista. Executar na mesma
+    transação da alteração do item.
+    """
+    return update(ListaCompras).where(ListaCompras.id == lista_id).values(
+        total_itens=ListaCompras.total_itens + itens,
+        itens_comprados=ListaCompras.itens_comprados + comprados,
+        valor_estimado_total=ListaCompras.valor_estimado_total + valor
+    )
+
+async def get_item_lista(
+    db: AsyncSession,
+    item_id: int,
+    user_id: int,
+    bloquear: bool = False
+) -> Optional[ItemListaCompras]:
+    """
+    Obtém um item específico da lista do usuário.
+    `bloquear` trava a linha da lista do item (FOR UPDATE) até o commit, para que duas
+    alterações simultâneas de itens da lista não calculem os contadores a partir do mesmo
+    estado. Toda escrita em itens trava a lista antes (aqui, no lote e na remoção da
+    lista), então os locks são sempre tomados na ordem lista -> itens.
+    """
+    if bloquear:
+        lista_id = await db.scalar(
+            select(ListaCompras.id).where(
+                ListaCompras.id == select(ItemListaCompras.lista_id).where(
+                    ItemListaCompras.id == item_id
+                ).scalar_subquery(),
+                ListaCompras.user_id == user_id
+            ).with_for_update()
+        )
+        if lista_id is None:
+            return None
+        return (await db.scalars(
+            select(ItemListaCompras).where(
+                ItemListaCompras.id == item_id,
+                ItemListaCompras.lista_id == lista_id
+            )
+        )).first()
+    
+    query = select(ItemListaCompras).join(ListaCompras).where(
         ItemListaCompras.id == item_id,
         ListaCompras.user_id == user_id
-    ).first()
+    )
+    return (await db.scalars(query)).first()
 
-def create_item_lista(
-    db: Session,
+async def create_item_lista(
+    db: AsyncSession,
     item: ItemListaComprasCreate,
     lista_id: int,
     user_id: int
 ) -> Optional[ItemListaCompras]:
     """Adiciona um item à lista de compras"""
-    # Verificar se a lista pertence ao usuário
-    lista = get_lista_compras(db, lista_id, user_id)
-    if not lista:
-        return None
-    
     db_item = ItemListaCompras(
         **item.model_dump(),
         lista_id=lista_id
     )
+    # O mesmo UPDATE atualiza os contadores e verifica se a lista pertence ao usuário
+    resultado = await db.execute(
+        _ajustar_contadores(lista_id, itens=1, valor=_valor_item(db_item)).where(ListaCompras.user_id == user_id)
+    )
+    if not resultado.rowcount:
+        return None
+    
     db.add(db_item)
-    db.commit()
-    db.refresh(db_item)
+    await db.flush()
+    await registrar_alteracoes(db, user_id, [(ITEM, db_item.id, False), (LISTA, lista_id, False)])
+    await db.commit()
+    await db.refresh(db_item)
+    await tempo_real.publicar(tempo_real.item_criado(db_item))
     return db_item
 
-def update_item_lista(
-    db: Session,
+async def update_item_lista(
+    db: AsyncSession,
     item_id: int,
     item_update: ItemListaComprasUpdate,
     user_id: int
 ) -> Optional[ItemListaCompras]:
     """Atualiza um item da lista"""
-    db_item = get_item_lista(db, item_id, user_id)
+    db_item = await get_item_lista(db, item_id, user_id, bloquear=True)
     if not db_item:
         return None
     
+    comprado_antes, valor_antes = bool(db_item.comprado), _valor_item(db_item)
     update_data = item_update.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         setattr(db_item, key, value)
     
-    db.commit()
-    db.refresh(db_item)
+    comprados = int(bool(db_item.comprado)) - int(comprado_antes)
+    valor = _valor_item(db_item) - valor_antes
+    if comprados or valor:
+        await db.execute(_ajustar_contadores(db_item.lista_id, comprados=comprados, valor=valor))
+    await db.flush()
+    await registrar_alteracoes(db, user_id, [(ITEM, item_id, False), (LISTA, db_item.lista_id, False)])
+    await db.commit()
+    await db.refresh(db_item)
+    await tempo_real.publicar(tempo_real.item_alterado(
+        db_item.lista_id, item_id, {campo: getattr(db_item, campo) for campo in update_data}
+    ))
     return db_item
 
-def delete_item_lista(db: Session, item_id: int, user_id: int) -> bool:
+async def delete_item_lista(db: AsyncSession, item_id: int, user_id: int) -> bool:
     """Remove um item da lista"""
-    db_item = get_item_lista(db, item_id, user_id)
+    db_item = await get_item_lista(db, item_id, user_id, bloquear=True)
     if not db_item:
         return False
     
-    db.delete(db_item)
-    db.commit()
+    await db.execute(_ajustar_contadores(
+        db_item.lista_id, itens=-1, comprados=-int(bool(db_item.comprado)), valor=-_valor_item(db_item)
+    ))
+    await db.delete(db_item)
+    await db.flush()
+    await registrar_alteracoes(db, user_id, [(ITEM, item_id, True), (LISTA, db_item.lista_id, False)])
+    await db.commit()
+    await tempo_real.publicar(tempo_real.item_removido(db_item.lista_id, item_id))
     return True
 
-def toggle_item_comprado(db: Session, item_id: int, user_id: int) -> Optional[ItemListaCompras]:
+async def toggle_item_comprado(db: AsyncSession, item_id: int, user_id: int) -> Optional[ItemListaCompras]:
     """Marca/desmarca um item como comprado"""
-    db_item = get_item_lista(db, item_id, user_id)
+    db_item = await get_item_lista(db, item_id, user_id, bloquear=True)
     if not db_item:
         return None
     
     db_item.comprado = not db_item.comprado
-    db.commit()
-    db.refresh(db_item)
+    await db.execute(_ajustar_contadores(db_item.lista_id, comprados=1 if db_item.comprado else -1))
+    await db.flush()
+    await registrar_alteracoes(db, user_id, [(ITEM, item_id, False), (LISTA, db_item.lista_id, False)])
+    await db.commit()
+    await db.refresh(db_item)
+    await tempo_real.publicar(tempo_real.item_alterado(db_item.lista_id, item_id, {"comprado": db_item.comprado}))
     return db_item
 
-def get_resumo_lista(db: Session, lista_id: int, user_id: int) -> Optional[dict]:
-    """Retorna resumo da lista de compras"""
-    lista = get_lista_compras(db, lista_id, user_id)
-    if not lista:
+async def adicionar_produto_lista(
+    db: AsyncSession,
+    lista_id: int,
+    produto: Produto,
+    quantidade: int,
+    user_id: int
+) -> Optional[ItemListaCompras]:
+    """
+    Adiciona um produto à lista; se ele já estiver nela, soma `quantidade` ao item.
+    A lista é travada antes de procurar o item, então duas adições simultâneas do mesmo
+    produto não criam itens duplicados nem ajustam os contadores a partir de um item já
+    alterado.
+    """
+    # UPDATE sem efeito em vez de SELECT ... FOR UPDATE: trava a linha da lista no
+    # PostgreSQL e também o banco no SQLite, que ignora FOR UPDATE
+    resultado = await db.execute(_ajustar_contadores(lista_id).where(ListaCompras.user_id == user_id))
+    if not resultado.rowcount:
         return None
     
-    total_itens = len(lista.itens)
-    itens_comprados = sum(1 for item in lista.itens if item.comprado)
-    valor_total = sum(
-        (item.preco_estimado or 0) * item.quantidade 
-        for item in lista.itens
+    item_existente = (await db.scalars(
+        select(ItemListaCompras).where(
+            ItemListaCompras.lista_id == lista_id,
+            ItemListaCompras.produto_id == produto.id
+        )
+    )).first()
+    if item_existente:
+        return await incrementar_quantidade_item(db, item_existente, quantidade, user_id)
+    
+    item = ItemListaComprasCreate(
+        nome_item=produto.nome,
+        quantidade=quantidade,
+        preco_estimado=produto.preco,
+        produto_id=produto.id,
+        observacao=produto.descricao if produto.descricao else None
     )
+    return await create_item_lista(db, item, lista_id, user_id)
+
+async def incrementar_quantidade_item(
+    db: AsyncSession,
+    db_item: ItemListaCompras,
+    quantidade: int,
+    user_id: int
+) -> ItemListaCompras:
+    """
+    Soma `quantidade` a um item já existente na lista (ex.: mesmo produto adicionado de novo).
+    O item deve ter sido lido com a lista travada (ver adicionar_produto_lista).
+    """
+    # Expressão SQL em vez de valor lido: incremento atômico no banco
+    db_item.quantidade = ItemListaCompras.quantidade + quantidade
+    await db.execute(_ajustar_contadores(db_item.lista_id, valor=(db_item.preco_estimado or 0) * quantidade))
+    await db.flush()
+    await registrar_alteracoes(db, user_id, [(ITEM, db_item.id, False), (LISTA, db_item.lista_id, False)])
+    await db.commit()
+    await db.refresh(db_item)
+    await tempo_real.publicar(tempo_real.item_alterado(
+        db_item.lista_id, db_item.id, {"quantidade": db_item.quantidade}
+    ))
+    return db_item
+
+# Colunas que uma operação "atualizar" do lote pode alterar
+CAMPOS_ATUALIZAVEIS = tuple(ItemListaComprasUpdate.model_fields)
+
+def _totais_itens(itens: Iterable[dict]) -> Tuple[int, int, float]:
+    """(total, comprados, valor estimado) de itens em forma de dicionário"""
+    total = comprados = 0
+    valor = 0.0
+    for item in itens:
+        total += 1
+        comprados += bool(item["comprado"])
+        valor += (item["preco_estimado"] or 0) * item["quantidade"]
+    return total, comprados, valor
+
+async def aplicar_operacoes_itens(
+    db: AsyncSession,
+    lista_id: int,
+    user_id: int,
+    operacoes: List[OperacaoItem]
+) -> Optional[dict]:
+    """
+    Aplica em ordem operações de criar, atualizar, toggle_comprado e remover sobre itens
+    de uma lista, numa única transação: a posse da lista é verificada uma vez, os itens
+    citados são lidos numa consulta e gravados com um DELETE, um UPDATE (executemany) e um
+    INSERT em lote, e os contadores da lista são ajustados num único UPDATE.
+    Operações sobre itens que não estão na lista resultam em "nao_encontrado" sem
+    impedir as demais. Retorna None se a lista não for do usuário.
+    """
+    itens = ItemListaCompras.__table__
+    # Trava a lista: lotes simultâneos na mesma lista são aplicados um após o outro
+    if not (await db.execute(
+        select(ListaCompras.id).where(
+            ListaCompras.id == lista_id,
+            ListaCompras.user_id == user_id
+        ).with_for_update()
+    )).first():
+        return None
+    
+    ids = {op.item_id for op in operacoes if op.op != "criar"}
+    estado = {}
+    if ids:
+        # Itens depois da lista, como em get_item_lista(bloquear=True); em ordem de id
+        linhas = await db.execute(
+            select(itens).where(itens.c.lista_id == lista_id, itens.c.id.in_(ids))
+            .order_by(itens.c.id).with_for_update()
+        )
+        estado = {linha.id: dict(linha._mapping) for linha in linhas}
+    antes = _totais_itens(estado.values())
+    
+    resultados, novos, alterados, removidos = [], [], set(), set()
+    for indice, op in enumerate(operacoes):
+        resultado = {"indice": indice, "op": op.op, "status": "ok", "item": None}
+        resultados.append(resultado)
+        if op.op == "criar":
+            novo = {**op.item.model_dump(), "lista_id": lista_id, "comprado": False}
+            novos.append(novo)
+            resultado["item"] = novo  # id e created_at preenchidos após o INSERT
+            continue
+        
+        item = estado.get(op.item_id)
+        if item is None:
+            resultado["status"] = "nao_encontrado"
+        elif op.op == "remover":
+            del estado[op.item_id]
+            alterados.discard(op.item_id)
+            removidos.add(op.item_id)
+        else:
+            if op.op == "atualizar":
+                item.update(op.dados.model_dump(exclude_unset=True))
+            else:
+                item["comprado"] = not item["comprado"]
+            alterados.add(op.item_id)
+            resultado["item"] = dict(item)  # estado após esta operação
+    
+    if removidos:
+        await db.execute(delete(itens).where(itens.c.id.in_(removidos)))
+    if alterados:
+        await db.execute(
+            update(itens).where(itens.c.id == bindparam("item_id")).values(
+                {campo: bindparam(f"novo_{campo}") for campo in CAMPOS_ATUALIZAVEIS}
+            ),
+            [
+                {"item_id": item_id, **{f"novo_{campo}": estado[item_id][campo] for campo in CAMPOS_ATUALIZAVEIS}}
+                for item_id in alterados
+            ]
+        )
+    if novos:
+        criados = await db.execute(
+            insert(itens).returning(itens.c.id, itens.c.created_at, sort_by_parameter_order=True),
+            novos
+        )
+        for novo, linha in zip(novos, criados):
+            novo.update(id=linha.id, created_at=linha.created_at)
+    
+    depois = _totais_itens([*estado.values(), *novos])
+    if depois != antes:
+        await db.execute(_ajustar_contadores(
+            lista_id,
+            itens=depois[0] - antes[0],
+            comprados=depois[1] - antes[1],
+            valor=depois[2] - antes[2]
+        ))
+    if removidos or alterados or novos:
+        await registrar_alteracoes(db, user_id, [
+            *((ITEM, item_id, True) for item_id in removidos),
+            *((ITEM, item_id, False) for item_id in alterados),
+            *((ITEM, novo["id"], False) for novo in novos),
+            (LISTA, lista_id, False)
+        ])
+    await db.commit()
+    if removidos or alterados or novos:
+        await tempo_real.publicar(tempo_real.lote(lista_id, [
+            *(tempo_real.item_removido(lista_id, item_id) for item_id in removidos),
+            *(tempo_real.item_alterado(
+                lista_id, item_id, {campo: estado[item_id][campo] for campo in CAMPOS_ATUALIZAVEIS}
+            ) for item_id in alterados),
+            *(tempo_real.item_criado(novo) for novo in novos)
+        ]))
+    
+    return {
+        "resultados": resultados,
+        "lista": await db.get(ListaCompras, lista_id, populate_existing=True)
+    }
+
+async def lista_pertence_ao_usuario(db: AsyncSession, lista_id: int, user_id: int) -> bool:
+    """Verifica se a lista existe e é do usuário, sem carregar a lista"""
+    return (await db.scalar(
+        select(ListaCompras.id).where(
+            ListaCompras.id == lista_id,
+            ListaCompras.user_id == user_id
+        )
+    )) is not None
+
+async def get_resumo_lista(db: AsyncSession, lista_id: int, user_id: int) -> Optional[dict]:
+    """Retorna resumo da lista de compras (contadores da própria lista, sem ler os itens)"""
+    lista = (await db.scalars(
+        select(ListaCompras).where(
+            ListaCompras.id == lista_id,
+            ListaCompras.user_id == user_id
+        )
+    )).first()
+    if not lista:
+        return None
     
     return {
         "id": lista.id,
         "nome": lista.nome,
         "descricao": lista.descricao,
         "concluida": lista.concluida,
-        "total_itens": total_itens,
-        "itens_comprados": itens_comprados,
-        "valor_estimado_total": valor_total,
+        "total_itens": lista.total_itens,
+        "itens_comprados": lista.itens_comprados,
+        "valor_estimado_total": lista.valor_estimado_total,
         "created_at": lista.created_at
     }
@@ -1,65 +1,159 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import or_, case
+import re
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlalchemy import or_, case, func, select, text, Float, Integer
 from app.models import Produto, Categoria
+from app.indice_produtos import indice_produtos
+from app.paginacao import apos_cursor
+from app.crud.alteracao import ESCOPO_GLOBAL, PRODUTO, numerar_alteracoes_globais, registrar_alteracoes, seq_da_entidade
 from app.schemas.produto import ProdutoCreate, ProdutoUpdate
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 
 # Limite padrão quando o produto não tem estoque_minimo definido
 ESTOQUE_MINIMO_PADRAO = 5
 
+# Busca indexada disponível por dialeto (pg_trgm no PostgreSQL, FTS5 no SQLite).
+# Criada pela migração 4 (app/migracoes); verificada uma vez por processo.
+_busca_indexada: Dict[str, bool] = {}
 
-def get_produto(db: Session, produto_id: int) -> Optional[Produto]:
-    return db.query(Produto).filter(Produto.id == produto_id).first()
 
+async def get_produto(db: AsyncSession, produto_id: int) -> Optional[Produto]:
+    return await db.get(Produto, produto_id)
 
-def get_produtos(
-    db: Session, skip: int = 0, limit: int = 100, search: Optional[str] = None
+
+async def get_versao_produto(db: AsyncSession, produto_id: int) -> Optional[tuple]:
+    """(updated_at, sequência da última alteração) do produto, para o ETag; None se não existir"""
+    linha = (await db.execute(
+        select(Produto.updated_at, seq_da_entidade(ESCOPO_GLOBAL, PRODUTO, Produto.id)).where(
+            Produto.id == produto_id
+        )
+    )).first()
+    return tuple(linha) if linha else None
+
+
+async def _tem_busca_indexada(db: AsyncSession) -> bool:
+    dialeto = db.get_bind().dialect.name
+    if dialeto not in _busca_indexada:
+        if dialeto == "postgresql":
+            sql = "SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'"
+        elif dialeto == "sqlite":
+            sql = "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'produtos_fts'"
+        else:
+            sql = None
+        _busca_indexada[dialeto] = bool(sql) and (await db.execute(text(sql))).first() is not None
+    return _busca_indexada[dialeto]
+
+
+def _filtro_busca(search: str):
+    """
+    Filtro por substring (ilike). A categoria entra como subconsulta em vez de OR sobre
+    um JOIN, para que o PostgreSQL combine os índices GIN (pg_trgm) de cada coluna.
+    """
+    padrao = f"%{search}%"
+    return or_(
+        Produto.nome.ilike(padrao),
+        Produto.descricao.ilike(padrao),
+        Produto.codigo_barras.ilike(padrao),
+        Produto.categoria_id.in_(select(Categoria.id).where(Categoria.nome.ilike(padrao))),
+    )
+
+
+async def _buscar_produtos(db: AsyncSession, search: str):
+    """
+    Select de produtos que casam com `search`, ordenado por relevância quando há índice de busca.
+    O casamento depende do dialeto: no PostgreSQL (ilike, com ou sem pg_trgm) `search` é
+    procurado como substring; no SQLite com FTS5 cada termo casa só com o início de uma
+    palavra ("arr" encontra "Arroz", "rroz" não), sem diferenciar acentos.
+    """
+    query = select(Produto)
+    if not await _tem_busca_indexada(db):
+        return query.where(_filtro_busca(search)).order_by(Produto.nome, Produto.id)
+
+    if db.get_bind().dialect.name == "postgresql":
+        relevancia = func.greatest(
+            func.word_similarity(search, Produto.nome),
+            func.similarity(func.coalesce(Produto.codigo_barras, ""), search),
+        )
+        return query.where(_filtro_busca(search)).order_by(relevancia.desc(), Produto.nome, Produto.id)
+
+    # SQLite: FTS5 por prefixo de cada termo, ordenado por bm25
+    termos = re.findall(r"\w+", search)
+    if not termos:
+        return query.where(_filtro_busca(search)).order_by(Produto.nome, Produto.id)
+    fts = text(
+        "SELECT rowid AS id, bm25(produtos_fts) AS rank FROM produtos_fts WHERE produtos_fts MATCH :termos"
+    ).bindparams(termos=" ".join(f'"{t}"*' for t in termos)).columns(id=Integer, rank=Float).subquery()
+    return query.join(fts, fts.c.id == Produto.id).order_by(fts.c.rank, Produto.id)
+
+
+async def get_produtos(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    search: Optional[str] = None,
+    cursor: Optional[Tuple[str, int]] = None,
+    com_categoria: bool = False,
 ) -> List[Produto]:
-    query = db.query(Produto)
+    """
+    Lista produtos ordenados por (nome, id). `cursor` é o (nome, id) do último produto
+    da página anterior e substitui `skip`; não se aplica à busca, ordenada por relevância.
+    `com_categoria` carrega Produto.categoria junto (não há carregamento preguiçoso no modo assíncrono).
+    """
     if search:
-        query = query.outerjoin(Categoria).filter(
-            or_(
-                Produto.nome.ilike(f"%{search}%"),
-                Produto.descricao.ilike(f"%{search}%"),
-                Categoria.nome.ilike(f"%{search}%"),
-                Produto.codigo_barras.ilike(f"%{search}%"),
-            )
-        )
-    return query.offset(skip).limit(limit).all()
+        query = (await _buscar_produtos(db, search)).offset(skip)
+    else:
+        query = select(Produto).order_by(Produto.nome, Produto.id)
+        if cursor:
+            query = query.where(apos_cursor(db, Produto.nome, Produto.id, cursor))
+        else:
+            query = query.offset(skip)
+    if com_categoria:
+        query = query.options(selectinload(Produto.categoria))
+    return list((await db.scalars(query.limit(limit))).all())
 
 
-def get_produtos_estoque_baixo(
-    db: Session,
+async def get_produtos_estoque_baixo(
+    db: AsyncSession,
     limite_padrao: int = ESTOQUE_MINIMO_PADRAO,
 ) -> List[Produto]:
     """
     Retorna produtos em estoque baixo: quantidade_estoque <= estoque_minimo (ou limite_padrao se estoque_minimo for null).
     """
     limite = case((Produto.estoque_minimo.is_(None), limite_padrao), else_=Produto.estoque_minimo)
-    return db.query(Produto).filter(Produto.quantidade_estoque <= limite).all()
+    return list((await db.scalars(select(Produto).where(Produto.quantidade_estoque <= limite))).all())
 
 
-def create_produto(db: Session, produto: ProdutoCreate) -> Produto:
+async def create_produto(db: AsyncSession, produto: ProdutoCreate) -> Produto:
     db_produto = Produto(**produto.model_dump())
     db.add(db_produto)
-    db.commit()
-    db.refresh(db_produto)
+    await db.flush()
+    await registrar_alteracoes(db, ESCOPO_GLOBAL, [(PRODUTO, db_produto.id, False)])
+    await db.commit()
+    await numerar_alteracoes_globais(db)
+    await db.refresh(db_produto)
+    indice_produtos.adicionar(db_produto.id, db_produto.nome, db_produto.codigo_barras)
     return db_produto
 
-def update_produto(db: Session, produto_id: int, produto: ProdutoUpdate) -> Optional[Produto]:
-    db_produto = get_produto(db, produto_id)
+async def update_produto(db: AsyncSession, produto_id: int, produto: ProdutoUpdate) -> Optional[Produto]:
+    db_produto = await get_produto(db, produto_id)
     if db_produto:
         update_data = produto.model_dump(exclude_unset=True)
         for key, value in update_data.items():
             setattr(db_produto, key, value)
-        db.commit()
-        db.refresh(db_produto)
+        await registrar_alteracoes(db, ESCOPO_GLOBAL, [(PRODUTO, produto_id, False)])
+        await db.commit()
+        await numerar_alteracoes_globais(db)
+        await db.refresh(db_produto)
+        indice_produtos.adicionar(db_produto.id, db_produto.nome, db_produto.codigo_barras)
     return db_produto
 
-def delete_produto(db: Session, produto_id: int) -> bool:
-    db_produto = get_produto(db, produto_id)
+async def delete_produto(db: AsyncSession, produto_id: int) -> bool:
+    db_produto = await get_produto(db, produto_id)
     if db_produto:
-        db.delete(db_produto)
-        db.commit()
+        await registrar_alteracoes(db, ESCOPO_GLOBAL, [(PRODUTO, produto_id, True)])
+        await db.delete(db_produto)
+        await db.commit()
+        await numerar_alteracoes_globais(db)
+        indice_produtos.remover(produto_id)
         return True
     return False
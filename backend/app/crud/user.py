@@ -2,7 +2,8 @@ from sqlalchemy.orm import Session
 from typing import Optional
 from app.models import User
 from app.schemas.auth import UserCreate, UserUpdate
-from app.auth.auth import get_password_hash
+from app.auth.auth import cache_usuarios
+from app.auth.senhas import get_password_hash
 
 def get_user_by_email(db: Session, email: str) -> Optional[User]:
     """Busca usuário por email"""
@@ -16,8 +17,8 @@ def get_user_by_id(db: Session, user_id: int) -> Optional[User]:
     """Busca usuário por ID"""
     return db.query(User).filter(User.id == user_id).first()
 
-def create_user(db: Session, user: UserCreate) -> User:
-    """Cria um novo usuário"""
+def verificar_disponibilidade(db: Session, user: UserCreate):
+    """Falha (ValueError) se o email ou o username já estiverem cadastrados"""
     # Verificar se email já existe
     if get_user_by_email(db, user.email):
         raise ValueError("Email já cadastrado")
@@ -25,9 +26,14 @@ def create_user(db: Session, user: UserCreate) -> User:
     # Verificar se username já existe
     if get_user_by_username(db, user.username):
         raise ValueError("Nome de usuário já cadastrado")
+
+def create_user(db: Session, user: UserCreate, hashed_password: Optional[str] = None) -> User:
+    """Cria um novo usuário (hashed_password, se informado, evita calcular o hash aqui)"""
+    verificar_disponibilidade(db, user)
     
     # Criar usuário
-    hashed_password = get_password_hash(user.password)
+    if hashed_password is None:
+        hashed_password = get_password_hash(user.password)
     db_user = User(
         email=user.email,
         username=user.username,
@@ -61,10 +67,12 @@ def update_user(db: Session, user_id: int, user_update: UserUpdate) -> Optional[
         if get_user_by_username(db, update_data["username"]):
             raise ValueError("Nome de usuário já cadastrado")
     
+    username_anterior = db_user.username
     for key, value in update_data.items():
         setattr(db_user, key, value)
     
     db.commit()
+    cache_usuarios.invalidar(username_anterior)
     db.refresh(db_user)
     return db_user
 
@@ -74,6 +82,8 @@ def delete_user(db: Session, user_id: int) -> bool:
     if not db_user:
         return False
     
+    username = db_user.username
     db.delete(db_user)
     db.commit()
+    cache_usuarios.invalidar(username)
     return True
@@ -2,11 +2,30 @@
 Envio de e-mail via SMTP.
 Configure no .env: SMTP_HOST, SMTP_PORT, SMTP_USER, SMTP_PASSWORD, EMAIL_FROM.
 Se não configurado, o envio é apenas logado (útil em desenvolvimento).
+
+As rotas não enviam diretamente: usam as funções enfileirar_* para gravar na caixa
+de saída (emails_pendentes), drenada em segundo plano por app/email_worker.py.
+
+As sessões SMTP (conexão + STARTTLS + login) ficam abertas em um pool e são
+reaproveitadas entre mensagens; enviar_emails() manda um lote inteiro por sessão.
+Ajustes: SMTP_POOL_TAMANHO (sessões ociosas mantidas, padrão 2),
+SMTP_MENSAGENS_POR_SESSAO (padrão 100), SMTP_SESSAO_OCIOSA_MAX (segundos, padrão 60) e
+SMTP_TIMEOUT (segundos por operação de socket, padrão 30; bem abaixo de EMAIL_PRAZO_ENVIO,
+para que um servidor travado não segure os e-mails reservados pelo worker).
 """
 import os
+import queue
 import smtplib
+import time
+from dataclasses import dataclass
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from typing import Iterable, List, Optional, Tuple
+
+from jinja2 import Environment
+from sqlalchemy.orm import Session
+
+from app.crud import email_pendente as outbox
 
 
 def _config():
@@ -16,60 +35,221 @@ def _config():
         "user": os.getenv("SMTP_USER", "").strip(),
         "password": os.getenv("SMTP_PASSWORD", "").strip(),
         "from_addr": os.getenv("EMAIL_FROM", os.getenv("SMTP_USER", "noreply@listadacasa.com")).strip(),
+        "timeout": float(os.getenv("SMTP_TIMEOUT", "30")),
     }
 
 
-def enviar_email(destinatario: str, assunto: str, corpo_html: str, corpo_texto: str = "") -> bool:
+def smtp_configurado() -> bool:
     cfg = _config()
-    if not cfg["host"] or not cfg["user"]:
-        print(f"[EMAIL] (SMTP não configurado) Para: {destinatario} | Assunto: {assunto}")
-        return False
-    try:
-        msg = MIMEMultipart("alternative")
-        msg["Subject"] = assunto
-        msg["From"] = cfg["from_addr"]
-        msg["To"] = destinatario
-        if corpo_texto:
-            msg.attach(MIMEText(corpo_texto, "plain", "utf-8"))
-        msg.attach(MIMEText(corpo_html, "html", "utf-8"))
-        with smtplib.SMTP(cfg["host"], cfg["port"]) as server:
+    return bool(cfg["host"] and cfg["user"])
+
+
+@dataclass
+class Email:
+    destinatario: str
+    assunto: str
+    corpo_html: str
+    corpo_texto: str = ""
+
+
+class _Sessao:
+    def __init__(self, cfg: dict):
+        self.smtp = smtplib.SMTP(cfg["host"], cfg["port"], timeout=cfg["timeout"])
+        try:
             if cfg["port"] in (587, 465):
-                server.starttls()
+                self.smtp.starttls()
             if cfg["user"] and cfg["password"]:
-                server.login(cfg["user"], cfg["password"])
-            server.sendmail(cfg["from_addr"], [destinatario], msg.as_string())
-        return True
-    except Exception as e:
-        print(f"[EMAIL] Erro ao enviar para {destinatario}: {e}")
-        return False
+                self.smtp.login(cfg["user"], cfg["password"])
+        except Exception:
+            # Conexão aberta mas sessão inutilizável: não deixar o socket para o GC
+            self.smtp.close()
+            raise
+        self.enviadas = 0
+        self.usada_em = time.monotonic()
 
+    def fechar(self):
+        try:
+            self.smtp.quit()
+        except Exception:
+            try:
+                self.smtp.close()
+            except Exception:
+                pass
 
-def enviar_confirmacao_assinatura(email: str, nome: str, plano: str) -> bool:
-    plano_label = "Mensal (R$ 9,90/mês)" if plano == "mensal" else "Anual (R$ 90/ano)"
-    assunto = "Sua assinatura Lista da Casa foi confirmada"
-    corpo_texto = f"""Olá {nome or 'usuário'},
+
+class PoolSMTP:
+    """Sessões SMTP autenticadas reaproveitadas entre envios (thread-safe)"""
+
+    def __init__(self, tamanho: int, mensagens_por_sessao: int, ociosa_max: float):
+        self.tamanho = tamanho
+        self.mensagens_por_sessao = mensagens_por_sessao
+        self.ociosa_max = ociosa_max
+        self._ociosas: "queue.LifoQueue[_Sessao]" = queue.LifoQueue()
+
+    def obter(self, cfg: dict) -> _Sessao:
+        while True:
+            try:
+                sessao = self._ociosas.get_nowait()
+            except queue.Empty:
+                return _Sessao(cfg)
+            if time.monotonic() - sessao.usada_em <= self.ociosa_max:
+                return sessao
+            # Sessão parada há muito tempo: o servidor pode tê-la encerrado
+            try:
+                sessao.smtp.noop()
+                return sessao
+            except Exception:
+                sessao.fechar()
+
+    def devolver(self, sessao: _Sessao):
+        sessao.usada_em = time.monotonic()
+        if sessao.enviadas >= self.mensagens_por_sessao or self._ociosas.qsize() >= self.tamanho:
+            sessao.fechar()
+        else:
+            self._ociosas.put(sessao)
+
+    def descartar(self, sessao: _Sessao):
+        sessao.fechar()
+
+    def fechar(self):
+        while True:
+            try:
+                self._ociosas.get_nowait().fechar()
+            except queue.Empty:
+                return
+
+
+pool_smtp = PoolSMTP(
+    tamanho=int(os.getenv("SMTP_POOL_TAMANHO", "2")),
+    mensagens_por_sessao=int(os.getenv("SMTP_MENSAGENS_POR_SESSAO", "100")),
+    ociosa_max=float(os.getenv("SMTP_SESSAO_OCIOSA_MAX", "60")),
+)
+
+
+def _montar_mensagem(cfg: dict, email: Email) -> str:
+    msg = MIMEMultipart("alternative")
+    msg["Subject"] = email.assunto
+    msg["From"] = cfg["from_addr"]
+    msg["To"] = email.destinatario
+    if email.corpo_texto:
+        msg.attach(MIMEText(email.corpo_texto, "plain", "utf-8"))
+    msg.attach(MIMEText(email.corpo_html, "html", "utf-8"))
+    return msg.as_string()
+
+
+def enviar_lote(emails: Iterable[Email]) -> List[Optional[Exception]]:
+    """
+    Envia os e-mails reaproveitando sessões do pool; retorna, na mesma ordem, None para
+    cada envio bem-sucedido ou a exceção da falha. Se a sessão cair, reconecta e tenta
+    a mensagem mais uma vez; se nem a reconexão funcionar, o restante do lote falha
+    com o mesmo erro, sem novas tentativas de conexão.
+    """
+    cfg = _config()
+    emails = list(emails)
+    resultados: List[Optional[Exception]] = []
+    sessao = None
+    for email in emails:
+        texto = _montar_mensagem(cfg, email)
+        erro = None
+        for _ in range(2):
+            try:
+                if sessao is None:
+                    sessao = pool_smtp.obter(cfg)
+            except (smtplib.SMTPException, OSError) as e:
+                # Servidor inacessível: o resto do lote falha junto
+                return resultados + [e] * (len(emails) - len(resultados))
+            try:
+                sessao.smtp.sendmail(cfg["from_addr"], [email.destinatario], texto)
+                sessao.enviadas += 1
+                erro = None
+                break
+            except (smtplib.SMTPServerDisconnected, OSError) as e:
+                # Conexão perdida: descarta a sessão e tenta de novo com outra
+                pool_smtp.descartar(sessao)
+                sessao = None
+                erro = e
+            except smtplib.SMTPException as e:
+                # Recusa do servidor para esta mensagem; a sessão continua válida
+                erro = e
+                break
+        resultados.append(erro)
+        if sessao is not None and sessao.enviadas >= pool_smtp.mensagens_por_sessao:
+            pool_smtp.devolver(sessao)
+            sessao = None
+    if sessao is not None:
+        pool_smtp.devolver(sessao)
+    return resultados
+
+
+def enviar_emails(lista: Iterable[Email]) -> List[bool]:
+    """Envio em lote; retorna True/False por e-mail, na mesma ordem"""
+    lista = list(lista)
+    if not smtp_configurado():
+        for email in lista:
+            print(f"[EMAIL] (SMTP não configurado) Para: {email.destinatario} | Assunto: {email.assunto}")
+        return [False] * len(lista)
+    resultados = []
+    for email, erro in zip(lista, enviar_lote(lista)):
+        if erro is not None:
+            print(f"[EMAIL] Erro ao enviar para {email.destinatario}: {erro}")
+        resultados.append(erro is None)
+    return resultados
+
+
+def enviar_email(destinatario: str, assunto: str, corpo_html: str, corpo_texto: str = "") -> bool:
+    return enviar_emails([Email(destinatario, assunto, corpo_html, corpo_texto)])[0]
+
+
+# Templates compilados uma vez na importação do módulo (HTML com escape automático)
+_templates_html = Environment(autoescape=True)
+_templates_texto = Environment(autoescape=False, keep_trailing_newline=True)
+
+_PLANOS = {
+    "mensal": "Mensal (R$ 9,90/mês)",
+    "anual": "Anual (R$ 90/ano)",
+}
+
+_ASSINATURA_ASSUNTO = "Sua assinatura Lista da Casa foi confirmada"
+
+_ASSINATURA_TEXTO = _templates_texto.from_string("""Olá {{ nome }},
 
 Sua assinatura do Lista da Casa foi confirmada.
 
-Plano: {plano_label}
+Plano: {{ plano_label }}
 
 Acesse o app e comece a organizar suas compras.
 
 —
 Lista da Casa
-"""
-    corpo_html = f"""
+""")
+
+_ASSINATURA_HTML = _templates_html.from_string("""
 <!DOCTYPE html>
 <html>
 <head><meta charset="utf-8"></head>
 <body style="font-family: sans-serif; max-width: 560px; margin: 0 auto; padding: 20px; color: #333;">
   <h2 style="color: #0d7a6a;">Assinatura confirmada</h2>
-  <p>Olá {nome or 'usuário'},</p>
+  <p>Olá {{ nome }},</p>
   <p>Sua assinatura do <strong>Lista da Casa</strong> foi confirmada.</p>
-  <p><strong>Plano:</strong> {plano_label}</p>
+  <p><strong>Plano:</strong> {{ plano_label }}</p>
   <p>Acesse o app e comece a organizar suas compras, listas e estoque.</p>
   <p style="margin-top: 32px; color: #666; font-size: 14px;">— Lista da Casa</p>
 </body>
 </html>
-"""
+""")
+
+
+def montar_confirmacao_assinatura(nome: str, plano: str) -> Tuple[str, str, str]:
+    """Retorna (assunto, corpo_html, corpo_texto) do e-mail de confirmação de assinatura"""
+    contexto = {"nome": nome or "usuário", "plano_label": _PLANOS.get(plano, _PLANOS["anual"])}
+    return _ASSINATURA_ASSUNTO, _ASSINATURA_HTML.render(contexto), _ASSINATURA_TEXTO.render(contexto)
+
+
+def enviar_confirmacao_assinatura(email: str, nome: str, plano: str) -> bool:
+    assunto, corpo_html, corpo_texto = montar_confirmacao_assinatura(nome, plano)
     return enviar_email(email, assunto, corpo_html, corpo_texto)
+
+
+def enfileirar_confirmacao_assinatura(db: Session, email: str, nome: str, plano: str):
+    assunto, corpo_html, corpo_texto = montar_confirmacao_assinatura(nome, plano)
+    return outbox.enfileirar_email(db, email, assunto, corpo_html, corpo_texto)
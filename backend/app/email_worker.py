@@ -0,0 +1,101 @@
+"""
+Worker em segundo plano que drena a caixa de saída de e-mails (emails_pendentes).
+
+Roda como tarefa asyncio no lifespan da API; cada rodada executa em thread para não
+bloquear o event loop. Cada rodada reserva um lote (status "enviando", commit), envia fora
+de qualquer transação e registra o resultado numa transação nova, então nenhuma linha
+fica travada durante o SMTP. Um lote cujo worker cai no meio do envio volta para a fila
+quando a reserva vence (pode haver reenvio). Falhas são reagendadas com backoff exponencial.
+Configuração (.env):
+  EMAIL_WORKER_ATIVO=1            desliga com 0 (ex.: quando um processo dedicado drena a fila)
+  EMAIL_WORKER_INTERVALO=5        segundos entre rodadas quando a fila está vazia
+  EMAIL_WORKER_LOTE=50            e-mails por rodada
+  EMAIL_PRAZO_ENVIO=300           segundos de reserva de um lote (maior que o tempo de envio)
+  EMAIL_MAX_TENTATIVAS=6
+  EMAIL_BACKOFF_BASE=30           segundos; dobra a cada tentativa
+  EMAIL_BACKOFF_MAX=3600
+
+Também pode rodar isolado: python -m app.email_worker
+"""
+import asyncio
+import os
+
+from app.database import SessionLocal
+from app.crud import email_pendente as outbox
+from app.email_service import Email, enviar_lote, smtp_configurado
+
+ATIVO = os.getenv("EMAIL_WORKER_ATIVO", "1") == "1"
+INTERVALO = float(os.getenv("EMAIL_WORKER_INTERVALO", "5"))
+LOTE = int(os.getenv("EMAIL_WORKER_LOTE", "50"))
+PRAZO_ENVIO = float(os.getenv("EMAIL_PRAZO_ENVIO", "300"))
+MAX_TENTATIVAS = int(os.getenv("EMAIL_MAX_TENTATIVAS", "6"))
+BACKOFF_BASE = float(os.getenv("EMAIL_BACKOFF_BASE", "30"))
+BACKOFF_MAX = float(os.getenv("EMAIL_BACKOFF_MAX", "3600"))
+
+
+def _reservar() -> dict:
+    """Reserva um lote numa transação curta; retorna {id: Email}"""
+    db = SessionLocal()
+    try:
+        emails = outbox.reservar_emails_para_envio(db, LOTE, PRAZO_ENVIO)
+        envios = {e.id: Email(e.destinatario, e.assunto, e.corpo_html, e.corpo_texto or "") for e in emails}
+        db.commit()
+        return envios
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def _registrar_resultados(resultados: dict):
+    """Marca enviados, reagenda falhas e descarta ({id: None | exceção | motivo do descarte})"""
+    db = SessionLocal()
+    try:
+        for email in outbox.get_emails_reservados(db, list(resultados)):
+            erro = resultados[email.id]
+            if erro is None:
+                outbox.registrar_envio(email)
+            elif isinstance(erro, str):
+                outbox.descartar(email, erro)
+            else:
+                print(f"[EMAIL] Erro ao enviar para {email.destinatario} (tentativa {email.tentativas + 1}): {erro}")
+                outbox.registrar_falha(email, str(erro), MAX_TENTATIVAS, BACKOFF_BASE, BACKOFF_MAX)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def processar_lote() -> int:
+    """Envia um lote da fila; retorna quantos e-mails foram processados"""
+    envios = _reservar()
+    if not envios:
+        return 0
+    if smtp_configurado():
+        # Lote inteiro na mesma sessão SMTP, fora de qualquer transação
+        resultados = dict(zip(envios, enviar_lote(list(envios.values()))))
+    else:
+        for email in envios.values():
+            print(f"[EMAIL] (SMTP não configurado) Para: {email.destinatario} | Assunto: {email.assunto}")
+        resultados = dict.fromkeys(envios, "SMTP não configurado")
+    _registrar_resultados(resultados)
+    return len(envios)
+
+
+async def executar():
+    """Laço do worker: drena enquanto houver lotes cheios, senão espera INTERVALO"""
+    while True:
+        try:
+            processados = await asyncio.to_thread(processar_lote)
+        except Exception as e:
+            print(f"[EMAIL] Erro no worker da caixa de saída: {e}")
+            processados = 0
+        if processados < LOTE:
+            await asyncio.sleep(INTERVALO)
+
+
+if __name__ == "__main__":
+    asyncio.run(executar())
@@ -0,0 +1,45 @@
+"""
+ETags fracos e GET condicional (If-None-Match -> 304 Not Modified).
+
+A versão de um registro é a sequência da sua última alteração em `alteracoes` (ver
+app/crud/alteracao.py), mais updated_at quando a tabela tem; a de uma listagem é o
+contador de alterações do escopo (usuário ou global), que avança a cada escrita nas
+listas, itens e compras do usuário ou nos produtos. A rota lê a versão numa consulta
+pequena antes do registro: se o cliente já tem essa versão, responde 304 sem carregar
+itens nem serializar o modelo de resposta. Como a versão é lida antes do corpo, o corpo
+enviado nunca é mais antigo que o ETag que o acompanha.
+"""
+import hashlib
+from typing import Optional
+
+from fastapi import Request, Response, status
+
+# O cliente pode guardar a resposta, mas revalida (If-None-Match) antes de usá-la
+CACHE_CONTROL = "private, no-cache"
+
+
+def etag_fraco(*partes) -> str:
+    """ETag fraco a partir das partes da versão (tipo, usuário, id, sequência, updated_at...)"""
+    resumo = hashlib.blake2b(repr(partes).encode("utf-8"), digest_size=8).hexdigest()
+    return f'W/"{resumo}"'
+
+
+def _sem_prefixo_fraco(etag: str) -> str:
+    etag = etag.strip()
+    return etag[2:] if etag.startswith("W/") else etag
+
+
+def nao_modificado(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """
+    Publica o ETag na resposta e, se If-None-Match já traz essa versão (comparação
+    fraca), retorna a resposta 304 que a rota deve devolver no lugar do corpo.
+    """
+    cabecalhos = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    response.headers.update(cabecalhos)
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return None
+    recebidos = {_sem_prefixo_fraco(parte) for parte in if_none_match.split(",")}
+    if "*" in recebidos or _sem_prefixo_fraco(etag) in recebidos:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cabecalhos)
+    return None
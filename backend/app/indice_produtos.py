@@ -0,0 +1,165 @@
+"""
+Índice em memória para autocompletar nomes e códigos de barras de produtos.
+
+Vetor ordenado de chaves normalizadas (minúsculas, sem acentos) consultado com bisect:
+cada palavra do nome e o código de barras viram uma chave, então "pamp" encontra
+"Fralda Pampers". É carregado na inicialização da API e atualizado pelo CRUD de produtos.
+
+Cada processo (worker) tem sua própria cópia; alterações feitas por outros workers
+aparecem quando o índice expira (AUTOCOMPLETE_TTL_SEGUNDOS, padrão 300) e é recarregado.
+A recarga roda em segundo plano, uma por vez, e as buscas continuam no índice atual
+enquanto isso; produtos incluídos/removidos pelo CRUD durante a recarga são reaplicados
+sobre o índice novo, que foi lido do banco antes deles.
+"""
+import asyncio
+import os
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, insort
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models import Produto
+
+TTL_SEGUNDOS = float(os.getenv("AUTOCOMPLETE_TTL_SEGUNDOS", "300"))
+
+
+def normalizar(texto: str) -> str:
+    """Minúsculas e sem acentos ("Lenço" -> "lenco")"""
+    decomposto = unicodedata.normalize("NFKD", texto.strip().lower())
+    return "".join(c for c in decomposto if not unicodedata.combining(c))
+
+
+def _chaves(nome: str, codigo_barras: Optional[str]) -> List[str]:
+    palavras = normalizar(nome).split()
+    # Nome a partir de cada palavra: "fralda pampers g" -> ["fralda pampers g", "pampers g", "g"]
+    chaves = [" ".join(palavras[i:]) for i in range(len(palavras))]
+    if codigo_barras:
+        chaves.append(normalizar(codigo_barras))
+    return chaves
+
+
+class IndicePrefixos:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._chaves: List[Tuple[str, int]] = []
+        self._produtos: Dict[int, dict] = {}
+        self._carregado_em: Optional[float] = None
+        self._recarregando = False
+        self._tarefa: Optional[asyncio.Task] = None
+        # Alterações feitas enquanto carregar() lê o banco: produto_id -> (nome, codigo_barras),
+        # ou None se removido. None fora de uma carga.
+        self._alteracoes_na_carga: Optional[Dict[int, Optional[tuple]]] = None
+
+    def carregar(self, db: Session):
+        """(Re)constrói o índice com todos os produtos do banco"""
+        with self._lock:
+            self._alteracoes_na_carga = {}
+        try:
+            linhas = db.query(Produto.id, Produto.nome, Produto.codigo_barras).all()
+        except Exception:
+            with self._lock:
+                self._alteracoes_na_carga = None
+            raise
+        chaves = sorted(
+            (chave, produto_id)
+            for produto_id, nome, codigo_barras in linhas
+            for chave in _chaves(nome, codigo_barras)
+        )
+        produtos = {
+            produto_id: {"id": produto_id, "nome": nome, "codigo_barras": codigo_barras}
+            for produto_id, nome, codigo_barras in linhas
+        }
+        with self._lock:
+            self._chaves = chaves
+            self._produtos = produtos
+            # A leitura pode não ter visto o que o CRUD alterou enquanto ela rodava
+            for produto_id, dados in self._alteracoes_na_carga.items():
+                if dados is None:
+                    self._remover(produto_id)
+                else:
+                    self._adicionar(produto_id, *dados)
+            self._alteracoes_na_carga = None
+            self._carregado_em = time.monotonic()
+
+    def expirado(self) -> bool:
+        return self._carregado_em is None or time.monotonic() - self._carregado_em > TTL_SEGUNDOS
+
+    def recarregar_em_segundo_plano(self) -> bool:
+        """
+        Agenda a recarga numa thread, a partir do event loop, se nenhuma estiver em
+        andamento; as buscas seguem no índice atual. Retorna se a recarga foi agendada.
+        """
+        with self._lock:
+            if self._recarregando:
+                return False
+            self._recarregando = True
+        self._tarefa = asyncio.get_running_loop().create_task(asyncio.to_thread(self._recarregar))
+        return True
+
+    def _recarregar(self):
+        try:
+            db = SessionLocal()
+            try:
+                self.carregar(db)
+            finally:
+                db.close()
+        except Exception as e:
+            # Continua expirado: a próxima busca agenda outra tentativa
+            print(f"[AUTOCOMPLETAR] Erro ao recarregar o índice de produtos: {e}")
+        finally:
+            with self._lock:
+                self._recarregando = False
+
+    def adicionar(self, produto_id: int, nome: str, codigo_barras: Optional[str] = None):
+        """Inclui ou substitui um produto no índice"""
+        with self._lock:
+            self._adicionar(produto_id, nome, codigo_barras)
+            if self._alteracoes_na_carga is not None:
+                self._alteracoes_na_carga[produto_id] = (nome, codigo_barras)
+
+    def remover(self, produto_id: int):
+        with self._lock:
+            self._remover(produto_id)
+            if self._alteracoes_na_carga is not None:
+                self._alteracoes_na_carga[produto_id] = None
+
+    def _adicionar(self, produto_id: int, nome: str, codigo_barras: Optional[str]):
+        self._remover(produto_id)
+        for chave in _chaves(nome, codigo_barras):
+            insort(self._chaves, (chave, produto_id))
+        self._produtos[produto_id] = {"id": produto_id, "nome": nome, "codigo_barras": codigo_barras}
+
+    def _remover(self, produto_id: int):
+        produto = self._produtos.pop(produto_id, None)
+        if produto is None:
+            return
+        for chave in _chaves(produto["nome"], produto["codigo_barras"]):
+            i = bisect_left(self._chaves, (chave, produto_id))
+            if i < len(self._chaves) and self._chaves[i] == (chave, produto_id):
+                del self._chaves[i]
+
+    def buscar(self, prefixo: str, limite: int = 10) -> List[dict]:
+        """Produtos cujo nome (em qualquer palavra) ou código de barras começa com `prefixo`"""
+        termo = normalizar(prefixo)
+        if not termo:
+            return []
+        resultado = []
+        vistos = set()
+        with self._lock:
+            i = bisect_left(self._chaves, (termo,))
+            while i < len(self._chaves) and len(resultado) < limite:
+                chave, produto_id = self._chaves[i]
+                if not chave.startswith(termo):
+                    break
+                if produto_id not in vistos:
+                    vistos.add(produto_id)
+                    resultado.append(self._produtos[produto_id])
+                i += 1
+        return resultado
+
+
+indice_produtos = IndicePrefixos()
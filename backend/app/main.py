@@ -1,22 +1,65 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.database import engine
-from app.models import Base
+from app.database import engine, async_engine, SessionLocal
+from app.indice_produtos import indice_produtos
+from app.crud.alteracao import numerar_alteracoes_globais_sync
+from app.auth.senhas import encerrar_pool as encerrar_pool_senhas
+from app import email_worker, tempo_real
+from app.metricas import MiddlewareMetricas
+from app.migracoes import verificar_esquema
 from app.routes.auth import router as auth_router
 from app.routes.produto import router as produto_router
 from app.routes.lista_compras import router as lista_compras_router
 from app.routes.compra import router as compra_router
 from app.routes.categoria import router as categoria_router
 from app.routes.assinatura import router as assinatura_router
+from app.routes.health import router as health_router
+from app.routes.metricas import router as metricas_router
+from app.routes.sincronizacao import router as sincronizacao_router
+
+# O esquema é criado/atualizado por scripts/migrar.py (run.py e os Dockerfiles de
+# desenvolvimento o executam antes de subir), não no import. Por padrão a API não sobe
+# com migrações pendentes; VERIFICAR_MIGRACOES=0 desliga a checagem.
+VERIFICAR_MIGRACOES = os.getenv("VERIFICAR_MIGRACOES", "1") == "1"
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if VERIFICAR_MIGRACOES:
+        verificar_esquema(engine)
+    
+    # Carregar índice de autocompletar de produtos e numerar alterações globais
+    # deixadas pendentes por um processo que caiu entre os dois commits
+    db = SessionLocal()
+    try:
+        indice_produtos.carregar(db)
+        numerar_alteracoes_globais_sync(db)
+    finally:
+        db.close()
+    
+    # Worker da caixa de saída de e-mails
+    tarefa_email = asyncio.create_task(email_worker.executar()) if email_worker.ATIVO else None
+    
+    # Broker das atualizações em tempo real das listas (WebSocket)
+    await tempo_real.broker.iniciar()
+    yield
+    if tarefa_email:
+        tarefa_email.cancel()
+    await tempo_real.broker.parar()
+    encerrar_pool_senhas()
+    await async_engine.dispose()
 
-# Criar tabelas
-Base.metadata.create_all(bind=engine)
 
 app = FastAPI(
     title="API de Gestão de Produtos",
     description="API para gerenciar produtos, listas de compras e histórico com autenticação JWT",
-    version="2.2.0"
+    version="2.2.0",
+    lifespan=lifespan
 )
 
 # Configurar CORS
@@ -26,8 +69,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
+# Latência, consultas SQL por rota e cabeçalho Server-Timing (ver app/metricas.py)
+app.add_middleware(MiddlewareMetricas)
+
 # Incluir rotas
 app.include_router(auth_router)
 app.include_router(produto_router)
@@ -35,6 +82,9 @@ app.include_router(lista_compras_router)
 app.include_router(compra_router)
 app.include_router(categoria_router)
 app.include_router(assinatura_router)
+app.include_router(health_router)
+app.include_router(sincronizacao_router)
+app.include_router(metricas_router)
 
 @app.get("/")
 def read_root():
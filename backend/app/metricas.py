@@ -0,0 +1,220 @@
+"""
+Métricas de requisições HTTP e de consultas SQL, expostas em /metrics (formato Prometheus).
+
+- MiddlewareMetricas mede cada requisição e, via um ContextVar, acumula as consultas
+  SQL feitas durante ela (os hooks de cursor ficam em app/database.py e chamam
+  registrar_consulta). A mesma medição vai no cabeçalho Server-Timing da resposta.
+- As rotas são rotuladas pelo template ("/listas-compras/{lista_id}"), não pelo
+  caminho, para manter a cardinalidade baixa; caminhos sem rota viram "(sem rota)".
+- Consultas fora de requisições (worker de e-mail, scripts) entram com rota "-".
+- Linhas: cursor.rowcount. No PostgreSQL vale para SELECT e DML; no SQLite o SELECT
+  informa -1 e só o DML é contado.
+
+Cada processo (worker) tem seus próprios contadores, como o índice de autocompletar, e
+não há agregação entre eles (o prometheus_client em modo multiprocesso não é dependência
+do projeto). Com `run_prod.py --workers N`, N > 1, cada coleta de /metrics cai num
+worker qualquer do socket compartilhado e os contadores "voltam" entre coletas, o que
+invalida rate()/increase(). Para coletar, rode instâncias com --workers 1 (uma porta
+cada) e configure cada uma como alvo do Prometheus.
+"""
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+
+from starlette.datastructures import MutableHeaders
+
+# Limites (le) dos histogramas
+BUCKETS_DURACAO = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_CONSULTAS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+SEM_ROTA = "(sem rota)"
+FORA_DE_REQUISICAO = "-"
+
+
+class Medicao:
+    """Consultas SQL feitas durante uma requisição"""
+    __slots__ = ("consultas", "db_segundos", "linhas")
+
+    def __init__(self):
+        self.consultas = 0
+        self.db_segundos = 0.0
+        self.linhas = 0
+
+    def server_timing(self, total_segundos: float) -> str:
+        return (
+            f'db;dur={self.db_segundos * 1000:.1f};desc="consultas: {self.consultas}", '
+            f"app;dur={total_segundos * 1000:.1f}"
+        )
+
+
+_medicao_atual: ContextVar[Optional[Medicao]] = ContextVar("medicao_atual", default=None)
+
+
+class Histograma:
+    __slots__ = ("limites", "buckets", "soma", "contagem")
+
+    def __init__(self, limites):
+        self.limites = limites
+        self.buckets = [0] * len(limites)
+        self.soma = 0.0
+        self.contagem = 0
+
+    def observar(self, valor: float):
+        for i, limite in enumerate(self.limites):
+            if valor <= limite:
+                self.buckets[i] += 1
+                break
+        self.soma += valor
+        self.contagem += 1
+
+    def linhas(self, nome: str, rotulos: str) -> list:
+        saida = []
+        acumulado = 0
+        for limite, quantidade in zip(self.limites, self.buckets):
+            acumulado += quantidade
+            saida.append(f'{nome}_bucket{{{rotulos},le="{limite}"}} {acumulado}')
+        saida.append(f'{nome}_bucket{{{rotulos},le="+Inf"}} {self.contagem}')
+        saida.append(f"{nome}_sum{{{rotulos}}} {self.soma}")
+        saida.append(f"{nome}_count{{{rotulos}}} {self.contagem}")
+        return saida
+
+
+def _rotulo(valor) -> str:
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _rotulos(**valores) -> str:
+    return ",".join(f'{chave}="{_rotulo(valor)}"' for chave, valor in valores.items())
+
+
+class Metricas:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requisicoes: Dict[Tuple[str, str, int], int] = {}
+        self.duracao: Dict[Tuple[str, str], Histograma] = {}
+        self.consultas_por_requisicao: Dict[Tuple[str, str], Histograma] = {}
+        # (metodo, rota) -> [consultas, segundos, linhas]
+        self.db: Dict[Tuple[str, str], list] = {}
+        # Falhas ao numerar as alterações globais do /sync (ver app/crud/alteracao.py)
+        self.numeracoes_adiadas = 0
+
+    def _somar_db(self, chave, medicao: Medicao):
+        totais = self.db.setdefault(chave, [0, 0.0, 0])
+        totais[0] += medicao.consultas
+        totais[1] += medicao.db_segundos
+        totais[2] += medicao.linhas
+
+    def registrar_requisicao(self, metodo: str, rota: str, status: int, segundos: float, medicao: Medicao):
+        chave = (metodo, rota)
+        with self._lock:
+            self.requisicoes[(metodo, rota, status)] = self.requisicoes.get((metodo, rota, status), 0) + 1
+            self.duracao.setdefault(chave, Histograma(BUCKETS_DURACAO)).observar(segundos)
+            self.consultas_por_requisicao.setdefault(chave, Histograma(BUCKETS_CONSULTAS)).observar(medicao.consultas)
+            self._somar_db(chave, medicao)
+
+    def registrar_consulta_avulsa(self, segundos: float, linhas: int):
+        avulsa = Medicao()
+        avulsa.consultas, avulsa.db_segundos, avulsa.linhas = 1, segundos, linhas
+        with self._lock:
+            self._somar_db((FORA_DE_REQUISICAO, FORA_DE_REQUISICAO), avulsa)
+
+    def registrar_numeracao_adiada(self):
+        with self._lock:
+            self.numeracoes_adiadas += 1
+
+    def exportar(self, extras: Optional[list] = None) -> str:
+        """Texto no formato de exposição do Prometheus (version=0.0.4)"""
+        with self._lock:
+            linhas = [
+                "# HELP http_requisicoes_total Requisições HTTP atendidas",
+                "# TYPE http_requisicoes_total counter",
+            ]
+            for (metodo, rota, status), total in sorted(self.requisicoes.items()):
+                linhas.append(f"http_requisicoes_total{{{_rotulos(metodo=metodo, rota=rota, status=status)}}} {total}")
+
+            linhas += [
+                "# HELP http_requisicao_duracao_segundos Latência das requisições HTTP",
+                "# TYPE http_requisicao_duracao_segundos histogram",
+            ]
+            for (metodo, rota), histograma in sorted(self.duracao.items()):
+                linhas += histograma.linhas("http_requisicao_duracao_segundos", _rotulos(metodo=metodo, rota=rota))
+
+            linhas += [
+                "# HELP db_consultas_por_requisicao Consultas SQL por requisição",
+                "# TYPE db_consultas_por_requisicao histogram",
+            ]
+            for (metodo, rota), histograma in sorted(self.consultas_por_requisicao.items()):
+                linhas += histograma.linhas("db_consultas_por_requisicao", _rotulos(metodo=metodo, rota=rota))
+
+            for indice, nome, tipo, descricao in (
+                (0, "db_consultas_total", "counter", "Consultas SQL executadas"),
+                (1, "db_duracao_segundos_total", "counter", "Tempo gasto em consultas SQL"),
+                (2, "db_linhas_total", "counter", "Linhas retornadas/afetadas (cursor.rowcount)"),
+            ):
+                linhas += [f"# HELP {nome} {descricao}", f"# TYPE {nome} {tipo}"]
+                for (metodo, rota), totais in sorted(self.db.items()):
+                    linhas.append(f"{nome}{{{_rotulos(metodo=metodo, rota=rota)}}} {totais[indice]}")
+
+            linhas += [
+                "# HELP sync_numeracoes_adiadas_total Falhas ao numerar alterações globais (ficam pendentes)",
+                "# TYPE sync_numeracoes_adiadas_total counter",
+                f"sync_numeracoes_adiadas_total {self.numeracoes_adiadas}",
+            ]
+
+        linhas += extras or []
+        return "\n".join(linhas) + "\n"
+
+
+metricas = Metricas()
+
+
+def registrar_consulta(segundos: float, linhas: int):
+    """Chamado pelos hooks after_cursor_execute dos engines"""
+    linhas = max(linhas, 0)
+    medicao = _medicao_atual.get()
+    if medicao is None:
+        metricas.registrar_consulta_avulsa(segundos, linhas)
+        return
+    medicao.consultas += 1
+    medicao.db_segundos += segundos
+    medicao.linhas += linhas
+
+
+def _rota(scope) -> str:
+    rota = scope.get("route")
+    return getattr(rota, "path", None) or SEM_ROTA
+
+
+class MiddlewareMetricas:
+    """Middleware ASGI: latência, consultas SQL e cabeçalho Server-Timing por requisição"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        medicao = Medicao()
+        token = _medicao_atual.set(medicao)
+        inicio = time.perf_counter()
+        status = 500
+
+        async def enviar(mensagem):
+            nonlocal status
+            if mensagem["type"] == "http.response.start":
+                status = mensagem["status"]
+                MutableHeaders(scope=mensagem).append(
+                    "Server-Timing", medicao.server_timing(time.perf_counter() - inicio)
+                )
+            await send(mensagem)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            _medicao_atual.reset(token)
+            metricas.registrar_requisicao(
+                scope["method"], _rota(scope), status, time.perf_counter() - inicio, medicao
+            )
@@ -0,0 +1,109 @@
+"""
+Migrações versionadas do esquema do banco.
+
+Cada migração é um módulo mNNNN_*.py com VERSAO, DESCRICAO e aplicar(conn);
+aplicar pode retornar um aviso (ex.: índice opcional não criado), que o migrador
+inclui no resultado em vez de a migração imprimir por conta própria. As versões aplicadas ficam na tabela schema_versao; `python scripts/migrar.py` aplica
+as pendentes em ordem, cada uma na sua transação. As migrações são idempotentes
+(verificam colunas/índices antes de criar), então bancos criados pelo antigo
+create_all na inicialização passam por todas sem erro.
+
+A API não cria tabelas ao importar app.main e, por padrão (VERIFICAR_MIGRACOES=1),
+recusa iniciar se houver migração pendente (ver verificar_esquema); run.py aplica as
+pendentes antes de subir.
+"""
+from datetime import datetime, timezone
+from typing import List
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+
+from app.migracoes import (
+    m0001_esquema_inicial,
+    m0002_produtos_categoria_id,
+    m0003_produtos_estoque_minimo,
+    m0004_busca_produtos,
+    m0005_indices_listagem,
+    m0006_resumos_compras,
+    m0007_contadores_listas,
+    m0008_alteracoes_sync,
+    m0009_gatilho_busca_produtos,
+)
+
+MIGRACOES = [
+    m0001_esquema_inicial,
+    m0002_produtos_categoria_id,
+    m0003_produtos_estoque_minimo,
+    m0004_busca_produtos,
+    m0005_indices_listagem,
+    m0006_resumos_compras,
+    m0007_contadores_listas,
+    m0008_alteracoes_sync,
+    m0009_gatilho_busca_produtos,
+]
+
+# Chave do pg_advisory_lock que serializa execuções simultâneas do migrador
+_CHAVE_LOCK = 7_150_015
+
+_metadata = MetaData()
+schema_versao = Table(
+    "schema_versao",
+    _metadata,
+    Column("versao", Integer, primary_key=True),
+    Column("descricao", String(255), nullable=False),
+    Column("aplicada_em", DateTime(timezone=True), nullable=False),
+)
+
+
+class EsquemaDesatualizado(RuntimeError):
+    pass
+
+
+def versoes_aplicadas(conn: Connection) -> set:
+    if not inspect(conn).has_table(schema_versao.name):
+        return set()
+    return set(conn.execute(select(schema_versao.c.versao)).scalars())
+
+
+def pendentes(conn: Connection) -> list:
+    aplicadas = versoes_aplicadas(conn)
+    return [m for m in MIGRACOES if m.VERSAO not in aplicadas]
+
+
+def migrar(engine: Engine) -> List[str]:
+    """Aplica as migrações pendentes e retorna a descrição de cada uma (com o aviso, se houver)"""
+    aplicadas = []
+    with engine.connect() as trava:
+        if engine.dialect.name == "postgresql":
+            trava.execute(text("SELECT pg_advisory_lock(:chave)"), {"chave": _CHAVE_LOCK})
+        try:
+            with engine.begin() as conn:
+                _metadata.create_all(conn)
+            with engine.connect() as conn:
+                a_aplicar = pendentes(conn)
+            for migracao in a_aplicar:
+                with engine.begin() as conn:
+                    aviso = migracao.aplicar(conn)
+                    conn.execute(schema_versao.insert().values(
+                        versao=migracao.VERSAO,
+                        descricao=migracao.DESCRICAO,
+                        aplicada_em=datetime.now(timezone.utc)
+                    ))
+                descricao = f"{migracao.VERSAO:04d} {migracao.DESCRICAO}"
+                aplicadas.append(f"{descricao} (aviso: {aviso})" if aviso else descricao)
+        finally:
+            if engine.dialect.name == "postgresql":
+                trava.execute(text("SELECT pg_advisory_unlock(:chave)"), {"chave": _CHAVE_LOCK})
+    return aplicadas
+
+
+def verificar_esquema(engine: Engine):
+    """Falha se o banco não tiver todas as migrações aplicadas (checagem opcional na inicialização)"""
+    with engine.connect() as conn:
+        faltando = pendentes(conn)
+    if faltando:
+        raise EsquemaDesatualizado(
+            "Migrações pendentes: "
+            + ", ".join(f"{m.VERSAO:04d} {m.DESCRICAO}" for m in faltando)
+            + ". Execute: python scripts/migrar.py"
+        )
@@ -0,0 +1,7 @@
+"""Utilitários compartilhados pelas migrações"""
+from sqlalchemy import inspect
+from sqlalchemy.engine import Connection
+
+
+def coluna_existe(conn: Connection, tabela: str, coluna: str) -> bool:
+    return any(c["name"] == coluna for c in inspect(conn).get_columns(tabela))
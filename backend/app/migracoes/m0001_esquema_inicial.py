@@ -0,0 +1,11 @@
+"""Cria as tabelas que ainda não existem a partir dos modelos (antes feito no import de app.main)"""
+from sqlalchemy.engine import Connection
+
+from app.models import Base
+
+VERSAO = 1
+DESCRICAO = "esquema inicial (tabelas dos modelos)"
+
+
+def aplicar(conn: Connection):
+    Base.metadata.create_all(conn)
@@ -0,0 +1,24 @@
+"""
+Troca a coluna produtos.categoria (texto) por categoria_id (FK para categorias).
+Antes: scripts/migrate_produtos_categoria.py
+"""
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from app.migracoes.base import coluna_existe
+
+VERSAO = 2
+DESCRICAO = "produtos.categoria_id"
+
+
+def aplicar(conn: Connection):
+    if not coluna_existe(conn, "produtos", "categoria_id"):
+        conn.execute(text("ALTER TABLE produtos ADD COLUMN categoria_id INTEGER REFERENCES categorias(id)"))
+
+    if conn.dialect.name == "postgresql" and coluna_existe(conn, "produtos", "categoria"):
+        conn.execute(text("""
+            UPDATE produtos p SET categoria_id = c.id
+            FROM categorias c
+            WHERE p.categoria = c.nome AND p.categoria IS NOT NULL AND p.categoria_id IS NULL
+        """))
+        conn.execute(text("ALTER TABLE produtos DROP COLUMN categoria"))
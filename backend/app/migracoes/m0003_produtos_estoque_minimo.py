@@ -0,0 +1,16 @@
+"""
+Adiciona produtos.estoque_minimo (regra de estoque baixo).
+Antes: scripts/migrate_estoque_minimo.py
+"""
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from app.migracoes.base import coluna_existe
+
+VERSAO = 3
+DESCRICAO = "produtos.estoque_minimo"
+
+
+def aplicar(conn: Connection):
+    if not coluna_existe(conn, "produtos", "estoque_minimo"):
+        conn.execute(text("ALTER TABLE produtos ADD COLUMN estoque_minimo INTEGER"))
@@ -0,0 +1,88 @@
+"""
+Índices de busca de produtos usados por GET /produtos/?search= e
+GET /listas-compras/{id}/produtos-sugeridos (antes: scripts/migrate_busca_produtos.py).
+
+- PostgreSQL: extensão pg_trgm e índices GIN (gin_trgm_ops) em produtos.nome,
+  produtos.descricao, produtos.codigo_barras e categorias.nome. Sem permissão para
+  criar a extensão, a migração é registrada sem os índices (com um aviso no resultado
+  do migrador) e a busca usa ilike.
+- SQLite: tabela virtual FTS5 produtos_fts, mantida por triggers.
+"""
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import DBAPIError
+
+VERSAO = 4
+DESCRICAO = "índices de busca de produtos (pg_trgm / FTS5)"
+
+POSTGRES = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_produtos_nome_trgm ON produtos USING gin (nome gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_produtos_descricao_trgm ON produtos USING gin (descricao gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_produtos_codigo_barras_trgm ON produtos USING gin (codigo_barras gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_categorias_nome_trgm ON categorias USING gin (nome gin_trgm_ops)",
+]
+
+# Só as colunas indexadas: atualizações de estoque/preço (ex.: a cada compra finalizada)
+# não reescrevem a linha do FTS
+TRIGGER_PRODUTOS_AU = """
+    CREATE TRIGGER IF NOT EXISTS produtos_fts_au
+    AFTER UPDATE OF nome, descricao, codigo_barras, categoria_id ON produtos BEGIN
+        DELETE FROM produtos_fts WHERE rowid = old.id;
+        INSERT INTO produtos_fts(rowid, nome, descricao, codigo_barras, categoria)
+        VALUES (new.id, new.nome, new.descricao, new.codigo_barras,
+                (SELECT nome FROM categorias WHERE id = new.categoria_id));
+    END
+"""
+
+SQLITE = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS produtos_fts USING fts5(
+        nome, descricao, codigo_barras, categoria,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS produtos_fts_ai AFTER INSERT ON produtos BEGIN
+        INSERT INTO produtos_fts(rowid, nome, descricao, codigo_barras, categoria)
+        VALUES (new.id, new.nome, new.descricao, new.codigo_barras,
+                (SELECT nome FROM categorias WHERE id = new.categoria_id));
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS produtos_fts_ad AFTER DELETE ON produtos BEGIN
+        DELETE FROM produtos_fts WHERE rowid = old.id;
+    END
+    """,
+    TRIGGER_PRODUTOS_AU,
+    """
+    CREATE TRIGGER IF NOT EXISTS categorias_fts_au AFTER UPDATE OF nome ON categorias BEGIN
+        UPDATE produtos_fts SET categoria = new.nome
+        WHERE rowid IN (SELECT id FROM produtos WHERE categoria_id = new.id);
+    END
+    """,
+    "DELETE FROM produtos_fts",
+    """
+    INSERT INTO produtos_fts(rowid, nome, descricao, codigo_barras, categoria)
+    SELECT p.id, p.nome, p.descricao, p.codigo_barras, c.nome
+    FROM produtos p LEFT JOIN categorias c ON c.id = p.categoria_id
+    """,
+]
+
+
+def aplicar(conn: Connection) -> Optional[str]:
+    if conn.dialect.name == "postgresql":
+        try:
+            with conn.begin_nested():
+                conn.execute(text(POSTGRES[0]))
+        except DBAPIError as e:
+            return f"pg_trgm indisponível ({e.orig}); busca de produtos seguirá com ilike"
+        comandos = POSTGRES[1:]
+    elif conn.dialect.name == "sqlite":
+        comandos = SQLITE
+    else:
+        return
+    for sql in comandos:
+        conn.execute(text(sql))
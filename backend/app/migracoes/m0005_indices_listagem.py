@@ -0,0 +1,25 @@
+"""
+Índices declarados nos modelos depois que as tabelas já existiam (create_all não
+cria índices em tabelas existentes): nome normalizado de produtos e as chaves da
+paginação por cursor de listas e compras.
+"""
+from sqlalchemy.engine import Connection
+from sqlalchemy.schema import CreateIndex
+
+from app.models import Compra, ListaCompras, Produto
+
+VERSAO = 5
+DESCRICAO = "índices de produtos por nome e de listagem de listas/compras"
+
+INDICES = {
+    Produto.__table__: "ix_produtos_nome_lower",
+    ListaCompras.__table__: "ix_listas_compras_user_created",
+    Compra.__table__: "ix_compras_user_data",
+}
+
+
+def aplicar(conn: Connection):
+    for tabela, nome in INDICES.items():
+        indice = next(i for i in tabela.indexes if i.name == nome)
+        # IF NOT EXISTS em vez de checkfirst: a reflexão não enxerga o índice de expressão lower(nome)
+        conn.execute(CreateIndex(indice, if_not_exists=True))
@@ -0,0 +1,55 @@
+"""
+Preenche os resumos diários de compras (resumo_diario_compras e resumo_diario_itens)
+a partir do histórico em compras/itens_compra. As tabelas são criadas pela migração 1;
+daqui em diante o CRUD de compras as mantém. Para recalcular depois:
+  python scripts/reconstruir_resumos_compras.py
+"""
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.engine import Connection
+
+from app.models import Compra, ItemCompra, ResumoDiarioCompras, ResumoDiarioItens
+
+VERSAO = 6
+DESCRICAO = "resumos diários de compras (backfill)"
+
+
+def aplicar(conn: Connection):
+    reconstruir_resumos(conn)
+
+
+def reconstruir_resumos(conn: Connection):
+    """Recalcula os resumos do zero; pode ser chamada de novo se eles divergirem"""
+    # Mesmo dia (UTC) que o CRUD grava; no PostgreSQL date() seguiria o fuso da sessão.
+    # No SQLite os datetimes já são gravados em UTC, sem fuso.
+    if conn.dialect.name == "postgresql":
+        dia = func.date(func.timezone("UTC", Compra.data_compra))
+    else:
+        dia = func.date(Compra.data_compra)
+    conn.execute(delete(ResumoDiarioItens))
+    conn.execute(delete(ResumoDiarioCompras))
+
+    conn.execute(
+        insert(ResumoDiarioCompras).from_select(
+            ["user_id", "dia", "total_compras", "total_gasto"],
+            select(
+                Compra.user_id,
+                dia,
+                func.count(Compra.id),
+                func.sum(Compra.valor_total),
+            ).group_by(Compra.user_id, dia),
+        )
+    )
+    conn.execute(
+        insert(ResumoDiarioItens).from_select(
+            ["user_id", "dia", "nome_item", "quantidade", "total_gasto"],
+            select(
+                Compra.user_id,
+                dia,
+                ItemCompra.nome_item,
+                func.sum(ItemCompra.quantidade),
+                func.sum(ItemCompra.preco_total),
+            )
+            .join(ItemCompra, ItemCompra.compra_id == Compra.id)
+            .group_by(Compra.user_id, dia, ItemCompra.nome_item),
+        )
+    )
@@ -0,0 +1,100 @@
+"""
+Adiciona os contadores de itens em listas_compras (total_itens, itens_comprados,
+valor_estimado_total) e os preenche a partir de itens_lista_compras. Daqui em diante
+o CRUD de itens os mantém; scripts/reparar_contadores_listas.py corrige divergências.
+"""
+from typing import Iterable, List, Optional
+
+from sqlalchemy import case, func, or_, select, text, update
+from sqlalchemy.engine import Connection
+
+from app.migracoes.base import coluna_existe
+from app.models import ItemListaCompras, ListaCompras
+
+VERSAO = 7
+DESCRICAO = "contadores de itens em listas_compras"
+
+COLUNAS = {
+    "total_itens": "INTEGER NOT NULL DEFAULT 0",
+    "itens_comprados": "INTEGER NOT NULL DEFAULT 0",
+    "valor_estimado_total": "FLOAT NOT NULL DEFAULT 0",
+}
+
+# Diferença de valor aceita entre o contador e a soma dos itens (arredondamento de float)
+TOLERANCIA_VALOR = 0.005
+
+
+def aplicar(conn: Connection):
+    for coluna, definicao in COLUNAS.items():
+        if not coluna_existe(conn, "listas_compras", coluna):
+            conn.execute(text(f"ALTER TABLE listas_compras ADD COLUMN {coluna} {definicao}"))
+    reconstruir_contadores(conn)
+
+
+def _contadores_dos_itens():
+    """Valores corretos dos contadores, por lista, calculados a partir dos itens"""
+    return (
+        select(
+            ItemListaCompras.lista_id,
+            func.count().label("total_itens"),
+            func.sum(case((ItemListaCompras.comprado == True, 1), else_=0)).label("itens_comprados"),
+            func.sum(
+                func.coalesce(ItemListaCompras.preco_estimado, 0) * ItemListaCompras.quantidade
+            ).label("valor_estimado_total"),
+        )
+        .group_by(ItemListaCompras.lista_id)
+        .subquery()
+    )
+
+
+def reconstruir_contadores(conn: Connection, lista_ids: Optional[Iterable[int]] = None) -> int:
+    """Recalcula os contadores de todas as listas (ou só de `lista_ids`); retorna as listas alteradas"""
+    def soma(expressao):
+        return (
+            select(func.coalesce(expressao, 0))
+            .where(ItemListaCompras.lista_id == ListaCompras.id)
+            .scalar_subquery()
+        )
+
+    stmt = update(ListaCompras).values(
+        total_itens=soma(func.count()),
+        itens_comprados=soma(func.sum(case((ItemListaCompras.comprado == True, 1), else_=0))),
+        valor_estimado_total=soma(
+            func.sum(func.coalesce(ItemListaCompras.preco_estimado, 0) * ItemListaCompras.quantidade)
+        ),
+    )
+    if lista_ids is not None:
+        stmt = stmt.where(ListaCompras.id.in_(list(lista_ids)))
+    return conn.execute(stmt).rowcount
+
+
+def contadores_divergentes(conn: Connection, limite: Optional[int] = None) -> List[tuple]:
+    """
+    Listas cujos contadores não batem com os itens: tuplas
+    (id, (total, comprados, valor) gravados, (total, comprados, valor) corretos).
+    """
+    itens = _contadores_dos_itens()
+    corretos = (
+        func.coalesce(itens.c.total_itens, 0),
+        func.coalesce(itens.c.itens_comprados, 0),
+        func.coalesce(itens.c.valor_estimado_total, 0),
+    )
+    query = (
+        select(
+            ListaCompras.id,
+            ListaCompras.total_itens,
+            ListaCompras.itens_comprados,
+            ListaCompras.valor_estimado_total,
+            *corretos,
+        )
+        .outerjoin(itens, itens.c.lista_id == ListaCompras.id)
+        .where(or_(
+            ListaCompras.total_itens != corretos[0],
+            ListaCompras.itens_comprados != corretos[1],
+            func.abs(ListaCompras.valor_estimado_total - corretos[2]) > TOLERANCIA_VALOR,
+        ))
+        .order_by(ListaCompras.id)
+    )
+    if limite:
+        query = query.limit(limite)
+    return [(linha[0], tuple(linha[1:4]), tuple(linha[4:7])) for linha in conn.execute(query)]
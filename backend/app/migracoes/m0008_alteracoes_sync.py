@@ -0,0 +1,16 @@
+"""
+Tabelas da sincronização incremental (GET /sync): alteracoes, com a sequência da
+última alteração de cada entidade, e contadores_alteracoes, com a última sequência
+de cada escopo. Começam vazias: dados anteriores chegam aos clientes pela carga
+completa que o /sync pede na primeira sincronização.
+"""
+from sqlalchemy.engine import Connection
+
+from app.models import Alteracao, Base, ContadorAlteracoes
+
+VERSAO = 8
+DESCRICAO = "alterações para sincronização incremental"
+
+
+def aplicar(conn: Connection):
+    Base.metadata.create_all(conn, tables=[Alteracao.__table__, ContadorAlteracoes.__table__])
@@ -0,0 +1,24 @@
+"""
+SQLite: recria o trigger produtos_fts_au como AFTER UPDATE OF nome, descricao,
+codigo_barras, categoria_id. Bancos criados antes disso reescreviam a linha do FTS a
+cada UPDATE em produtos, inclusive os de estoque feitos ao finalizar compras.
+"""
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from app.migracoes.m0004_busca_produtos import TRIGGER_PRODUTOS_AU
+
+VERSAO = 9
+DESCRICAO = "trigger do FTS de produtos só nas colunas indexadas"
+
+
+def aplicar(conn: Connection):
+    if conn.dialect.name != "sqlite":
+        return
+    tem_fts = conn.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'produtos_fts'"
+    )).first()
+    if tem_fts is None:
+        return
+    conn.execute(text("DROP TRIGGER IF EXISTS produtos_fts_au"))
+    conn.execute(text(TRIGGER_PRODUTOS_AU))
@@ -1,4 +1,7 @@
-from app.models.models import Base, Produto, User, ListaCompras, ItemListaCompras, Compra, ItemCompra, Categoria, Assinatura
+from app.models.models import (
+    Base, Produto, User, ListaCompras, ItemListaCompras, Compra, ItemCompra, Categoria, Assinatura,
+    ResumoDiarioCompras, ResumoDiarioItens, EmailPendente, Alteracao, ContadorAlteracoes,
+)
 
 __all__ = [
     "Base",
@@ -10,4 +13,9 @@ __all__ = [
     "ItemCompra",
     "Categoria",
     "Assinatura",
+    "ResumoDiarioCompras",
+    "ResumoDiarioItens",
+    "EmailPendente",
+    "Alteracao",
+    "ContadorAlteracoes",
 ]
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, BigInteger, String, Float, Date, DateTime, Text, Boolean, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -31,6 +31,9 @@ class Produto(Base):
 
     categoria = relationship("Categoria", back_populates="produtos")
 
+    # Busca por nome normalizado ao finalizar listas de compras
+    __table_args__ = (Index("ix_produtos_nome_lower", func.lower(nome)),)
+
 class User(Base):
     __tablename__ = "users"
 
@@ -57,9 +60,16 @@ class ListaCompras(Base):
     descricao = Column(Text)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     concluida = Column(Boolean, default=False)
+    # Contadores dos itens, mantidos pelo CRUD de itens (reparo: scripts/reparar_contadores_listas.py)
+    total_itens = Column(Integer, nullable=False, default=0, server_default="0")
+    itens_comprados = Column(Integer, nullable=False, default=0, server_default="0")
+    valor_estimado_total = Column(Float, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
+    # Paginação por cursor: (created_at, id) das listas do usuário
+    __table_args__ = (Index("ix_listas_compras_user_created", "user_id", "created_at", "id"),)
+    
     # Relacionamentos
     user = relationship("User", back_populates="listas_compras")
     itens = relationship("ItemListaCompras", back_populates="lista", cascade="all, delete-orphan")
@@ -93,6 +103,9 @@ class Compra(Base):
     observacao = Column(Text)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
+    # Paginação por cursor: (data_compra, id) das compras do usuário
+    __table_args__ = (Index("ix_compras_user_data", "user_id", "data_compra", "id"),)
+    
     # Relacionamentos
     user = relationship("User", back_populates="compras")
     lista = relationship("ListaCompras")
@@ -116,6 +129,55 @@ class ItemCompra(Base):
     produto = relationship("Produto")
 
 
+class ResumoDiarioCompras(Base):
+    """Totais de compras por usuário e dia (mantido incrementalmente pelo CRUD de compras)"""
+    __tablename__ = "resumo_diario_compras"
+    __table_args__ = (UniqueConstraint("user_id", "dia", name="uq_resumo_diario_compras"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    dia = Column(Date, nullable=False)
+    total_compras = Column(Integer, nullable=False, default=0)
+    total_gasto = Column(Float, nullable=False, default=0)
+
+
+class ResumoDiarioItens(Base):
+    """Quantidade e gasto por usuário, dia e item (mantido incrementalmente pelo CRUD de compras)"""
+    __tablename__ = "resumo_diario_itens"
+    __table_args__ = (UniqueConstraint("user_id", "dia", "nome_item", name="uq_resumo_diario_itens"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    dia = Column(Date, nullable=False)
+    nome_item = Column(String(255), nullable=False)
+    quantidade = Column(Integer, nullable=False, default=0)
+    total_gasto = Column(Float, nullable=False, default=0)
+
+
+class Alteracao(Base):
+    """Última alteração de cada lista, item, compra e produto, lida pela sincronização incremental (GET /sync)"""
+    __tablename__ = "alteracoes"
+    __table_args__ = (
+        UniqueConstraint("escopo", "entidade", "entidade_id", name="uq_alteracoes_entidade"),
+        Index("ix_alteracoes_escopo_seq", "escopo", "seq"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    escopo = Column(Integer, nullable=False)  # user_id do dono; 0 para produtos (globais)
+    seq = Column(BigInteger, nullable=False)  # sequência do escopo (contadores_alteracoes)
+    entidade = Column(String(20), nullable=False)  # lista, item, compra, produto
+    entidade_id = Column(Integer, nullable=False)
+    removido = Column(Boolean, nullable=False, default=False)
+
+
+class ContadorAlteracoes(Base):
+    """Última sequência usada por escopo; a linha fica travada até o commit de quem a incrementa"""
+    __tablename__ = "contadores_alteracoes"
+
+    escopo = Column(Integer, primary_key=True, autoincrement=False)
+    seq = Column(BigInteger, nullable=False, default=0)
+
+
 class Assinatura(Base):
     __tablename__ = "assinaturas"
 
@@ -128,3 +190,21 @@ class Assinatura(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     user = relationship("User", back_populates="assinaturas")
+
+
+class EmailPendente(Base):
+    """Caixa de saída de e-mails, drenada pelo worker em app/email_worker.py"""
+    __tablename__ = "emails_pendentes"
+    __table_args__ = (Index("ix_emails_pendentes_fila", "status", "proxima_tentativa_em"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    destinatario = Column(String(255), nullable=False)
+    assunto = Column(String(255), nullable=False)
+    corpo_html = Column(Text, nullable=False)
+    corpo_texto = Column(Text)
+    status = Column(String(20), nullable=False, default="pendente")  # pendente, enviando, enviado, falhou, descartado
+    tentativas = Column(Integer, nullable=False, default=0)
+    proxima_tentativa_em = Column(DateTime(timezone=True), server_default=func.now())
+    ultimo_erro = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    enviado_em = Column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,66 @@
+"""
+Paginação por cursor (keyset) para as rotas de listagem.
+
+O cursor é opaco para o cliente: base64 de [chave_de_ordenação, id] do último
+registro da página. A próxima página filtra por (chave, id) além desse par, o que
+usa o índice e custa o mesmo em qualquer profundidade, ao contrário de offset.
+O cursor da próxima página vai no cabeçalho X-Next-Cursor, mantendo o corpo
+das respostas como lista.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, Optional, Tuple, Type, Union
+
+from fastapi import HTTPException, Response, status
+from sqlalchemy import func, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+CABECALHO_PROXIMO_CURSOR = "X-Next-Cursor"
+
+
+def codificar_cursor(chave: Any, id: int) -> str:
+    if isinstance(chave, datetime):
+        chave = chave.isoformat()
+    dados = json.dumps([chave, id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(dados).decode("ascii").rstrip("=")
+
+
+def ler_cursor(cursor: Optional[str], tipo_chave: Type = str) -> Optional[Tuple[Any, int]]:
+    """Decodifica o cursor recebido do cliente (400 se inválido)"""
+    if not cursor:
+        return None
+    try:
+        dados = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        chave, id = json.loads(dados)
+        if tipo_chave is datetime:
+            chave = datetime.fromisoformat(chave)
+        elif not isinstance(chave, tipo_chave):
+            raise ValueError(chave)
+        return chave, int(id)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor inválido"
+        )
+
+
+def apos_cursor(db: Union[Session, AsyncSession], chave, id, cursor: Tuple[Any, int], decrescente: bool = False):
+    """
+    Condição (chave, id) posterior ao cursor na ordem da listagem.
+    No SQLite as datas são texto em formatos mistos ("...:50" do CURRENT_TIMESTAMP e
+    "...:50.000000" do Python), então são comparadas via julianday().
+    """
+    valor, ultimo_id = cursor
+    if isinstance(valor, datetime) and db.get_bind().dialect.name == "sqlite":
+        chave, valor = func.julianday(chave), func.julianday(valor)
+    linha, limite = tuple_(chave, id), tuple_(valor, ultimo_id)
+    return linha < limite if decrescente else linha > limite
+
+
+def definir_proximo_cursor(response: Response, pagina: list, limit: int, chave: str):
+    """Se a página veio cheia, publica o cursor do último registro"""
+    if pagina and len(pagina) == limit:
+        ultimo = pagina[-1]
+        response.headers[CABECALHO_PROXIMO_CURSOR] = codificar_cursor(getattr(ultimo, chave), ultimo.id)
@@ -4,10 +4,10 @@ from sqlalchemy.orm import Session
 
 from app.database import get_db
 from app.schemas.assinatura import AssinaturaCreate, AssinaturaResponse
-from app.auth.auth import get_current_active_user
-from app.models import User
+from app.auth.auth import get_current_active_user, UsuarioAutenticado
 from app.crud import assinatura as crud
-from app.email_service import enviar_confirmacao_assinatura
+from app.crud import user as user_crud
+from app.email_service import enfileirar_confirmacao_assinatura
 
 router = APIRouter(prefix="/assinaturas", tags=["Assinaturas"])
 
@@ -16,22 +16,27 @@ router = APIRouter(prefix="/assinaturas", tags=["Assinaturas"])
 def criar_assinatura(
     dados: AssinaturaCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    current_user: UsuarioAutenticado = Depends(get_current_active_user),
 ):
-    """Cria uma assinatura para o usuário logado e envia confirmação por e-mail."""
+    """Cria uma assinatura para o usuário logado e enfileira a confirmação por e-mail."""
+    user = user_crud.get_user_by_id(db, current_user.id)
     assinatura = crud.create_assinatura(db, current_user.id, dados)
-    enviar_confirmacao_assinatura(
-        current_user.email,
-        current_user.full_name or current_user.username,
+    enfileirar_confirmacao_assinatura(
+        db,
+        user.email,
+        user.full_name or user.username,
         assinatura.plano,
     )
+    # Assinatura e e-mail na mesma transação: um não é gravado sem o outro
+    db.commit()
+    db.refresh(assinatura)
     return assinatura
 
 
 @router.get("/me", response_model=Optional[AssinaturaResponse])
 def minha_assinatura(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    current_user: UsuarioAutenticado = Depends(get_current_active_user),
 ):
     """Retorna a assinatura ativa do usuário (ou a mais recente)."""
     assinatura = crud.get_assinatura_ativa(db, current_user.id)
@@ -43,7 +48,7 @@ def minha_assinatura(
 @router.patch("/me/cancelar", response_model=AssinaturaResponse)
 def cancelar_minha_assinatura(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    current_user: UsuarioAutenticado = Depends(get_current_active_user),
 ):
     """Cancela a assinatura ativa do usuário."""
     assinatura = crud.get_assinatura_ativa(db, current_user.id)
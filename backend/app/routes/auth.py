@@ -1,28 +1,45 @@
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
 from app.database import get_db
 from app.schemas.auth import UserCreate, UserResponse, LoginRequest, Token
 from app.auth.auth import (
-    authenticate_user,
+    authenticate_user_async,
     create_access_token,
     get_current_active_user,
+    get_current_superuser,
+    cache_usuarios,
+    UsuarioAutenticado,
     ACCESS_TOKEN_EXPIRE_MINUTES
 )
-from app.models import User
+from app.auth.senhas import gerar_hash_senha, PoolSenhasOcupado
 from app.crud import user as user_crud
 
 router = APIRouter(prefix="/auth", tags=["Autenticação"])
 
+def _pool_senhas_ocupado() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Muitas autenticações simultâneas, tente novamente em instantes",
+        headers={"Retry-After": "1"},
+    )
+
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def register(user: UserCreate, db: Session = Depends(get_db)):
+async def register(user: UserCreate, db: Session = Depends(get_db)):
     """
-    Registra um novo usuário
+    Registra um novo usuário (hash da senha calculado no pool de processos)
     """
     try:
-        db_user = user_crud.create_user(db, user)
+        # Email/username repetidos são recusados antes de gastar um hash bcrypt;
+        # create_user verifica de novo, já que outro registro pode entrar durante o hash
+        await run_in_threadpool(user_crud.verificar_disponibilidade, db, user)
+        hashed_password = await gerar_hash_senha(user.password)
+        db_user = await run_in_threadpool(user_crud.create_user, db, user, hashed_password)
         return db_user
+    except PoolSenhasOcupado:
+        raise _pool_senhas_ocupado()
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -35,11 +52,14 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
         )
 
 @router.post("/login", response_model=Token)
-def login(login_data: LoginRequest, db: Session = Depends(get_db)):
+async def login(login_data: LoginRequest, db: Session = Depends(get_db)):
     """
-    Faz login e retorna um token JWT
+    Faz login e retorna um token JWT (senha verificada no pool de processos)
     """
-    user = authenticate_user(db, login_data.username, login_data.password)
+    try:
+        user = await authenticate_user_async(db, login_data.username, login_data.password)
+    except PoolSenhasOcupado:
+        raise _pool_senhas_ocupado()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -62,14 +82,23 @@ def login(login_data: LoginRequest, db: Session = Depends(get_db)):
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.get("/me", response_model=UserResponse)
-async def get_me(current_user: User = Depends(get_current_active_user)):
+def get_me(
+    db: Session = Depends(get_db),
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
+):
     """
     Retorna informações do usuário autenticado
     """
-    return current_user
+    user = user_crud.get_user_by_id(db, current_user.id)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Usuário não encontrado"
+        )
+    return user
 
 @router.post("/refresh", response_model=Token)
-async def refresh_token(current_user: User = Depends(get_current_active_user)):
+async def refresh_token(current_user: UsuarioAutenticado = Depends(get_current_active_user)):
     """
     Renova o token de acesso
     """
@@ -80,3 +109,10 @@ async def refresh_token(current_user: User = Depends(get_current_active_user)):
     )
     
     return {"access_token": access_token, "token_type": "bearer"}
+
+@router.get("/cache/estatisticas")
+async def estatisticas_cache_usuarios(current_user: UsuarioAutenticado = Depends(get_current_superuser)):
+    """
+    Hits/misses do cache de usuário autenticado deste processo (requer superusuário)
+    """
+    return cache_usuarios.estatisticas()
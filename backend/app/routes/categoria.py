@@ -1,27 +1,31 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
 from app.database import get_db
 from app.schemas.categoria import CategoriaCreate, CategoriaUpdate, CategoriaResponse
 from app.schemas.produto import ProdutoResponse
-from app.auth.auth import get_current_active_user
-from app.models import User
+from app.auth.auth import get_current_active_user, UsuarioAutenticado
 from app.crud import categoria as crud
+from app.paginacao import ler_cursor, definir_proximo_cursor
 
 router = APIRouter(prefix="/categorias", tags=["Categorias"])
 
 
 @router.get("/", response_model=List[CategoriaResponse])
 def listar_categorias(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
     search: Optional[str] = None,
+    cursor: Optional[str] = Query(None, description="Cursor da próxima página (cabeçalho X-Next-Cursor); substitui skip"),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    current_user: UsuarioAutenticado = Depends(get_current_active_user),
 ):
-    """Lista categorias de itens (requer autenticação)."""
-    return crud.get_categorias(db, skip=skip, limit=limit, search=search)
+    """Lista categorias de itens por nome (requer autenticação)."""
+    categorias = crud.get_categorias(db, skip=skip, limit=limit, search=search, cursor=ler_cursor(cursor))
+    definir_proximo_cursor(response, categorias, limit, "nome")
+    return categorias
 
 
 @router.get("/{categoria_id}/produtos", response_model=List[ProdutoResponse])
@@ -30,7 +34,7 @@ def listar_produtos_da_categoria(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    current_user: UsuarioAutenticado = Depends(get_current_active_user),
 ):
     """Lista produtos vinculados à categoria (requer autenticação)."""
     categoria = crud.get_categoria(db, categoria_id)
@@ -43,7 +47,7 @@ def listar_produtos_da_categoria(
 def obter_categoria(
     categoria_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    current_user: UsuarioAutenticado = Depends(get_current_active_user),
 ):
     """Obtém uma categoria específica (requer autenticação)."""
     categoria = crud.get_categoria(db, categoria_id)
@@ -56,7 +60,7 @@ def obter_categoria(
 def criar_categoria(
     categoria: CategoriaCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    current_user: UsuarioAutenticado = Depends(get_current_active_user),
 ):
     """Cria uma nova categoria (requer autenticação)."""
     try:
@@ -70,7 +74,7 @@ def atualizar_categoria(
     categoria_id: int,
     categoria: CategoriaUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    current_user: UsuarioAutenticado = Depends(get_current_active_user),
 ):
     """Atualiza uma categoria (requer autenticação)."""
     db_categoria = crud.update_categoria(db, categoria_id, categoria)
@@ -83,7 +87,7 @@ def atualizar_categoria(
 def deletar_categoria(
     categoria_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    current_user: UsuarioAutenticado = Depends(get_current_active_user),
 ):
     """Remove uma categoria (requer autenticação)."""
     if not crud.delete_categoria(db, categoria_id):
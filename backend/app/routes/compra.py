@@ -1,11 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime
 
-from app.database import get_db
-from app.auth.auth import get_current_active_user
-from app.models import User
+from app.database import get_async_db
+from app.auth.auth import get_current_active_user, UsuarioAutenticado
 from app.schemas.compra import (
     CompraCreate,
     CompraUpdate,
@@ -14,50 +13,74 @@ from app.schemas.compra import (
     FinalizarListaRequest
 )
 from app.crud import compra as crud
+from app.crud.alteracao import seq_atual
+from app.etag import etag_fraco, nao_modificado
+from app.paginacao import ler_cursor, definir_proximo_cursor
 
 router = APIRouter(prefix="/compras", tags=["Histórico de Compras"])
 
 @router.get("/", response_model=List[CompraResponse])
-def listar_compras(
+async def listar_compras(
+    request: Request,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
     data_inicial: Optional[str] = Query(None, description="Data inicial (YYYY-MM-DD)"),
     data_final: Optional[str] = Query(None, description="Data final (YYYY-MM-DD)"),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    cursor: Optional[str] = Query(None, description="Cursor da próxima página (cabeçalho X-Next-Cursor); substitui skip"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
 ):
-    """Lista todas as compras do usuário"""
+    """Lista todas as compras do usuário (ETag: 304 se nenhuma lista, item ou compra mudou)"""
     # Converter strings para datetime se fornecidas
     dt_inicial = datetime.fromisoformat(data_inicial) if data_inicial else None
     dt_final = datetime.fromisoformat(data_final) if data_final else None
+    cursor_lido = ler_cursor(cursor, datetime)
     
-    compras = crud.get_compras(
+    versao = await seq_atual(db, current_user.id)
+    nao_mudou = nao_modificado(request, response, etag_fraco("compras", current_user.id, versao))
+    if nao_mudou is not None:
+        return nao_mudou
+    compras = await crud.get_compras(
         db,
         user_id=current_user.id,
         skip=skip,
         limit=limit,
         data_inicial=dt_inicial,
-        data_final=dt_final
+        data_final=dt_final,
+        cursor=cursor_lido
     )
+    definir_proximo_cursor(response, compras, limit, "data_compra")
     return compras
 
 @router.get("/estatisticas")
-def obter_estatisticas(
+async def obter_estatisticas(
     dias: int = Query(30, ge=1, le=365),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
 ):
     """Obtém estatísticas de compras do usuário"""
-    return crud.get_estatisticas_compras(db, current_user.id, dias)
+    return await crud.get_estatisticas_compras(db, current_user.id, dias)
 
 @router.get("/{compra_id}", response_model=CompraResponse)
-def obter_compra(
+async def obter_compra(
     compra_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
 ):
-    """Obtém uma compra específica"""
-    compra = crud.get_compra(db, compra_id, current_user.id)
+    """Obtém uma compra específica (ETag: 304 se a compra não mudou)"""
+    versao = await crud.get_versao_compra(db, compra_id, current_user.id)
+    if versao is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Compra não encontrada"
+        )
+    nao_mudou = nao_modificado(request, response, etag_fraco("compra", current_user.id, compra_id, *versao))
+    if nao_mudou is not None:
+        return nao_mudou
+    compra = await crud.get_compra(db, compra_id, current_user.id)
     if not compra:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -66,20 +89,20 @@ def obter_compra(
     return compra
 
 @router.post("/", response_model=CompraResponse, status_code=status.HTTP_201_CREATED)
-def criar_compra(
+async def criar_compra(
     compra: CompraCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
 ):
     """Cria uma nova compra manualmente"""
-    return crud.create_compra(db, compra, current_user.id)
+    return await crud.create_compra(db, compra, current_user.id)
 
 @router.post("/finalizar-lista/{lista_id}", response_model=CompraResponse)
-def finalizar_lista(
+async def finalizar_lista(
     lista_id: int,
     request: FinalizarListaRequest,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
 ):
     """
     Finaliza uma lista de compras:
@@ -88,7 +111,7 @@ def finalizar_lista(
     - Atualiza preços dos produtos (opcional)
     - Marca lista como concluída
     """
-    compra = crud.finalizar_lista_e_criar_compra(
+    compra = await crud.finalizar_lista_e_criar_compra(
         db,
         lista_id=lista_id,
         user_id=current_user.id,
@@ -107,14 +130,14 @@ def finalizar_lista(
     return compra
 
 @router.put("/{compra_id}", response_model=CompraResponse)
-def atualizar_compra(
+async def atualizar_compra(
     compra_id: int,
     compra_update: CompraUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
 ):
     """Atualiza informações da compra (local, observação)"""
-    compra = crud.update_compra(db, compra_id, compra_update, current_user.id)
+    compra = await crud.update_compra(db, compra_id, compra_update, current_user.id)
     if not compra:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -123,13 +146,13 @@ def atualizar_compra(
     return compra
 
 @router.delete("/{compra_id}", status_code=status.HTTP_204_NO_CONTENT)
-def deletar_compra(
+async def deletar_compra(
     compra_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
 ):
     """Deleta uma compra do histórico"""
-    if not crud.delete_compra(db, compra_id, current_user.id):
+    if not await crud.delete_compra(db, compra_id, current_user.id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Compra não encontrada"
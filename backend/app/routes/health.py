@@ -0,0 +1,24 @@
+import time
+
+from fastapi import APIRouter, Response, status
+from sqlalchemy import text
+
+from app.database import async_engine, engine, estado_pool
+
+router = APIRouter(prefix="/health", tags=["Saúde"])
+
+
+@router.get("/db")
+def saude_banco(response: Response):
+    """Testa a conexão com o banco e reporta o estado dos pools de conexões (síncrono e assíncrono) (sem autenticação)."""
+    inicio = time.perf_counter()
+    try:
+        with engine.connect() as conexao:
+            conexao.execute(text("SELECT 1"))
+        resultado = {"status": "ok", "latencia_ms": round((time.perf_counter() - inicio) * 1000, 2)}
+    except Exception as e:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        resultado = {"status": "indisponivel", "erro": type(e).__name__}
+    resultado["pool"] = estado_pool(engine.pool)
+    resultado["pool_async"] = estado_pool(async_engine.pool)
+    return resultado
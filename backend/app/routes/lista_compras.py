@@ -1,49 +1,106 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response, WebSocket
+from starlette.websockets import WebSocketState
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from datetime import datetime
 
-from app.database import get_db
-from app.auth.auth import get_current_active_user
-from app.models import User, ItemListaCompras
+from app import tempo_real
+from app.database import AsyncSessionLocal, get_async_db
+from app.auth.auth import get_current_active_user, usuario_pelo_token, UsuarioAutenticado
 from app.schemas.lista_compras import (
     ListaComprasCreate,
     ListaComprasUpdate,
     ListaComprasResponse,
+    ListaComprasSummary,
     ItemListaComprasCreate,
     ItemListaComprasUpdate,
-    ItemListaComprasResponse
+    ItemListaComprasResponse,
+    LoteOperacoesItens,
+    LoteOperacoesItensResponse
 )
 from app.crud import lista_compras as crud
+from app.crud.alteracao import seq_atual
+from app.etag import etag_fraco, nao_modificado
+from app.paginacao import ler_cursor, definir_proximo_cursor
 
 router = APIRouter(prefix="/listas-compras", tags=["Listas de Compras"])
 
 # Rotas de Listas de Compras
 @router.get("/", response_model=List[ListaComprasResponse])
-def listar_listas_compras(
+async def listar_listas_compras(
+    request: Request,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
     apenas_ativas: bool = Query(False),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    cursor: Optional[str] = Query(None, description="Cursor da próxima página (cabeçalho X-Next-Cursor); substitui skip"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
 ):
-    """Lista todas as listas de compras do usuário"""
-    listas = crud.get_listas_compras(
+    """Lista todas as listas de compras do usuário (ETag: 304 se nenhuma lista, item ou compra mudou)"""
+    cursor_lido = ler_cursor(cursor, datetime)
+    versao = await seq_atual(db, current_user.id)
+    nao_mudou = nao_modificado(request, response, etag_fraco("listas", current_user.id, versao))
+    if nao_mudou is not None:
+        return nao_mudou
+    listas = await crud.get_listas_compras(
         db,
         user_id=current_user.id,
         skip=skip,
         limit=limit,
-        apenas_ativas=apenas_ativas
+        apenas_ativas=apenas_ativas,
+        cursor=cursor_lido
     )
+    definir_proximo_cursor(response, listas, limit, "created_at")
+    return listas
+
+@router.get("/resumos", response_model=List[ListaComprasSummary])
+async def listar_resumos_listas(
+    request: Request,
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=100),
+    apenas_ativas: bool = Query(False),
+    cursor: Optional[str] = Query(None, description="Cursor da próxima página (cabeçalho X-Next-Cursor); substitui skip"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
+):
+    """Resumo (totais, comprados e valor estimado) de todas as listas do usuário, sem os itens"""
+    cursor_lido = ler_cursor(cursor, datetime)
+    versao = await seq_atual(db, current_user.id)
+    nao_mudou = nao_modificado(request, response, etag_fraco("resumos", current_user.id, versao))
+    if nao_mudou is not None:
+        return nao_mudou
+    listas = await crud.get_resumos_listas(
+        db,
+        user_id=current_user.id,
+        skip=skip,
+        limit=limit,
+        apenas_ativas=apenas_ativas,
+        cursor=cursor_lido
+    )
+    definir_proximo_cursor(response, listas, limit, "created_at")
     return listas
 
 @router.get("/{lista_id}", response_model=ListaComprasResponse)
-def obter_lista_compras(
+async def obter_lista_compras(
     lista_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
 ):
-    """Obtém uma lista de compras específica"""
-    lista = crud.get_lista_compras(db, lista_id, current_user.id)
+    """Obtém uma lista de compras específica (ETag: 304 se a lista e seus itens não mudaram)"""
+    versao = await crud.get_versao_lista(db, lista_id, current_user.id)
+    if versao is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Lista de compras não encontrada"
+        )
+    nao_mudou = nao_modificado(request, response, etag_fraco("lista", current_user.id, lista_id, *versao))
+    if nao_mudou is not None:
+        return nao_mudou
+    lista = await crud.get_lista_compras(db, lista_id, current_user.id)
     if not lista:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -52,13 +109,13 @@ def obter_lista_compras(
     return lista
 
 @router.get("/{lista_id}/resumo")
-def obter_resumo_lista(
+async def obter_resumo_lista(
     lista_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
 ):
     """Obtém resumo da lista de compras"""
-    resumo = crud.get_resumo_lista(db, lista_id, current_user.id)
+    resumo = await crud.get_resumo_lista(db, lista_id, current_user.id)
     if not resumo:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -67,23 +124,23 @@ def obter_resumo_lista(
     return resumo
 
 @router.post("/", response_model=ListaComprasResponse, status_code=status.HTTP_201_CREATED)
-def criar_lista_compras(
+async def criar_lista_compras(
     lista: ListaComprasCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
 ):
     """Cria uma nova lista de compras"""
-    return crud.create_lista_compras(db, lista, current_user.id)
+    return await crud.create_lista_compras(db, lista, current_user.id)
 
 @router.put("/{lista_id}", response_model=ListaComprasResponse)
-def atualizar_lista_compras(
+async def atualizar_lista_compras(
     lista_id: int,
     lista_update: ListaComprasUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
 ):
     """Atualiza uma lista de compras"""
-    lista = crud.update_lista_compras(db, lista_id, lista_update, current_user.id)
+    lista = await crud.update_lista_compras(db, lista_id, lista_update, current_user.id)
     if not lista:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -92,13 +149,13 @@ def atualizar_lista_compras(
     return lista
 
 @router.delete("/{lista_id}", status_code=status.HTTP_204_NO_CONTENT)
-def deletar_lista_compras(
+async def deletar_lista_compras(
     lista_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
 ):
     """Deleta uma lista de compras"""
-    if not crud.delete_lista_compras(db, lista_id, current_user.id):
+    if not await crud.delete_lista_compras(db, lista_id, current_user.id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Lista de compras não encontrada"
@@ -107,14 +164,14 @@ def deletar_lista_compras(
 
 # Rotas de Itens da Lista
 @router.post("/{lista_id}/itens", response_model=ItemListaComprasResponse, status_code=status.HTTP_201_CREATED)
-def adicionar_item_lista(
+async def adicionar_item_lista(
     lista_id: int,
     item: ItemListaComprasCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
 ):
     """Adiciona um item à lista de compras"""
-    db_item = crud.create_item_lista(db, item, lista_id, current_user.id)
+    db_item = await crud.create_item_lista(db, item, lista_id, current_user.id)
     if not db_item:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -122,26 +179,70 @@ def adicionar_item_lista(
         )
     return db_item
 
+@router.post("/{lista_id}/itens/lote", response_model=LoteOperacoesItensResponse)
+async def operar_itens_em_lote(
+    lista_id: int,
+    lote: LoteOperacoesItens,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
+):
+    """
+    Cria, atualiza, marca/desmarca e remove vários itens da lista numa só requisição e
+    numa só transação. Cada operação tem seu resultado (na mesma ordem); item de outra
+    lista ou inexistente resulta em "nao_encontrado" sem impedir as demais.
+    """
+    resultado = await crud.aplicar_operacoes_itens(db, lista_id, current_user.id, lote.operacoes)
+    if resultado is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Lista de compras não encontrada"
+        )
+    return resultado
+
+@router.websocket("/{lista_id}/ws")
+async def acompanhar_lista(websocket: WebSocket, lista_id: int):
+    """
+    Alterações nos itens da lista em tempo real, como mensagens JSON: item_criado,
+    item_alterado (só os campos alterados), item_removido, lote e ressincronizar
+    (recarregar a lista). Conexões de outros dispositivos da conta recebem o que
+    qualquer um deles alterar. A primeira mensagem do cliente deve ser {"token": "<jwt>"};
+    a resposta {"tipo": "autenticado"} confirma a inscrição.
+    """
+    await websocket.accept()
+    token = await tempo_real.receber_token(websocket)
+    # Sessão só para autorizar: não fica presa a uma conexão que dura minutos
+    async with AsyncSessionLocal() as db:
+        usuario = await usuario_pelo_token(token, db) if token else None
+        autorizado = (
+            usuario is not None and usuario.is_active
+            and await crud.lista_pertence_ao_usuario(db, lista_id, usuario.id)
+        )
+    if not autorizado:
+        if websocket.client_state == WebSocketState.CONNECTED:
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    
+    await tempo_real.transmitir(websocket, lista_id)
+
 @router.get("/{lista_id}/produtos-sugeridos", response_model=List[dict])
-def listar_produtos_para_lista(
+async def listar_produtos_para_lista(
     lista_id: int,
     search: str = Query(None),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
 ):
     """Lista produtos disponíveis para adicionar à lista"""
     from app.crud import produto as produto_crud
     
     # Verificar se lista pertence ao usuário
-    lista = crud.get_lista_compras(db, lista_id, current_user.id)
-    if not lista:
+    if not await crud.lista_pertence_ao_usuario(db, lista_id, current_user.id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Lista de compras não encontrada"
         )
     
     # Buscar produtos
-    produtos = produto_crud.get_produtos(db, search=search, limit=50)
+    produtos = await produto_crud.get_produtos(db, search=search, limit=50, com_categoria=True)
     
     # Retornar com formato adequado
     return [
@@ -149,21 +250,21 @@ def listar_produtos_para_lista(
             "id": p.id,
             "nome": p.nome,
             "preco": p.preco,
-            "categoria": p.categoria,
+            "categoria": p.categoria.nome if p.categoria else None,
             "quantidade_estoque": p.quantidade_estoque
         }
         for p in produtos
     ]
 
 @router.put("/itens/{item_id}", response_model=ItemListaComprasResponse)
-def atualizar_item_lista(
+async def atualizar_item_lista(
     item_id: int,
     item_update: ItemListaComprasUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
 ):
     """Atualiza um item da lista"""
-    item = crud.update_item_lista(db, item_id, item_update, current_user.id)
+    item = await crud.update_item_lista(db, item_id, item_update, current_user.id)
     if not item:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -172,13 +273,13 @@ def atualizar_item_lista(
     return item
 
 @router.delete("/itens/{item_id}", status_code=status.HTTP_204_NO_CONTENT)
-def deletar_item_lista(
+async def deletar_item_lista(
     item_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
 ):
     """Remove um item da lista"""
-    if not crud.delete_item_lista(db, item_id, current_user.id):
+    if not await crud.delete_item_lista(db, item_id, current_user.id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Item não encontrado"
@@ -186,13 +287,13 @@ def deletar_item_lista(
     return None
 
 @router.patch("/itens/{item_id}/toggle-comprado", response_model=ItemListaComprasResponse)
-def toggle_item_comprado(
+async def toggle_item_comprado(
     item_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
 ):
     """Marca/desmarca um item como comprado"""
-    item = crud.toggle_item_comprado(db, item_id, current_user.id)
+    item = await crud.toggle_item_comprado(db, item_id, current_user.id)
     if not item:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -201,12 +302,12 @@ def toggle_item_comprado(
     return item
 
 @router.post("/{lista_id}/adicionar-produto/{produto_id}", response_model=ItemListaComprasResponse)
-def adicionar_produto_existente(
+async def adicionar_produto_existente(
     lista_id: int,
     produto_id: int,
     quantidade: int = Query(1, ge=1),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
 ):
     """
     Adiciona um produto existente à lista de compras.
@@ -215,43 +316,25 @@ def adicionar_produto_existente(
     from app.crud import produto as produto_crud
     
     # Verificar se lista existe e pertence ao usuário
-    lista = crud.get_lista_compras(db, lista_id, current_user.id)
-    if not lista:
+    if not await crud.lista_pertence_ao_usuario(db, lista_id, current_user.id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Lista de compras não encontrada"
         )
     
     # Buscar produto
-    produto = produto_crud.get_produto(db, produto_id)
+    produto = await produto_crud.get_produto(db, produto_id)
     if not produto:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Produto não encontrado"
         )
     
-    # Verificar se produto já está na lista
-    item_existente = db.query(ItemListaCompras).filter(
-        ItemListaCompras.lista_id == lista_id,
-        ItemListaCompras.produto_id == produto_id
-    ).first()
-    
-    if item_existente:
-        # Atualizar quantidade do item existente
-        item_existente.quantidade += quantidade
-        db.commit()
-        db.refresh(item_existente)
-        return item_existente
-    
-    # Criar novo item da lista vinculado ao produto
-    from app.schemas.lista_compras import ItemListaComprasCreate
-    item_data = ItemListaComprasCreate(
-        nome_item=produto.nome,
-        quantidade=quantidade,
-        preco_estimado=produto.preco,
-        produto_id=produto.id,
-        observacao=produto.descricao if produto.descricao else None
-    )
-    
-    db_item = crud.create_item_lista(db, item_data, lista_id, current_user.id)
+    # Procura o item do produto e incrementa ou cria com a lista travada
+    db_item = await crud.adicionar_produto_lista(db, lista_id, produto, quantidade, current_user.id)
+    if not db_item:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Lista de compras não encontrada"
+        )
     return db_item
@@ -0,0 +1,73 @@
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import PlainTextResponse
+
+from app import consultas_lentas, tempo_real
+from app.auth.auth import UsuarioAutenticado, cache_usuarios, get_current_superuser
+from app.database import async_engine, engine, estado_pool
+from app.metricas import metricas
+
+router = APIRouter(tags=["Saúde"])
+
+
+def _metricas_pool() -> list:
+    linhas = [
+        "# HELP db_pool_conexoes_em_uso Conexões do pool emprestadas no momento",
+        "# TYPE db_pool_conexoes_em_uso gauge",
+    ]
+    for nome, pool in (("sync", engine.pool), ("async", async_engine.pool)):
+        estado = estado_pool(pool)
+        if "checkedout" in estado:
+            linhas.append(f'db_pool_conexoes_em_uso{{engine="{nome}"}} {estado["checkedout"]}')
+    return linhas
+
+
+def _metricas_tempo_real() -> list:
+    return [
+        "# HELP tempo_real_conexoes Conexões WebSocket de listas abertas neste processo",
+        "# TYPE tempo_real_conexoes gauge",
+        f"tempo_real_conexoes {tempo_real.broker.conexoes()}",
+    ]
+
+
+def _metricas_cache_usuarios() -> list:
+    estatisticas = cache_usuarios.estatisticas()
+    return [
+        "# HELP auth_cache_usuarios_hits_total Usuários autenticados encontrados no cache",
+        "# TYPE auth_cache_usuarios_hits_total counter",
+        f"auth_cache_usuarios_hits_total {estatisticas['hits']}",
+        "# HELP auth_cache_usuarios_misses_total Usuários autenticados buscados no banco (ausentes ou expirados no cache)",
+        "# TYPE auth_cache_usuarios_misses_total counter",
+        f"auth_cache_usuarios_misses_total {estatisticas['misses']}",
+        "# HELP auth_cache_usuarios_tamanho Usuários no cache de autenticação deste processo",
+        "# TYPE auth_cache_usuarios_tamanho gauge",
+        f"auth_cache_usuarios_tamanho {estatisticas['tamanho']}",
+    ]
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def exportar_metricas():
+    """
+    Métricas deste processo no formato de exposição do Prometheus (sem autenticação).
+    Só são coerentes com um worker por alvo de coleta: com run_prod.py --workers N > 1
+    cada coleta responde com os contadores de um worker diferente (ver app/metricas.py).
+    """
+    return PlainTextResponse(
+        metricas.exportar(extras=_metricas_pool() + _metricas_tempo_real() + _metricas_cache_usuarios()),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
+@router.get("/metrics/consultas-lentas")
+async def listar_consultas_lentas(
+    limit: int = Query(50, ge=1, le=consultas_lentas.MAX_EM_MEMORIA),
+    current_user: UsuarioAutenticado = Depends(get_current_superuser)
+):
+    """
+    Consultas acima de CONSULTA_LENTA_MS registradas por este processo, com origem e
+    plano de execução (requer superusuário). O histórico completo fica no arquivo
+    CONSULTAS_LENTAS_ARQUIVO.
+    """
+    return {
+        "limite_ms": consultas_lentas.LIMITE_MS,
+        "consultas": consultas_lentas.recentes(limit),
+    }
@@ -1,82 +1,120 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 
-from app.database import get_db
-from app.schemas.produto import ProdutoCreate, ProdutoUpdate, ProdutoResponse
-from app.auth.auth import get_current_active_user
-from app.models import User
+from app.database import get_async_db
+from app.schemas.produto import ProdutoCreate, ProdutoUpdate, ProdutoResponse, ProdutoSugestao
+from app.auth.auth import get_current_active_user, UsuarioAutenticado
 from app.crud import produto as crud
+from app.crud.alteracao import ESCOPO_GLOBAL, numerar_pendentes_globais, seq_atual
+from app.etag import etag_fraco, nao_modificado
+from app.indice_produtos import indice_produtos
+from app.paginacao import ler_cursor, definir_proximo_cursor
 
 router = APIRouter(prefix="/produtos", tags=["Produtos"])
 
 @router.get("/", response_model=List[ProdutoResponse])
-def listar_produtos(
+async def listar_produtos(
+    request: Request,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
     search: Optional[str] = None,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    cursor: Optional[str] = Query(None, description="Cursor da próxima página (cabeçalho X-Next-Cursor); substitui skip"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
 ):
-    """Lista produtos (requer autenticação)"""
-    produtos = crud.get_produtos(db, skip=skip, limit=limit, search=search)
+    """
+    Lista produtos por nome (requer autenticação). Com `search`, ordena por relevância e pagina só por skip.
+    ETag: 304 se nenhum produto mudou.
+    """
+    cursor_lido = None if search else ler_cursor(cursor)
+    await numerar_pendentes_globais(db)
+    versao = await seq_atual(db, ESCOPO_GLOBAL)
+    nao_mudou = nao_modificado(request, response, etag_fraco("produtos", versao))
+    if nao_mudou is not None:
+        return nao_mudou
+    produtos = await crud.get_produtos(db, skip=skip, limit=limit, search=search, cursor=cursor_lido)
+    if not search:
+        definir_proximo_cursor(response, produtos, limit, "nome")
     return produtos
 
 
+@router.get("/autocompletar", response_model=List[ProdutoSugestao])
+async def autocompletar_produtos(
+    q: str = Query(..., min_length=1, description="Início do nome (qualquer palavra) ou do código de barras"),
+    limit: int = Query(10, ge=1, le=50),
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
+):
+    """Sugestões de produtos servidas do índice em memória, sem consultar o banco (requer autenticação)"""
+    if indice_produtos.expirado():
+        # Responde com o índice atual; a recarga (uma por processo) roda em segundo plano
+        indice_produtos.recarregar_em_segundo_plano()
+    return indice_produtos.buscar(q, limite=limit)
+
+
 @router.get("/estoque-baixo", response_model=List[ProdutoResponse])
-def listar_produtos_estoque_baixo(
+async def listar_produtos_estoque_baixo(
     limite: int = Query(5, ge=0, description="Limite padrão quando o produto não tem estoque_minimo definido"),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
 ):
     """Lista produtos com estoque baixo (quantidade <= estoque_minimo ou limite). Útil para notificar ao criar lista de compras."""
-    return crud.get_produtos_estoque_baixo(db, limite_padrao=limite)
+    return await crud.get_produtos_estoque_baixo(db, limite_padrao=limite)
 
 
 @router.get("/{produto_id}", response_model=ProdutoResponse)
-def obter_produto(
+async def obter_produto(
     produto_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
 ):
-    """Obtém um produto específico (requer autenticação)"""
-    produto = crud.get_produto(db, produto_id)
+    """Obtém um produto específico (requer autenticação; ETag: 304 se o produto não mudou)"""
+    versao = await crud.get_versao_produto(db, produto_id)
+    if versao is None:
+        raise HTTPException(status_code=404, detail="Produto não encontrado")
+    nao_mudou = nao_modificado(request, response, etag_fraco("produto", produto_id, *versao))
+    if nao_mudou is not None:
+        return nao_mudou
+    produto = await crud.get_produto(db, produto_id)
     if produto is None:
         raise HTTPException(status_code=404, detail="Produto não encontrado")
     return produto
 
 @router.post("/", response_model=ProdutoResponse, status_code=201)
-def criar_produto(
+async def criar_produto(
     produto: ProdutoCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
 ):
     """Cria um novo produto (requer autenticação)"""
     try:
-        return crud.create_produto(db, produto)
+        return await crud.create_produto(db, produto)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.put("/{produto_id}", response_model=ProdutoResponse)
-def atualizar_produto(
+async def atualizar_produto(
     produto_id: int,
     produto: ProdutoUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
 ):
     """Atualiza um produto (requer autenticação)"""
-    db_produto = crud.update_produto(db, produto_id, produto)
+    db_produto = await crud.update_produto(db, produto_id, produto)
     if db_produto is None:
         raise HTTPException(status_code=404, detail="Produto não encontrado")
     return db_produto
 
 @router.delete("/{produto_id}", status_code=204)
-def deletar_produto(
+async def deletar_produto(
     produto_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
 ):
     """Deleta um produto (requer autenticação)"""
-    if not crud.delete_produto(db, produto_id):
+    if not await crud.delete_produto(db, produto_id):
         raise HTTPException(status_code=404, detail="Produto não encontrado")
     return None
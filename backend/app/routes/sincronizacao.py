@@ -0,0 +1,61 @@
+from typing import Optional, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth.auth import UsuarioAutenticado, get_current_active_user
+from app.crud import alteracao as crud
+from app.database import get_async_db
+from app.schemas.sincronizacao import SincronizacaoResponse
+
+router = APIRouter(prefix="/sync", tags=["Sincronização"])
+
+
+def _formatar_watermark(seq_usuario: int, seq_global: int) -> str:
+    return f"{seq_usuario}.{seq_global}"
+
+
+def _ler_watermark(watermark: str) -> Tuple[int, int]:
+    """"<sequência do usuário>.<sequência global>" (400 se inválido)"""
+    try:
+        seq_usuario, seq_global = (int(parte) for parte in watermark.split("."))
+        if seq_usuario < 0 or seq_global < 0:
+            raise ValueError(watermark)
+        return seq_usuario, seq_global
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Watermark inválido"
+        )
+
+
+@router.get("/", response_model=SincronizacaoResponse)
+async def sincronizar(
+    desde: Optional[str] = Query(None, description="Watermark da sincronização anterior; vazio na primeira"),
+    limite: int = Query(500, ge=1, le=1000, description="Máximo de alterações por escopo (usuário e produtos)"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
+):
+    """
+    Listas, itens, compras e produtos alterados desde `desde`, e os ids removidos.
+
+    Sem `desde` (ou com um watermark à frente do servidor, ex.: banco restaurado) a
+    resposta vem com `recarregar=true` e só o watermark atual: o cliente recarrega tudo
+    pelas rotas de listagem e passa a sincronizar a partir dele. Com `mais=true`, chame
+    de novo com o novo watermark. Ao receber uma lista removida, descarte os itens dela.
+    """
+    # Pendentes deixadas por uma numeração que falhou ficariam invisíveis até a próxima escrita
+    await crud.numerar_pendentes_globais(db)
+    atual = (
+        await crud.seq_atual(db, current_user.id),
+        await crud.seq_atual(db, crud.ESCOPO_GLOBAL)
+    )
+    desde_usuario, desde_global = _ler_watermark(desde) if desde else (None, None)
+    if desde is None or desde_usuario > atual[0] or desde_global > atual[1]:
+        return {"watermark": _formatar_watermark(*atual), "recarregar": True}
+
+    alteracoes = await crud.alteracoes_para_sincronizar(
+        db, current_user.id, desde_usuario, desde_global, limite
+    )
+    watermark = _formatar_watermark(alteracoes.pop("seq_usuario"), alteracoes.pop("seq_global"))
+    return {**alteracoes, "watermark": watermark}
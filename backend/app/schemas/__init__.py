@@ -2,7 +2,8 @@ from app.schemas.produto import (
     ProdutoBase,
     ProdutoCreate,
     ProdutoUpdate,
-    ProdutoResponse
+    ProdutoResponse,
+    ProdutoSugestao
 )
 
 from app.schemas.auth import (
@@ -48,7 +49,7 @@ from app.schemas.categoria import (
 
 __all__ = [
     # Produto
-    "ProdutoBase", "ProdutoCreate", "ProdutoUpdate", "ProdutoResponse",
+    "ProdutoBase", "ProdutoCreate", "ProdutoUpdate", "ProdutoResponse", "ProdutoSugestao",
     # Auth
     "UserBase", "UserCreate", "UserUpdate", "UserResponse",
     "Token", "TokenData", "LoginRequest",
@@ -1,7 +1,10 @@
-from pydantic import BaseModel, Field
-from typing import Optional, List
+from pydantic import BaseModel, Field, ValidationInfo, field_validator
+from typing import Annotated, Literal, Optional, List, Union
 from datetime import datetime
 
+# Máximo de operações aceitas em POST /listas-compras/{id}/itens/lote
+MAX_OPERACOES_LOTE = 500
+
 # Item da Lista de Compras
 class ItemListaComprasBase(BaseModel):
     nome_item: str = Field(..., min_length=1, max_length=255)
@@ -20,6 +23,14 @@ class ItemListaComprasUpdate(BaseModel):
     preco_estimado: Optional[float] = Field(None, ge=0)
     observacao: Optional[str] = None
 
+    @field_validator("nome_item", "quantidade", "comprado")
+    @classmethod
+    def rejeitar_nulo(cls, v, info: ValidationInfo):
+        # Omitir o campo mantém o valor; null explícito não vale para colunas obrigatórias
+        if v is None:
+            raise ValueError(f"{info.field_name} não pode ser nulo")
+        return v
+
 class ItemListaComprasResponse(ItemListaComprasBase):
     id: int
     lista_id: int
@@ -61,7 +72,46 @@ class ListaComprasSummary(BaseModel):
     concluida: bool
     total_itens: int
     itens_comprados: int
+    valor_estimado_total: float
     created_at: datetime
     
     class Config:
         from_attributes = True
+
+# Operações em lote sobre os itens de uma lista
+class OperacaoCriarItem(BaseModel):
+    op: Literal["criar"]
+    item: ItemListaComprasCreate
+
+class OperacaoAtualizarItem(BaseModel):
+    op: Literal["atualizar"]
+    item_id: int
+    dados: ItemListaComprasUpdate
+
+class OperacaoToggleComprado(BaseModel):
+    """Inverte `comprado`; para reenvios seguros, prefira atualizar com comprado explícito"""
+    op: Literal["toggle_comprado"]
+    item_id: int
+
+class OperacaoRemoverItem(BaseModel):
+    op: Literal["remover"]
+    item_id: int
+
+OperacaoItem = Annotated[
+    Union[OperacaoCriarItem, OperacaoAtualizarItem, OperacaoToggleComprado, OperacaoRemoverItem],
+    Field(discriminator="op")
+]
+
+class LoteOperacoesItens(BaseModel):
+    """Operações aplicadas em ordem, numa única transação"""
+    operacoes: List[OperacaoItem] = Field(..., min_length=1, max_length=MAX_OPERACOES_LOTE)
+
+class ResultadoOperacaoItem(BaseModel):
+    indice: int
+    op: str
+    status: Literal["ok", "nao_encontrado"]
+    item: Optional[ItemListaComprasResponse] = None
+
+class LoteOperacoesItensResponse(BaseModel):
+    resultados: List[ResultadoOperacaoItem]
+    lista: ListaComprasSummary
@@ -52,3 +52,9 @@ class ProdutoResponse(ProdutoBase):
 
     class Config:
         from_attributes = True
+
+class ProdutoSugestao(BaseModel):
+    """Sugestão de autocompletar (servida pelo índice em memória)"""
+    id: int
+    nome: str
+    codigo_barras: Optional[str] = None
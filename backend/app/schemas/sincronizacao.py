@@ -0,0 +1,23 @@
+from pydantic import BaseModel
+from typing import List
+
+from app.schemas.compra import CompraResponse
+from app.schemas.lista_compras import ItemListaComprasResponse, ListaComprasSummary
+from app.schemas.produto import ProdutoResponse
+
+class Removidos(BaseModel):
+    """Ids removidos desde o watermark (lápides)"""
+    listas: List[int] = []
+    itens: List[int] = []
+    compras: List[int] = []
+    produtos: List[int] = []
+
+class SincronizacaoResponse(BaseModel):
+    watermark: str
+    recarregar: bool = False
+    mais: bool = False
+    listas: List[ListaComprasSummary] = []
+    itens: List[ItemListaComprasResponse] = []
+    compras: List[CompraResponse] = []
+    produtos: List[ProdutoResponse] = []
+    removidos: Removidos = Removidos()
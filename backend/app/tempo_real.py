@@ -0,0 +1,277 @@
+"""
+Atualizações em tempo real das listas de compras (WebSocket /listas-compras/{id}/ws).
+
+Depois do commit, o CRUD de itens publica diffs pequenos (item_criado, item_alterado,
+item_removido, lote) no broker; cada processo entrega as mensagens de uma lista às
+conexões WebSocket abertas nele para essa lista. Brokers:
+  local     só o próprio processo (desenvolvimento, um único worker)
+  postgres  LISTEN/NOTIFY no canal CANAL; cada worker escuta numa conexão asyncpg
+            dedicada e recebe o que qualquer worker publicar
+O token JWT não vai na URL (ficaria nos logs de acesso): depois de conectar, o cliente
+envia {"token": "<jwt>"} como primeira mensagem, em até TEMPO_REAL_AUTENTICACAO segundos,
+e recebe {"tipo": "autenticado"} antes dos diffs; sem isso a conexão é fechada (1008).
+Mensagens que não chegam ao cliente (fila cheia, payload acima do limite do NOTIFY,
+conexão de escuta perdida) viram {"tipo": "ressincronizar"}: o cliente deve recarregar
+a lista (GET /listas-compras/{id} ou GET /sync).
+Configuração (.env):
+  TEMPO_REAL_BROKER=auto      auto = postgres se o banco for PostgreSQL, senão local
+  TEMPO_REAL_FILA=100         mensagens pendentes por conexão WebSocket
+  TEMPO_REAL_AUTENTICACAO=10  segundos para o cliente enviar o token
+"""
+import asyncio
+import json
+from abc import ABC, abstractmethod
+import os
+from collections import defaultdict
+from typing import Dict, Iterable, Optional, Set
+
+from sqlalchemy.engine import make_url
+from starlette.websockets import WebSocket, WebSocketDisconnect
+
+from app.database import ASYNC_DATABASE_URL
+from app.schemas.lista_compras import ItemListaComprasResponse
+
+BROKER = os.getenv("TEMPO_REAL_BROKER", "auto")
+TAMANHO_FILA = int(os.getenv("TEMPO_REAL_FILA", "100"))
+TEMPO_AUTENTICACAO = float(os.getenv("TEMPO_REAL_AUTENTICACAO", "10"))
+
+CANAL = "listas_compras"
+# O PostgreSQL recusa payloads de NOTIFY a partir de 8000 bytes
+LIMITE_NOTIFY = 7900
+RECONEXAO_MAX = 30
+
+RESSINCRONIZAR = "ressincronizar"
+AUTENTICADO = "autenticado"
+
+
+def _ressincronizar(lista_id: int) -> dict:
+    return {"lista_id": lista_id, "tipo": RESSINCRONIZAR}
+
+
+def _colocar(fila: asyncio.Queue, mensagem: dict):
+    try:
+        fila.put_nowait(mensagem)
+    except asyncio.QueueFull:
+        # Cliente lento: descarta o que acumulou e pede que recarregue a lista
+        while not fila.empty():
+            fila.get_nowait()
+        fila.put_nowait(_ressincronizar(mensagem["lista_id"]))
+
+
+class Broker(ABC):
+    """
+    Inscrições das conexões WebSocket deste processo, por lista, e entrega das mensagens.
+    Cada broker define como publicar para os demais processos e o que abrir/fechar no
+    ciclo de vida da API (iniciar/parar).
+    """
+
+    def __init__(self):
+        self._inscritos: Dict[int, Set[asyncio.Queue]] = defaultdict(set)
+
+    def inscrever(self, lista_id: int) -> asyncio.Queue:
+        fila = asyncio.Queue(maxsize=TAMANHO_FILA)
+        self._inscritos[lista_id].add(fila)
+        return fila
+
+    def cancelar(self, lista_id: int, fila: asyncio.Queue):
+        filas = self._inscritos.get(lista_id)
+        if filas is not None:
+            filas.discard(fila)
+            if not filas:
+                del self._inscritos[lista_id]
+
+    def conexoes(self) -> int:
+        return sum(len(filas) for filas in self._inscritos.values())
+
+    def _entregar(self, mensagem: dict):
+        for fila in list(self._inscritos.get(mensagem["lista_id"], ())):
+            _colocar(fila, mensagem)
+
+    def _ressincronizar_todos(self):
+        for lista_id in list(self._inscritos):
+            self._entregar(_ressincronizar(lista_id))
+
+    @abstractmethod
+    async def iniciar(self):
+        """Chamado na inicialização da API, antes de aceitar conexões"""
+
+    @abstractmethod
+    async def parar(self):
+        """Chamado no desligamento da API"""
+
+    @abstractmethod
+    async def publicar(self, mensagem: dict):
+        """Entrega a mensagem às conexões da lista em todos os processos"""
+
+
+class BrokerLocal(Broker):
+    """Entrega só às conexões deste processo"""
+
+    async def iniciar(self):
+        pass
+
+    async def parar(self):
+        pass
+
+    async def publicar(self, mensagem: dict):
+        self._entregar(mensagem)
+
+
+class BrokerPostgres(Broker):
+    """
+    LISTEN/NOTIFY: publica com pg_notify e escuta o canal numa conexão asyncpg dedicada
+    (fora do pool). Se a conexão cair, reconecta com backoff e pede às conexões deste
+    processo que ressincronizem, pois notificações podem ter sido perdidas.
+    """
+
+    def __init__(self, dsn: str):
+        super().__init__()
+        self.dsn = dsn
+        self._conexao = None
+        self._lock = asyncio.Lock()  # uma operação por vez na conexão asyncpg
+        self._reconectando: Optional[asyncio.Task] = None
+
+    async def _conectar(self):
+        import asyncpg
+
+        conexao = await asyncpg.connect(self.dsn)
+        await conexao.add_listener(CANAL, self._ao_notificar)
+        conexao.add_termination_listener(self._ao_perder_conexao)
+        self._conexao = conexao
+
+    def _ao_notificar(self, conexao, pid, canal, payload: str):
+        self._entregar(json.loads(payload))
+
+    def _ao_perder_conexao(self, conexao):
+        self._conexao = None
+        if self._reconectando is None or self._reconectando.done():
+            self._reconectando = asyncio.create_task(self._reconectar())
+
+    async def _reconectar(self):
+        espera = 1
+        while True:
+            try:
+                await self._conectar()
+            except Exception as e:
+                print(f"[TEMPO REAL] Falha ao conectar ao PostgreSQL (nova tentativa em {espera}s): {e}")
+                await asyncio.sleep(espera)
+                espera = min(espera * 2, RECONEXAO_MAX)
+                continue
+            self._ressincronizar_todos()
+            return
+
+    async def iniciar(self):
+        try:
+            await self._conectar()
+        except Exception as e:
+            # A API sobe mesmo assim; as conexões WebSocket ficam só com o que este processo publicar
+            print(f"[TEMPO REAL] LISTEN indisponível: {e}")
+            self._reconectando = asyncio.create_task(self._reconectar())
+
+    async def parar(self):
+        if self._reconectando is not None:
+            self._reconectando.cancel()
+        conexao, self._conexao = self._conexao, None
+        if conexao is not None:
+            conexao.remove_termination_listener(self._ao_perder_conexao)
+            await conexao.close()
+
+    async def publicar(self, mensagem: dict):
+        payload = json.dumps(mensagem, separators=(",", ":"))
+        if len(payload.encode()) > LIMITE_NOTIFY:
+            payload = json.dumps(_ressincronizar(mensagem["lista_id"]))
+        conexao = self._conexao
+        if conexao is None:
+            # Sem LISTEN: ao menos as conexões deste processo recebem a mensagem
+            self._entregar(json.loads(payload))
+            return
+        async with self._lock:
+            await conexao.execute("SELECT pg_notify($1, $2)", CANAL, payload)
+
+
+def criar_broker(tipo: str = BROKER, url: str = ASYNC_DATABASE_URL) -> Broker:
+    url = make_url(url)
+    if tipo == "auto":
+        tipo = "postgres" if url.get_backend_name() == "postgresql" else "local"
+    if tipo == "local":
+        return BrokerLocal()
+    if tipo == "postgres":
+        return BrokerPostgres(url.set(drivername="postgresql").render_as_string(hide_password=False))
+    raise ValueError(f"TEMPO_REAL_BROKER inválido: {tipo} (use auto, local ou postgres)")
+
+
+broker = criar_broker()
+
+
+# Mensagens (diffs) publicadas pelo CRUD de itens
+def item_criado(item) -> dict:
+    dados = ItemListaComprasResponse.model_validate(item).model_dump(mode="json")
+    return {"lista_id": dados["lista_id"], "tipo": "item_criado", "item": dados}
+
+
+def item_alterado(lista_id: int, item_id: int, campos: dict) -> dict:
+    return {"lista_id": lista_id, "tipo": "item_alterado", "item_id": item_id, "campos": campos}
+
+
+def item_removido(lista_id: int, item_id: int) -> dict:
+    return {"lista_id": lista_id, "tipo": "item_removido", "item_id": item_id}
+
+
+def lote(lista_id: int, alteracoes: Iterable[dict]) -> dict:
+    """Diffs de um POST .../itens/lote numa única mensagem, na ordem em que foram aplicados"""
+    return {"lista_id": lista_id, "tipo": "lote", "alteracoes": list(alteracoes)}
+
+
+async def publicar(mensagem: dict):
+    """Publica depois do commit; uma falha no broker não falha a requisição que alterou a lista"""
+    try:
+        await broker.publicar(mensagem)
+    except Exception as e:
+        print(f"[TEMPO REAL] Erro ao publicar na lista {mensagem['lista_id']}: {e}")
+
+
+async def receber_token(websocket: WebSocket) -> Optional[str]:
+    """
+    Token da primeira mensagem do WebSocket (já aceito), {"token": "<jwt>"}. None se o
+    cliente não enviar a tempo, enviar outra coisa ou desconectar.
+    """
+    try:
+        mensagem = await asyncio.wait_for(websocket.receive(), TEMPO_AUTENTICACAO)
+    except asyncio.TimeoutError:
+        return None
+    if mensagem["type"] != "websocket.receive" or not mensagem.get("text"):
+        return None
+    try:
+        token = json.loads(mensagem["text"]).get("token")
+    except (ValueError, AttributeError):
+        return None
+    return token if isinstance(token, str) and token else None
+
+
+async def transmitir(websocket: WebSocket, lista_id: int):
+    """
+    Envia ao WebSocket (já aceito e autenticado) as mensagens da lista até o cliente desconectar.
+    O que o cliente enviar é ignorado; a leitura só serve para perceber o fechamento.
+    """
+    fila = broker.inscrever(lista_id)
+    await websocket.send_json({"lista_id": lista_id, "tipo": AUTENTICADO})
+
+    async def enviar():
+        while True:
+            await websocket.send_json(await fila.get())
+
+    async def receber():
+        while True:
+            if (await websocket.receive())["type"] == "websocket.disconnect":
+                return
+
+    tarefas = [asyncio.create_task(enviar()), asyncio.create_task(receber())]
+    try:
+        await asyncio.wait(tarefas, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        broker.cancelar(lista_id, fila)
+        for tarefa in tarefas:
+            tarefa.cancel()
+        for resultado in await asyncio.gather(*tarefas, return_exceptions=True):
+            if isinstance(resultado, Exception) and not isinstance(resultado, WebSocketDisconnect):
+                print(f"[TEMPO REAL] Conexão da lista {lista_id} encerrada com erro: {resultado}")
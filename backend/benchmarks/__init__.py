@@ -0,0 +1,14 @@
+"""
+Benchmark HTTP de ponta a ponta da API.
+
+Usuários virtuais percorrem jornadas realistas com httpx assíncrono (login, busca de
+produtos, montagem de lista, marcar itens, finalizar em compra, estatísticas) contra a
+API rodando em um subprocesso (run_prod.py, padrão), no mesmo processo (ASGI) ou em
+uma URL já no ar. Vazão e latências (p50/p90/p99) por endpoint vão para um JSON, que
+pode ser comparado com uma linha de base para acusar regressões.
+
+Na raiz do backend, com uma base populada por scripts/seed_load.py:
+  python -m benchmarks executar --database-url sqlite:////tmp/carga.db --saida base.json
+  python -m benchmarks executar --database-url sqlite:////tmp/carga.db --baseline base.json --saida atual.json
+  python -m benchmarks comparar base.json atual.json --tolerancia 0.10
+"""
@@ -0,0 +1,69 @@
+import argparse
+import asyncio
+import sys
+
+from benchmarks import __doc__ as DESCRICAO
+from benchmarks import relatorio
+from benchmarks.cenarios import CENARIOS
+from benchmarks.executor import executar
+
+
+def _mix(texto: str) -> dict:
+    """"comprador=3,navegacao=7" -> {"comprador": 3.0, "navegacao": 7.0}"""
+    mix = {}
+    for parte in texto.split(","):
+        nome, _, peso = parte.partition("=")
+        nome = nome.strip()
+        if nome not in CENARIOS:
+            raise argparse.ArgumentTypeError(f"cenário desconhecido: {nome} (disponíveis: {', '.join(CENARIOS)})")
+        mix[nome] = float(peso or 1)
+    return mix
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=DESCRICAO,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    exe = sub.add_parser("executar", help="roda o benchmark e grava o resultado em JSON")
+    exe.add_argument("--modo", choices=["subprocesso", "processo"], default="subprocesso",
+                     help="API em um subprocesso (run_prod.py) ou no mesmo processo (ASGI)")
+    exe.add_argument("--url", help="usa uma API já no ar em vez de subir uma")
+    exe.add_argument("--database-url", help="banco da API (ex.: base de scripts/seed_load.py)")
+    exe.add_argument("--workers", type=int, default=1, help="workers do run_prod.py no modo subprocesso")
+    exe.add_argument("--usuarios-virtuais", type=int, default=20)
+    exe.add_argument("--duracao", type=float, default=30, help="segundos medidos")
+    exe.add_argument("--aquecimento", type=float, default=5, help="segundos iniciais descartados")
+    exe.add_argument("--mix", type=_mix, default=_mix("comprador=3,navegacao=7"), help="pesos das jornadas")
+    exe.add_argument("--pausa", type=float, default=0, help="pausa média entre jornadas (ms)")
+    exe.add_argument("--contas-carga", action="store_true",
+                     help="loga com os usuários carga<ID> da base (históricos grandes) em vez de bench_vu<N>")
+    exe.add_argument("--seed", type=int, default=1)
+    exe.add_argument("--saida", default="benchmark.json", help="arquivo JSON do resultado")
+    exe.add_argument("--baseline", help="JSON de uma execução anterior para comparar")
+    exe.add_argument("--tolerancia", type=float, default=0.10)
+
+    cmp_ = sub.add_parser("comparar", help="compara dois resultados; código de saída 1 se houver regressão")
+    cmp_.add_argument("base")
+    cmp_.add_argument("atual")
+    cmp_.add_argument("--tolerancia", type=float, default=0.10, help="variação aceita (0.10 = 10%%)")
+    cmp_.add_argument("--min-amostras", type=int, default=50)
+
+    args = parser.parse_args(argv)
+    if args.comando == "comparar":
+        regressoes = relatorio.comparar(
+            relatorio.carregar(args.base), relatorio.carregar(args.atual), args.tolerancia, args.min_amostras
+        )
+        return 1 if regressoes else 0
+
+    resultado = asyncio.run(executar(args))
+    relatorio.imprimir(resultado)
+    relatorio.salvar(resultado, args.saida)
+    print(f"Resultado gravado em {args.saida}")
+    if args.baseline:
+        return 1 if relatorio.comparar(relatorio.carregar(args.baseline), resultado, args.tolerancia) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
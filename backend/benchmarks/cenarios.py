@@ -0,0 +1,170 @@
+"""
+Jornadas dos usuários virtuais.
+
+Cada requisição é medida com um rótulo estável "MÉTODO /rota/{parametro}", para que
+resultados de execuções diferentes (IDs diferentes) sejam comparáveis endpoint a endpoint.
+"""
+import asyncio
+import random
+import time
+from collections import Counter, defaultdict
+
+import httpx
+
+TERMOS_BUSCA = ["fralda", "pampers", "leite", "body", "shampoo", "lenço", "mamadeira", "pomada", "huggies"]
+PREFIXOS = ["fr", "pam", "le", "bo", "sha", "ma", "hu", "len", "po"]
+ITENS_AVULSOS = ["Pão", "Frutas", "Café", "Pilhas"]
+# Fração das jornadas que começa com um novo login (app reaberto)
+CHANCE_RELOGIN = 0.1
+
+
+class FalhaJornada(Exception):
+    """Resposta inesperada que impede a jornada de continuar"""
+
+
+class Coletor:
+    """Latências e status por rótulo; ignora o que começou antes do fim do aquecimento"""
+
+    def __init__(self, inicio_medicao: float):
+        self.inicio_medicao = inicio_medicao
+        self.ultima_resposta = inicio_medicao
+        self.latencias = defaultdict(list)
+        self.status = defaultdict(Counter)
+        self.jornadas = Counter()
+        self.jornadas_falhas = Counter()
+
+    def registrar(self, rotulo: str, inicio: float, status):
+        if inicio < self.inicio_medicao:
+            return
+        agora = time.perf_counter()
+        self.latencias[rotulo].append(agora - inicio)
+        self.status[rotulo][status] += 1
+        self.ultima_resposta = max(self.ultima_resposta, agora)
+
+    def jornada(self, nome: str, inicio: float, ok: bool):
+        if inicio >= self.inicio_medicao:
+            (self.jornadas if ok else self.jornadas_falhas)[nome] += 1
+
+
+class Sessao:
+    """Usuário virtual: cliente compartilhado, token próprio e gerador aleatório próprio"""
+
+    def __init__(self, cliente: httpx.AsyncClient, coletor: Coletor, rnd: random.Random):
+        self.cliente = cliente
+        self.coletor = coletor
+        self.rnd = rnd
+        self.headers = {}
+        self.credenciais = None
+
+    async def req(self, metodo: str, rota: str, url: str, esperado=(200, 201, 204), **kwargs) -> httpx.Response:
+        inicio = time.perf_counter()
+        rotulo = f"{metodo} {rota}"
+        try:
+            resposta = await self.cliente.request(metodo, url, headers=self.headers, **kwargs)
+        except httpx.HTTPError as e:
+            self.coletor.registrar(rotulo, inicio, type(e).__name__)
+            raise FalhaJornada(f"{rotulo}: {type(e).__name__}") from e
+        self.coletor.registrar(rotulo, inicio, resposta.status_code)
+        if resposta.status_code not in esperado:
+            raise FalhaJornada(f"{rotulo}: HTTP {resposta.status_code}")
+        return resposta
+
+    async def login(self, username: str, senha: str, tentativas: int = 5):
+        """503 = pool de bcrypt cheio (rajada de logins): tenta de novo com espera crescente"""
+        self.credenciais = (username, senha)
+        for tentativa in range(tentativas):
+            resposta = await self.req(
+                "POST", "/auth/login", "/auth/login", esperado=(200, 503),
+                json={"username": username, "password": senha},
+            )
+            if resposta.status_code == 200:
+                self.headers = {"Authorization": f"Bearer {resposta.json()['access_token']}"}
+                return
+            await asyncio.sleep(0.5 * (tentativa + 1))
+        raise FalhaJornada("POST /auth/login: HTTP 503")
+
+
+async def garantir_conta(cliente: httpx.AsyncClient, username: str, senha: str):
+    """Cria a conta do usuário virtual se ainda não existir (fora da medição)"""
+    await cliente.post("/auth/register", json={
+        "email": f"{username}@exemplo.com", "username": username, "password": senha, "full_name": username,
+    })
+
+
+async def navegar(sessao: Sessao) -> list:
+    """Lista e busca produtos, autocompleta e abre uma categoria; retorna produtos vistos"""
+    rnd = sessao.rnd
+    if rnd.random() < CHANCE_RELOGIN:
+        await sessao.login(*sessao.credenciais)
+    produtos = (await sessao.req("GET", "/produtos/", "/produtos/?limit=20")).json()
+    termo = rnd.choice(TERMOS_BUSCA)
+    produtos += (await sessao.req("GET", "/produtos/?search=", "/produtos/", params={"search": termo, "limit": 20})).json()
+    await sessao.req("GET", "/produtos/autocompletar", "/produtos/autocompletar", params={"q": rnd.choice(PREFIXOS)})
+    categorias = (await sessao.req("GET", "/categorias/", "/categorias/")).json()
+    if categorias:
+        categoria = rnd.choice(categorias)
+        produtos += (await sessao.req(
+            "GET", "/categorias/{id}/produtos", f"/categorias/{categoria['id']}/produtos?limit=20"
+        )).json()
+    return produtos
+
+
+async def jornada_comprador(sessao: Sessao):
+    """Navega, monta uma lista, marca itens, finaliza em compra e consulta o histórico"""
+    rnd = sessao.rnd
+    produtos = await navegar(sessao)
+
+    lista = (await sessao.req("POST", "/listas-compras/", "/listas-compras/", json={"nome": "Compras da semana"})).json()
+    lista_id = lista["id"]
+    escolhidos = rnd.sample(produtos, k=min(len(produtos), rnd.randint(4, 10)))
+    itens = []
+    for produto in escolhidos:
+        itens.append((await sessao.req(
+            "POST", "/listas-compras/{id}/itens", f"/listas-compras/{lista_id}/itens",
+            json={"nome_item": produto["nome"], "quantidade": rnd.choice([1, 1, 2, 3]),
+                  "produto_id": produto["id"], "preco_estimado": produto["preco"]},
+        )).json())
+    itens.append((await sessao.req(
+        "POST", "/listas-compras/{id}/itens", f"/listas-compras/{lista_id}/itens",
+        json={"nome_item": rnd.choice(ITENS_AVULSOS), "quantidade": 1},
+    )).json())
+
+    await sessao.req("GET", "/listas-compras/{id}", f"/listas-compras/{lista_id}")
+    for item in itens:
+        if rnd.random() < 0.8:
+            await sessao.req(
+                "PATCH", "/listas-compras/itens/{id}/toggle-comprado",
+                f"/listas-compras/itens/{item['id']}/toggle-comprado",
+            )
+    await sessao.req("GET", "/listas-compras/{id}/resumo", f"/listas-compras/{lista_id}/resumo")
+
+    # 404 quando nenhum item foi marcado: a lista fica aberta, como na vida real
+    compra = await sessao.req(
+        "POST", "/compras/finalizar-lista/{id}", f"/compras/finalizar-lista/{lista_id}",
+        esperado=(200, 404), json={"local_compra": "Supermercado"},
+    )
+    await sessao.req("GET", "/compras/", "/compras/?limit=20")
+    if compra.status_code == 200:
+        await sessao.req("GET", "/compras/{id}", f"/compras/{compra.json()['id']}")
+    await sessao.req("GET", "/compras/estatisticas", "/compras/estatisticas")
+
+
+async def jornada_navegacao(sessao: Sessao):
+    """Só leitura: navega pelos produtos e consulta listas, compras e estatísticas"""
+    await navegar(sessao)
+    listas = (await sessao.req("GET", "/listas-compras/", "/listas-compras/?limit=20")).json()
+    if listas:
+        await sessao.req("GET", "/listas-compras/{id}", f"/listas-compras/{sessao.rnd.choice(listas)['id']}")
+    await sessao.req("GET", "/compras/", "/compras/?limit=20")
+    await sessao.req("GET", "/compras/estatisticas", "/compras/estatisticas")
+
+
+CENARIOS = {
+    "comprador": jornada_comprador,
+    "navegacao": jornada_navegacao,
+}
+
+
+def sortear_cenario(rnd: random.Random, mix: dict) -> str:
+    nomes = list(mix)
+    return rnd.choices(nomes, weights=[mix[n] for n in nomes])[0]
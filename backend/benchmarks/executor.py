@@ -0,0 +1,121 @@
+"""Execução do benchmark: sobe a API, cria/loga os usuários virtuais e roda as jornadas."""
+import asyncio
+import os
+import platform
+import random
+import subprocess
+import time
+from datetime import datetime, timezone
+
+import httpx
+
+from benchmarks import relatorio, servidor
+from benchmarks.cenarios import CENARIOS, Coletor, FalhaJornada, Sessao, garantir_conta, sortear_cenario
+
+SENHA_VIRTUAL = "bench123"
+SENHA_CARGA = "carga123"  # usuários gerados por scripts/seed_load.py
+
+
+def contas_carga(database_url: str, quantidade: int) -> list:
+    """Usuários carga<ID> mais ativos da base populada por seed_load.py"""
+    from sqlalchemy import create_engine, text
+
+    engine = create_engine(database_url)
+    try:
+        with engine.connect() as conn:
+            nomes = conn.execute(text(
+                "SELECT u.username FROM users u JOIN compras c ON c.user_id = u.id "
+                "WHERE u.username LIKE 'carga%' GROUP BY u.id, u.username "
+                "ORDER BY count(*) DESC LIMIT :n"
+            ), {"n": quantidade}).scalars().all()
+    finally:
+        engine.dispose()
+    if not nomes:
+        raise SystemExit("Nenhum usuário carga<ID> com compras; rode scripts/seed_load.py antes")
+    return [(nome, SENHA_CARGA) for nome in nomes]
+
+
+def _versao_codigo() -> str:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=servidor.RAIZ, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        alterado = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], cwd=servidor.RAIZ, capture_output=True, text=True
+        ).stdout.strip()
+        return commit + ("+alterações" if alterado else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "desconhecida"
+
+
+def _servidor(args):
+    if args.url:
+        return servidor.externo(args.url)
+    if args.modo == "processo":
+        return servidor.em_processo(args.database_url)
+    return servidor.em_subprocesso(args.database_url, workers=args.workers)
+
+
+async def executar(args) -> dict:
+    mix = args.mix
+    if args.contas_carga:
+        if not args.database_url:
+            raise SystemExit("--contas-carga precisa de --database-url")
+        contas = contas_carga(args.database_url, args.usuarios_virtuais)
+    else:
+        contas = [(f"bench_vu{i}", SENHA_VIRTUAL) for i in range(args.usuarios_virtuais)]
+
+    async with _servidor(args) as (url, transporte):
+        limites = httpx.Limits(max_connections=args.usuarios_virtuais)
+        async with httpx.AsyncClient(base_url=url, transport=transporte, timeout=60, limits=limites) as cliente:
+            if not args.contas_carga:
+                for username, senha in contas:
+                    await garantir_conta(cliente, username, senha)
+
+            inicio = time.perf_counter()
+            coletor = Coletor(inicio_medicao=inicio + args.aquecimento)
+            fim = coletor.inicio_medicao + args.duracao
+
+            async def usuario_virtual(indice: int):
+                username, senha = contas[indice % len(contas)]
+                sessao = Sessao(cliente, coletor, random.Random(args.seed * 1000 + indice))
+                try:
+                    await sessao.login(username, senha)
+                except FalhaJornada as e:
+                    print(f"  usuário virtual {indice} ({username}) não logou: {e}")
+                    return
+                while time.perf_counter() < fim:
+                    nome = sortear_cenario(sessao.rnd, mix)
+                    comeco = time.perf_counter()
+                    try:
+                        await CENARIOS[nome](sessao)
+                        coletor.jornada(nome, comeco, ok=True)
+                    except FalhaJornada:
+                        coletor.jornada(nome, comeco, ok=False)
+                    if args.pausa:
+                        await asyncio.sleep(sessao.rnd.uniform(0, 2 * args.pausa / 1000))
+
+            print(
+                f"Benchmark em {url} ({args.modo if not args.url else 'externo'}): {args.usuarios_virtuais} "
+                f"usuários virtuais, {args.aquecimento}s de aquecimento + {args.duracao}s, mix {mix}"
+            )
+            await asyncio.gather(*(usuario_virtual(i) for i in range(args.usuarios_virtuais)))
+
+    segundos = max(coletor.ultima_resposta - coletor.inicio_medicao, 1e-9)
+    meta = {
+        "data": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "codigo": _versao_codigo(),
+        "modo": "externo" if args.url else args.modo,
+        "workers": None if args.url or args.modo == "processo" else args.workers,
+        "banco": args.database_url.split(":", 1)[0] if args.database_url else os.getenv("DATABASE_URL", "").split(":", 1)[0],
+        "usuarios_virtuais": args.usuarios_virtuais,
+        "contas_carga": args.contas_carga,
+        "duracao": args.duracao,
+        "aquecimento": args.aquecimento,
+        "mix": mix,
+        "pausa_ms": args.pausa,
+        "seed": args.seed,
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+    }
+    return relatorio.resumir(coletor, segundos, meta)
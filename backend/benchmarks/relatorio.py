@@ -0,0 +1,115 @@
+"""Resumo, gravação e comparação de resultados do benchmark."""
+import json
+import statistics
+
+# (métrica, maior é pior?) usadas na comparação por endpoint
+METRICAS_COMPARADAS = [("p50_ms", True), ("p99_ms", True), ("req_s", False)]
+
+
+def _percentil(ordenadas: list, q: float) -> float:
+    return ordenadas[min(len(ordenadas) - 1, int(q * len(ordenadas)))]
+
+
+def _falhou(status) -> bool:
+    return not isinstance(status, int) or status >= 500
+
+
+def resumir(coletor, segundos: float, meta: dict) -> dict:
+    endpoints = {}
+    for rotulo in sorted(coletor.latencias):
+        ordenadas = sorted(coletor.latencias[rotulo])
+        status = coletor.status[rotulo]
+        endpoints[rotulo] = {
+            "requisicoes": len(ordenadas),
+            "req_s": round(len(ordenadas) / segundos, 2),
+            "p50_ms": round(_percentil(ordenadas, 0.50) * 1000, 2),
+            "p90_ms": round(_percentil(ordenadas, 0.90) * 1000, 2),
+            "p99_ms": round(_percentil(ordenadas, 0.99) * 1000, 2),
+            "max_ms": round(ordenadas[-1] * 1000, 2),
+            "media_ms": round(statistics.mean(ordenadas) * 1000, 2),
+            "falhas": sum(n for s, n in status.items() if _falhou(s)),
+            "status": {str(s): n for s, n in sorted(status.items(), key=str)},
+        }
+
+    todas = sorted(l for amostras in coletor.latencias.values() for l in amostras)
+    total = {
+        "segundos": round(segundos, 2),
+        "requisicoes": len(todas),
+        "req_s": round(len(todas) / segundos, 2) if todas else 0,
+        "p50_ms": round(_percentil(todas, 0.50) * 1000, 2) if todas else None,
+        "p99_ms": round(_percentil(todas, 0.99) * 1000, 2) if todas else None,
+        "falhas": sum(e["falhas"] for e in endpoints.values()),
+        "jornadas": dict(coletor.jornadas),
+        "jornadas_falhas": dict(coletor.jornadas_falhas),
+        "jornadas_s": round(sum(coletor.jornadas.values()) / segundos, 2),
+    }
+    return {"meta": meta, "total": total, "endpoints": endpoints}
+
+
+def imprimir(resultado: dict):
+    total = resultado["total"]
+    print(
+        f"{total['requisicoes']} requisições em {total['segundos']}s: {total['req_s']} req/s, "
+        f"{total['jornadas_s']} jornadas/s, p50={total['p50_ms']}ms p99={total['p99_ms']}ms, "
+        f"falhas={total['falhas']} jornadas={total['jornadas']} interrompidas={total['jornadas_falhas']}"
+    )
+    print(f"  {'endpoint':<48} {'n':>6} {'req/s':>8} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8}")
+    for rotulo, e in resultado["endpoints"].items():
+        print(
+            f"  {rotulo:<48} {e['requisicoes']:>6} {e['req_s']:>8.1f} {e['p50_ms']:>8.1f} "
+            f"{e['p90_ms']:>8.1f} {e['p99_ms']:>8.1f} {e['max_ms']:>8.1f}"
+            + (f"  falhas={e['falhas']}" if e["falhas"] else "")
+        )
+
+
+def salvar(resultado: dict, caminho: str):
+    with open(caminho, "w", encoding="utf-8") as arquivo:
+        json.dump(resultado, arquivo, ensure_ascii=False, indent=2)
+
+
+def carregar(caminho: str) -> dict:
+    with open(caminho, encoding="utf-8") as arquivo:
+        return json.load(arquivo)
+
+
+def _variacao(base: float, atual: float) -> float:
+    return (atual - base) / base if base else 0.0
+
+
+def comparar(base: dict, atual: dict, tolerancia: float = 0.10, min_amostras: int = 50) -> list:
+    """
+    Imprime a variação por endpoint e retorna as regressões: latência (p50/p99) que
+    subiu ou vazão que caiu mais que a tolerância, ou falhas que passaram a ocorrer.
+    Endpoints com menos de min_amostras requisições em alguma das execuções são
+    mostrados mas não acusados (p99 de poucas amostras é ruído).
+    """
+    regressoes = []
+    linhas = [("total", base["total"], atual["total"])]
+    linhas += [
+        (rotulo, base["endpoints"][rotulo], atual["endpoints"][rotulo])
+        for rotulo in atual["endpoints"] if rotulo in base["endpoints"]
+    ]
+    print(f"  {'endpoint':<48} {'p50':>16} {'p99':>16} {'req/s':>16}")
+    for rotulo, b, a in linhas:
+        poucas = min(b["requisicoes"], a["requisicoes"]) < min_amostras
+        colunas = []
+        for metrica, maior_pior in METRICAS_COMPARADAS:
+            variacao = _variacao(b[metrica] or 0, a[metrica] or 0)
+            piorou = variacao > tolerancia if maior_pior else variacao < -tolerancia
+            if piorou and not poucas:
+                regressoes.append(f"{rotulo}: {metrica} {b[metrica]} -> {a[metrica]} ({variacao:+.0%})")
+            colunas.append(f"{variacao:+7.1%}{' !' if piorou and not poucas else '  '}")
+        if a["falhas"] > b["falhas"] and not poucas:
+            regressoes.append(f"{rotulo}: falhas {b['falhas']} -> {a['falhas']}")
+        print(f"  {rotulo:<48} " + " ".join(f"{c:>16}" for c in colunas) + ("  (poucas amostras)" if poucas else ""))
+
+    novos = sorted(set(atual["endpoints"]) - set(base["endpoints"]))
+    if novos:
+        print(f"  sem linha de base: {', '.join(novos)}")
+    if regressoes:
+        print(f"{len(regressoes)} regressão(ões) acima de {tolerancia:.0%}:")
+        for regressao in regressoes:
+            print(f"  - {regressao}")
+    else:
+        print(f"Sem regressões acima de {tolerancia:.0%}.")
+    return regressoes
@@ -0,0 +1,86 @@
+"""Formas de subir a API para o benchmark: subprocesso, no mesmo processo ou URL externa."""
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+from contextlib import asynccontextmanager
+
+import httpx
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def porta_livre() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _ambiente(database_url):
+    ambiente = dict(os.environ)
+    if database_url:
+        ambiente["DATABASE_URL"] = database_url
+        # A URL assíncrona passa a ser derivada da DATABASE_URL do benchmark
+        ambiente.pop("ASYNC_DATABASE_URL", None)
+    return ambiente
+
+
+async def _aguardar(url: str, processo: subprocess.Popen, limite: float = 60):
+    fim = time.monotonic() + limite
+    async with httpx.AsyncClient(base_url=url, timeout=2) as cliente:
+        while time.monotonic() < fim:
+            if processo.poll() is not None:
+                raise RuntimeError(f"A API encerrou ao iniciar (código {processo.returncode})")
+            try:
+                if (await cliente.get("/health/db")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"A API não respondeu em {limite:.0f}s")
+
+
+@asynccontextmanager
+async def em_subprocesso(database_url=None, workers: int = 1, porta: int = None):
+    """run_prod.py em 127.0.0.1; produz (url, transporte=None)"""
+    porta = porta or porta_livre()
+    comando = [
+        sys.executable, "run_prod.py", "--host", "127.0.0.1", "--port", str(porta),
+        "--workers", str(workers), "--log-level", "warning",
+    ]
+    processo = subprocess.Popen(comando, cwd=RAIZ, env=_ambiente(database_url))
+    try:
+        url = f"http://127.0.0.1:{porta}"
+        await _aguardar(url, processo)
+        yield url, None
+    finally:
+        processo.terminate()
+        try:
+            processo.wait(timeout=45)
+        except subprocess.TimeoutExpired:
+            processo.kill()
+
+
+@asynccontextmanager
+async def em_processo(database_url=None):
+    """
+    app.main:app no mesmo event loop do cliente, via ASGITransport (sem rede).
+    Mede o custo do app em si; cliente e servidor disputam a mesma CPU.
+    """
+    if database_url:
+        # Precisa valer antes do primeiro import de app.database
+        os.environ["DATABASE_URL"] = database_url
+        os.environ.pop("ASYNC_DATABASE_URL", None)
+    if RAIZ not in sys.path:
+        sys.path.insert(0, RAIZ)
+    from app.main import app
+
+    async with app.router.lifespan_context(app):
+        yield "http://benchmark", httpx.ASGITransport(app=app)
+
+
+@asynccontextmanager
+async def externo(url: str):
+    yield url.rstrip("/"), None
@@ -1,10 +1,17 @@
 #!/usr/bin/env python
 """
-Script para executar o servidor
+Script para executar o servidor (desenvolvimento): aplica as migrações pendentes e
+sobe o uvicorn com reload
 """
 import uvicorn
 
+from app.database import engine
+from app.migracoes import migrar
+
 if __name__ == "__main__":
+    for descricao in migrar(engine):
+        print(f"Aplicada: {descricao}")
+    engine.dispose()
     uvicorn.run(
         "app.main:app",
         host="0.0.0.0",
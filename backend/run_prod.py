@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+"""
+Servidor de produção: N workers uvicorn (uvloop + httptools) em processos filhos.
+
+- O app é importado no processo pai antes do fork, então cada worker nasce com os
+  módulos já carregados (o import de app.main não abre conexões com o banco).
+- O pai abre o socket (com backlog configurável) e os workers aceitam conexões nele.
+- SIGTERM/SIGINT: o pai repassa o sinal aos workers, que param de aceitar conexões,
+  terminam as requisições em andamento (até --graceful segundos) e executam o
+  shutdown do lifespan. Workers que morrerem fora do encerramento são recriados.
+
+Aplique as migrações antes (python scripts/migrar.py). Na raiz do backend:
+  python run_prod.py --workers 4 --port 8000
+Todas as opções também podem vir do ambiente (WEB_WORKERS, WEB_PORT, ...).
+"""
+import argparse
+import os
+import signal
+import socket
+import sys
+import time
+import traceback
+
+import uvicorn
+
+# Código de saída do worker quando o startup do app falha (ex.: banco inacessível);
+# o pai encerra em vez de recriar workers em loop
+FALHA_AO_INICIAR = 3
+
+
+def _env(nome: str, padrao):
+    return type(padrao)(os.getenv(nome, padrao))
+
+
+def criar_socket(host: str, port: int, backlog: int) -> socket.socket:
+    familia = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(familia, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _encerrar_com_o_pai():
+    """No Linux, o worker recebe SIGTERM se o processo pai morrer (ex.: SIGKILL no pai)"""
+    if sys.platform.startswith("linux"):
+        try:
+            import ctypes
+            PR_SET_PDEATHSIG = 1
+            ctypes.CDLL(None).prctl(PR_SET_PDEATHSIG, signal.SIGTERM)
+        except (AttributeError, OSError):
+            pass
+
+
+def executar_worker(app, sock: socket.socket, args):
+    _encerrar_com_o_pai()
+    # O uvicorn instala os próprios handlers de SIGTERM/SIGINT (encerramento gracioso)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    config = uvicorn.Config(
+        app,
+        loop="uvloop",
+        http="httptools",
+        lifespan="on",
+        timeout_keep_alive=args.keepalive,
+        timeout_graceful_shutdown=args.graceful,
+        access_log=args.access_log,
+        log_level=args.log_level,
+    )
+    servidor = uvicorn.Server(config)
+    servidor.run(sockets=[sock])
+    if not servidor.started:
+        os._exit(FALHA_AO_INICIAR)
+
+
+def main(args):
+    from app.main import app  # pré-carregado no pai
+
+    sock = criar_socket(args.host, args.port, args.backlog)
+    workers = {}
+    encerrando = False
+    codigo_saida = 0
+
+    def iniciar_worker():
+        pid = os.fork()
+        if pid == 0:
+            try:
+                executar_worker(app, sock, args)
+            except BaseException:
+                traceback.print_exc()
+                os._exit(1)
+            os._exit(0)
+        workers[pid] = time.monotonic()
+
+    def encerrar(signum, frame):
+        nonlocal encerrando
+        if not encerrando:
+            encerrando = True
+            print(f"[servidor] sinal {signal.Signals(signum).name}: encerrando {len(workers)} worker(s)", flush=True)
+            # Sem a cópia do pai, o socket fecha assim que os workers param de aceitar
+            # e conexões ainda na fila recebem RST em vez de esperar até o timeout
+            sock.close()
+        for pid in list(workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, encerrar)
+    signal.signal(signal.SIGINT, encerrar)
+
+    for _ in range(args.workers):
+        iniciar_worker()
+    print(
+        f"[servidor] {args.workers} worker(s) em http://{args.host}:{args.port} "
+        f"(keep-alive {args.keepalive}s, backlog {args.backlog})",
+        flush=True,
+    )
+
+    prazo = None
+    while workers:
+        if encerrando and prazo is None:
+            prazo = time.monotonic() + args.graceful + 5
+        if prazo is not None and time.monotonic() > prazo:
+            for pid in list(workers):
+                os.kill(pid, signal.SIGKILL)
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            break
+        if pid == 0:
+            time.sleep(0.2)
+            continue
+        iniciado_em = workers.pop(pid, None)
+        if iniciado_em is None or encerrando:
+            continue
+        codigo = os.waitstatus_to_exitcode(status)
+        if codigo == FALHA_AO_INICIAR:
+            print(f"[servidor] worker {pid} não conseguiu iniciar o app; encerrando", flush=True)
+            codigo_saida = 1
+            encerrar(signal.SIGTERM, None)
+            continue
+        print(f"[servidor] worker {pid} saiu (status {codigo}); recriando", flush=True)
+        if time.monotonic() - iniciado_em < 1:
+            time.sleep(1)  # evita loop de recriação se o worker falha ao iniciar
+        iniciar_worker()
+
+    sock.close()
+    print("[servidor] encerrado", flush=True)
+    return codigo_saida
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=_env("WEB_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=_env("WEB_PORT", 8000))
+    parser.add_argument("--workers", type=int, default=_env("WEB_WORKERS", os.cpu_count() or 1))
+    parser.add_argument("--keepalive", type=int, default=_env("WEB_KEEPALIVE", 5), help="segundos de keep-alive HTTP")
+    parser.add_argument("--backlog", type=int, default=_env("WEB_BACKLOG", 2048), help="fila de conexões do socket")
+    parser.add_argument("--graceful", type=int, default=_env("WEB_GRACEFUL_TIMEOUT", 30), help="segundos para drenar requisições no SIGTERM")
+    parser.add_argument("--log-level", default=_env("WEB_LOG_LEVEL", "info"))
+    parser.add_argument("--access-log", action="store_true", default=os.getenv("WEB_ACCESS_LOG", "0") == "1")
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,72 @@
+"""
+Benchmark de envio de e-mails contra um servidor SMTP local (aiosmtpd).
+
+Compara o envio antigo (uma conexão SMTP por mensagem) com enviar_emails(),
+que reaproveita sessões do pool e manda o lote inteiro por sessão.
+
+Requer o aiosmtpd (apenas para o benchmark): pip install aiosmtpd
+Na raiz do backend:
+  python scripts/bench_email.py --mensagens 500
+"""
+import argparse
+import os
+import smtplib
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from aiosmtpd.controller import Controller
+except ImportError:
+    sys.exit("Instale o aiosmtpd para rodar o benchmark: pip install aiosmtpd")
+
+
+class Contador:
+    def __init__(self):
+        self.recebidas = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        self.recebidas += 1
+        return "250 OK"
+
+
+def main(args):
+    contador = Contador()
+    servidor = Controller(contador, hostname="127.0.0.1", port=args.porta)
+    servidor.start()
+    os.environ.update({"SMTP_HOST": "127.0.0.1", "SMTP_PORT": str(args.porta), "SMTP_USER": "bench", "SMTP_PASSWORD": ""})
+    from app.email_service import Email, _config, _montar_mensagem, enviar_emails, montar_confirmacao_assinatura, pool_smtp
+
+    try:
+        emails = []
+        for i in range(args.mensagens):
+            assunto, html, texto = montar_confirmacao_assinatura(f"Usuário {i}", "mensal" if i % 2 else "anual")
+            emails.append(Email(f"usuario{i}@exemplo.com", assunto, html, texto))
+
+        # Antes: conexão nova por mensagem
+        cfg = _config()
+        inicio = time.perf_counter()
+        for email in emails:
+            with smtplib.SMTP(cfg["host"], cfg["port"]) as smtp:
+                smtp.sendmail(cfg["from_addr"], [email.destinatario], _montar_mensagem(cfg, email))
+        por_conexao = time.perf_counter() - inicio
+
+        # Depois: sessões reaproveitadas
+        inicio = time.perf_counter()
+        resultados = enviar_emails(emails)
+        pool = time.perf_counter() - inicio
+        pool_smtp.fechar()
+
+        print(f"{args.mensagens} mensagens, recebidas pelo servidor: {contador.recebidas}")
+        print(f"conexão por mensagem: {por_conexao:.2f}s ({args.mensagens / por_conexao:.0f} msg/s)")
+        print(f"sessões do pool:      {pool:.2f}s ({args.mensagens / pool:.0f} msg/s), falhas: {resultados.count(False)}")
+    finally:
+        servidor.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mensagens", type=int, default=500)
+    parser.add_argument("--porta", type=int, default=8025)
+    main(parser.parse_args())
@@ -0,0 +1,50 @@
+"""
+Benchmark de inicialização: tempo de `import app.main` em um processo novo
+e quantos comandos SQL o import executa.
+
+Cada worker do uvicorn (e cada --reload) paga esse import. Depois que a criação
+do esquema saiu do import (ver app/migracoes), ele não deve tocar o banco.
+
+Na raiz do backend, com DATABASE_URL apontando para o banco:
+  python scripts/bench_inicializacao.py --execucoes 10
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MEDICAO = """
+import json, time
+inicio = time.perf_counter()
+from sqlalchemy import event
+import app.database
+comandos = []
+event.listen(app.database.engine, "before_cursor_execute", lambda *a: comandos.append(a[2]))
+import app.main
+print(json.dumps({"segundos": time.perf_counter() - inicio, "comandos": len(comandos)}))
+"""
+
+
+def medir() -> dict:
+    saida = subprocess.run(
+        [sys.executable, "-c", MEDICAO], cwd=RAIZ, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(saida.strip().splitlines()[-1])
+
+
+def main(args):
+    resultados = [medir() for _ in range(args.execucoes)]
+    tempos = sorted(r["segundos"] * 1000 for r in resultados)
+    print(f"import app.main ({args.execucoes} processos novos)")
+    print(f"  min={tempos[0]:.0f}ms mediana={statistics.median(tempos):.0f}ms max={tempos[-1]:.0f}ms")
+    print(f"  comandos SQL durante o import: {resultados[-1]['comandos']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--execucoes", type=int, default=10)
+    main(parser.parse_args())
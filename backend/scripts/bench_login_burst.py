@@ -0,0 +1,81 @@
+"""
+Benchmark: latência de GET /produtos/ com e sem uma rajada de logins simultâneos.
+
+Mede p50/p95/p99 de /produtos/ primeiro sozinho e depois enquanto N logins
+(bcrypt) são disparados ao mesmo tempo. Com o hash no pool de processos
+(app/auth/senhas.py) o p99 de /produtos/ não deve subir com a rajada; logins
+acima de BCRYPT_MAX_PENDENTES recebem 503.
+
+Com a API rodando (ex.: uvicorn app.main:app --port 8000), na raiz do backend:
+  python scripts/bench_login_burst.py --url http://localhost:8000 --logins 100
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from collections import Counter
+
+import httpx
+
+USUARIO = {"email": "bench@exemplo.com", "username": "bench_login", "password": "bench123", "full_name": "Bench"}
+
+
+def percentis(amostras):
+    ordenadas = sorted(amostras)
+    def p(q):
+        return ordenadas[min(len(ordenadas) - 1, int(q * len(ordenadas)))] * 1000
+    return f"p50={p(0.50):.1f}ms p95={p(0.95):.1f}ms p99={p(0.99):.1f}ms media={statistics.mean(ordenadas) * 1000:.1f}ms"
+
+
+async def medir_produtos(client, headers, total, concorrencia):
+    latencias = []
+    fila = asyncio.Queue()
+    for _ in range(total):
+        fila.put_nowait(None)
+
+    async def trabalhador():
+        while not fila.empty():
+            fila.get_nowait()
+            inicio = time.perf_counter()
+            r = await client.get("/produtos/", headers=headers)
+            r.raise_for_status()
+            latencias.append(time.perf_counter() - inicio)
+
+    await asyncio.gather(*(trabalhador() for _ in range(concorrencia)))
+    return latencias
+
+
+async def rajada_logins(client, quantidade):
+    respostas = await asyncio.gather(*(
+        client.post("/auth/login", json={"username": USUARIO["username"], "password": USUARIO["password"]})
+        for _ in range(quantidade)
+    ))
+    return Counter(r.status_code for r in respostas)
+
+
+async def main(args):
+    limites = httpx.Limits(max_connections=args.logins + args.concorrencia)
+    async with httpx.AsyncClient(base_url=args.url, timeout=120, limits=limites) as client:
+        await client.post("/auth/register", json=USUARIO)
+        r = await client.post("/auth/login", json={"username": USUARIO["username"], "password": USUARIO["password"]})
+        r.raise_for_status()
+        headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+        base = await medir_produtos(client, headers, args.requisicoes, args.concorrencia)
+        print(f"/produtos/ sozinho:          {percentis(base)}")
+
+        logins = asyncio.create_task(rajada_logins(client, args.logins))
+        await asyncio.sleep(0.05)
+        com_rajada = await medir_produtos(client, headers, args.requisicoes, args.concorrencia)
+        status_logins = await logins
+        print(f"/produtos/ durante rajada:   {percentis(com_rajada)}")
+        print(f"logins ({args.logins}) por status: {dict(status_logins)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--logins", type=int, default=100, help="logins simultâneos na rajada")
+    parser.add_argument("--requisicoes", type=int, default=300, help="requisições a /produtos/ por fase")
+    parser.add_argument("--concorrencia", type=int, default=10, help="clientes simultâneos em /produtos/")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,94 @@
+"""
+Teste de carga das rotas de leitura mais usadas: requisições/s e p50/p99.
+
+Dispara GET /produtos/, /listas-compras/ e /compras/ (e os detalhes de uma lista
+e de uma compra) com N clientes simultâneos durante alguns segundos. Serve para
+comparar as rotas síncronas (threadpool do Starlette + Session) com as
+assíncronas (AsyncSession): rode contra cada versão da API com os mesmos
+parâmetros e compare as linhas impressas.
+
+Com a API rodando (ex.: uvicorn app.main:app --port 8000), na raiz do backend:
+  python scripts/bench_rotas.py --url http://localhost:8000 --concorrencia 50 --segundos 20
+"""
+import argparse
+import asyncio
+import itertools
+import statistics
+import time
+from collections import Counter
+
+import httpx
+
+USUARIO = {"email": "bench_rotas@exemplo.com", "username": "bench_rotas", "password": "bench123", "full_name": "Bench"}
+
+
+def percentis(amostras):
+    ordenadas = sorted(amostras)
+    def p(q):
+        return ordenadas[min(len(ordenadas) - 1, int(q * len(ordenadas)))] * 1000
+    return f"p50={p(0.50):.1f}ms p99={p(0.99):.1f}ms media={statistics.mean(ordenadas) * 1000:.1f}ms"
+
+
+async def preparar(client, headers):
+    """Garante alguns produtos, uma lista com itens e uma compra para o usuário do benchmark"""
+    if not (await client.get("/produtos/?limit=1", headers=headers)).json():
+        for i in range(50):
+            await client.post("/produtos/", json={"nome": f"Produto bench {i}", "preco": 1 + i}, headers=headers)
+
+    listas = (await client.get("/listas-compras/?limit=1", headers=headers)).json()
+    if listas:
+        lista_id = listas[0]["id"]
+    else:
+        lista_id = (await client.post("/listas-compras/", json={"nome": "Bench"}, headers=headers)).json()["id"]
+        for i in range(10):
+            await client.post(f"/listas-compras/{lista_id}/itens", json={"nome_item": f"Item {i}", "quantidade": 2, "preco_estimado": 3}, headers=headers)
+
+    compras = (await client.get("/compras/?limit=1", headers=headers)).json()
+    if compras:
+        compra_id = compras[0]["id"]
+    else:
+        itens = [{"nome_item": f"Item {i}", "quantidade": 1, "preco_unitario": 2} for i in range(5)]
+        compra_id = (await client.post("/compras/", json={"itens": itens}, headers=headers)).json()["id"]
+
+    return ["/produtos/", "/listas-compras/", "/compras/", f"/listas-compras/{lista_id}", f"/compras/{compra_id}"]
+
+
+async def main(args):
+    limites = httpx.Limits(max_connections=args.concorrencia)
+    async with httpx.AsyncClient(base_url=args.url, timeout=60, limits=limites) as client:
+        await client.post("/auth/register", json=USUARIO)
+        r = await client.post("/auth/login", json={"username": USUARIO["username"], "password": USUARIO["password"]})
+        r.raise_for_status()
+        headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+        rotas = await preparar(client, headers)
+
+        latencias = {rota: [] for rota in rotas}
+        status_http = Counter()
+        proxima = itertools.cycle(rotas)
+        fim = time.perf_counter() + args.segundos
+
+        async def cliente():
+            while time.perf_counter() < fim:
+                rota = next(proxima)
+                inicio = time.perf_counter()
+                r = await client.get(rota, headers=headers)
+                latencias[rota].append(time.perf_counter() - inicio)
+                status_http[r.status_code] += 1
+
+        inicio = time.perf_counter()
+        await asyncio.gather(*(cliente() for _ in range(args.concorrencia)))
+        duracao = time.perf_counter() - inicio
+
+        todas = [l for amostras in latencias.values() for l in amostras]
+        print(f"{len(todas)} requisições em {duracao:.1f}s com {args.concorrencia} clientes: {len(todas) / duracao:.0f} req/s")
+        print(f"geral: {percentis(todas)}  status: {dict(status_http)}")
+        for rota, amostras in latencias.items():
+            print(f"  {rota:<22} {percentis(amostras)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--concorrencia", type=int, default=50, help="clientes simultâneos")
+    parser.add_argument("--segundos", type=float, default=20, help="duração da medição")
+    asyncio.run(main(parser.parse_args()))
@@ -4,8 +4,9 @@ Execute: python scripts/create_admin.py
 """
 from sqlalchemy.orm import Session
 from app.database import SessionLocal, engine
-from app.models import Base, User
-from app.auth.auth import get_password_hash
+from app.models import User
+from app.migracoes import migrar
+from app.auth.senhas import get_password_hash
 import traceback
 import sys
 import os
@@ -15,8 +16,8 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 
 
 def create_admin():
-    # Criar tabelas se não existirem
-    Base.metadata.create_all(bind=engine)
+    # Aplicar migrações pendentes (cria as tabelas se não existirem)
+    migrar(engine)
     
     db = SessionLocal()
     
@@ -0,0 +1,43 @@
+"""
+Aplica as migrações pendentes do banco (app/migracoes), em ordem.
+
+Substitui o create_all que rodava no import de app.main e os antigos scripts
+migrate_*.py / backfill_resumo_compras.py. Rode antes de iniciar (ou atualizar) a API,
+a partir da raiz do backend:
+  python scripts/migrar.py            # aplica as pendentes
+  python scripts/migrar.py --status   # só lista aplicadas e pendentes
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import engine
+from app.migracoes import MIGRACOES, migrar, pendentes, versoes_aplicadas
+
+
+def status():
+    with engine.connect() as conn:
+        aplicadas = versoes_aplicadas(conn)
+        faltando = pendentes(conn)
+    for migracao in MIGRACOES:
+        marca = "x" if migracao.VERSAO in aplicadas else " "
+        print(f"[{marca}] {migracao.VERSAO:04d} {migracao.DESCRICAO}")
+    print(f"{len(faltando)} pendente(s).")
+
+
+def run():
+    aplicadas = migrar(engine)
+    for descricao in aplicadas:
+        print(f"Aplicada: {descricao}")
+    print("Banco atualizado." if aplicadas else "Nenhuma migração pendente.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--status", action="store_true", help="lista as migrações sem aplicar")
+    if parser.parse_args().status:
+        status()
+    else:
+        run()
@@ -0,0 +1,39 @@
+"""
+Reconstrói os resumos diários de compras (resumo_diario_compras e resumo_diario_itens)
+a partir do histórico em compras/itens_compra, com os dias em UTC.
+
+A migração 6 preenche os resumos uma vez e o CRUD de compras os mantém; rode este script
+se eles divergirem (compras alteradas por fora da API, restauração parcial de backup).
+Na raiz do backend:
+  python scripts/reconstruir_resumos_compras.py
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, select
+
+from app.database import engine
+from app.migracoes.m0006_resumos_compras import reconstruir_resumos
+from app.models import ResumoDiarioCompras, ResumoDiarioItens
+
+
+def run(args) -> int:
+    inicio = time.perf_counter()
+    with engine.begin() as conn:
+        reconstruir_resumos(conn)
+        total_dias = conn.execute(select(func.count()).select_from(ResumoDiarioCompras)).scalar()
+        total_itens = conn.execute(select(func.count()).select_from(ResumoDiarioItens)).scalar()
+    print(
+        f"Resumos reconstruídos: {total_dias} dias, {total_itens} linhas de itens "
+        f"({time.perf_counter() - inicio:.1f}s)."
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sys.exit(run(parser.parse_args()))
@@ -0,0 +1,55 @@
+"""
+Verifica e corrige os contadores de itens das listas de compras (total_itens,
+itens_comprados, valor_estimado_total), comparando-os com itens_lista_compras.
+
+O CRUD de itens mantém os contadores; divergências só aparecem se itens forem
+alterados por fora da API (SQL manual, restauração parcial de backup). Na raiz do backend:
+  python scripts/reparar_contadores_listas.py              # corrige as listas divergentes
+  python scripts/reparar_contadores_listas.py --verificar  # só relata (código de saída 1 se houver)
+  python scripts/reparar_contadores_listas.py --todas      # recalcula todas as listas
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import engine
+from app.migracoes.m0007_contadores_listas import contadores_divergentes, reconstruir_contadores
+
+EXEMPLOS = 10
+
+
+def run(args) -> int:
+    inicio = time.perf_counter()
+    if args.todas:
+        with engine.begin() as conn:
+            alteradas = reconstruir_contadores(conn)
+        print(f"Contadores de {alteradas} lista(s) recalculados em {time.perf_counter() - inicio:.1f}s.")
+        return 0
+
+    with engine.connect() as conn:
+        divergentes = contadores_divergentes(conn)
+    print(f"{len(divergentes)} lista(s) com contadores divergentes ({time.perf_counter() - inicio:.1f}s).")
+    for lista_id, gravados, corretos in divergentes[:EXEMPLOS]:
+        print(f"  lista {lista_id}: (total, comprados, valor) {gravados} -> {corretos}")
+    if len(divergentes) > EXEMPLOS:
+        print(f"  ... e mais {len(divergentes) - EXEMPLOS}")
+    if args.verificar or not divergentes:
+        return 1 if divergentes else 0
+
+    ids = [lista_id for lista_id, _, _ in divergentes]
+    for i in range(0, len(ids), args.lote):
+        with engine.begin() as conn:
+            reconstruir_contadores(conn, ids[i:i + args.lote])
+    print(f"Corrigidas em {time.perf_counter() - inicio:.1f}s.")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--verificar", action="store_true", help="só relata as divergências, sem corrigir")
+    parser.add_argument("--todas", action="store_true", help="recalcula todas as listas sem comparar antes")
+    parser.add_argument("--lote", type=int, default=1000, help="listas corrigidas por transação")
+    sys.exit(run(parser.parse_args()))
@@ -0,0 +1,363 @@
+"""
+Gera dados sintéticos em volume de produção para testes de carga e de escala.
+
+Cria usuários, categorias, produtos, listas de compras com itens e um histórico de
+compras de vários anos:
+- a popularidade dos produtos segue uma distribuição de Zipf (poucos produtos
+  aparecem na maioria das compras e das listas); a atividade dos usuários também;
+- as compras se espalham por --anos, mais densas nos meses recentes, em horário comercial;
+- itens por compra/lista e quantidades variam em torno das médias informadas.
+
+A inserção usa COPY no PostgreSQL (psycopg2) e executemany no SQLite, em lotes, com
+IDs atribuídos pelo script (sem RETURNING). No fim as sequências do PostgreSQL são
+ajustadas, os resumos diários de compras recalculados e as estatísticas do
+planejador atualizadas (ANALYZE).
+
+Os usuários gerados são carga<ID> / carga<ID>@exemplo.com, senha "carga123".
+
+Aplique as migrações antes (python scripts/migrar.py). Na raiz do backend:
+  python scripts/seed_load.py --usuarios 20000 --produtos 20000 --itens-compra 10000000
+  python scripts/seed_load.py --usuarios 50 --produtos 500 --itens-compra 20000 --seed 7
+"""
+import argparse
+import csv
+import io
+import itertools
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+
+from app.auth.senhas import get_password_hash
+from app.database import engine
+from app.migracoes.m0006_resumos_compras import reconstruir_resumos
+from app.models import Categoria, Compra, ItemCompra, ItemListaCompras, ListaCompras, Produto, User
+
+SENHA = "carga123"
+
+CATEGORIAS = [
+    "Fraldas", "Higiene", "Alimentação", "Roupas", "Brinquedos", "Farmácia", "Banho",
+    "Passeio", "Quarto", "Amamentação", "Segurança", "Mamadeiras", "Enxoval", "Limpeza",
+]
+TIPOS = [
+    "Fralda", "Lenço umedecido", "Pomada para assaduras", "Shampoo", "Sabonete líquido",
+    "Mamadeira", "Chupeta", "Body", "Macacão", "Leite em pó", "Papinha", "Algodão",
+    "Hidratante", "Termômetro", "Toalha de banho", "Babador", "Meia", "Manta", "Cotonete",
+    "Protetor de seios", "Escova de mamadeira", "Mordedor", "Soro fisiológico",
+]
+MARCAS = [
+    "Pampers", "Huggies", "MamyPoko", "Turma da Mônica", "Johnson's", "Granado", "Avent",
+    "NUK", "Lillo", "Nestlé", "Mustela", "Bepantol", "Dermodex", "Carter's", "Kiddo",
+]
+VARIANTES = ["RN", "P", "M", "G", "XG", "XXG", "100ml", "200ml", "400g", "800g", "kit 3", "unidade"]
+LOJAS = ["Supermercado", "Farmácia", "Atacadão", "Loja de bebê", "Online", "Feira", None]
+# Itens digitados sem produto cadastrado
+ITENS_AVULSOS = ["Pão", "Leite", "Frutas", "Café", "Presente", "Remédio", "Pilhas", "Fita adesiva"]
+QUANTIDADES = [1] * 6 + [2] * 3 + [3, 4, 6]
+
+
+def cumulativos_zipf(n: int, s: float) -> list:
+    """Pesos acumulados de Zipf: o k-ésimo mais popular tem peso 1/k^s"""
+    return list(itertools.accumulate(1 / (k ** s) for k in range(1, n + 1)))
+
+
+class Carregador:
+    """Insere linhas em lotes: COPY (PostgreSQL com psycopg2) ou executemany"""
+
+    def __init__(self, engine, lote: int):
+        self.dialeto = engine.dialect.name
+        self.lote = lote
+        self.conexao = engine.raw_connection()
+        self.cursor = self.conexao.cursor()
+        self.copy = self.dialeto == "postgresql" and hasattr(self.cursor, "copy_expert")
+        self.marcador = "?" if engine.dialect.paramstyle == "qmark" else "%s"
+        if self.dialeto == "sqlite":
+            # Só nesta conexão, durante a carga
+            self.cursor.execute("PRAGMA synchronous = OFF")
+
+    def proximo_id(self, tabela: str) -> int:
+        self.cursor.execute(f"SELECT COALESCE(MAX(id), 0) FROM {tabela}")
+        return self.cursor.fetchone()[0] + 1
+
+    def data(self, valor: datetime) -> str:
+        if self.dialeto == "sqlite":
+            # Mesmo formato que o SQLAlchemy grava no SQLite (UTC, sem fuso)
+            return valor.strftime("%Y-%m-%d %H:%M:%S.%f")
+        return valor.replace(tzinfo=timezone.utc).isoformat()
+
+    def inserir(self, tabela: str, colunas: list, linhas) -> int:
+        total = 0
+        linhas = iter(linhas)
+        while True:
+            bloco = list(itertools.islice(linhas, self.lote))
+            if not bloco:
+                return total
+            if self.copy:
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows(bloco)
+                buffer.seek(0)
+                self.cursor.copy_expert(
+                    f"COPY {tabela} ({', '.join(colunas)}) FROM STDIN WITH (FORMAT csv)", buffer
+                )
+            else:
+                marcadores = ", ".join([self.marcador] * len(colunas))
+                self.cursor.executemany(
+                    f"INSERT INTO {tabela} ({', '.join(colunas)}) VALUES ({marcadores})", bloco
+                )
+            self.conexao.commit()
+            total += len(bloco)
+
+    def fechar(self):
+        self.cursor.close()
+        self.conexao.close()
+
+
+class Gerador:
+    def __init__(self, args, carregador: Carregador):
+        self.args = args
+        self.db = carregador
+        self.rnd = random.Random(args.seed)
+        self.agora = datetime.now(timezone.utc).replace(tzinfo=None)
+        self.inicio = self.agora - timedelta(days=int(365 * args.anos))
+        self.usuarios = []
+        self.categorias = []  # (id, nome)
+        self.produtos = []  # (id, nome, preco, nome da categoria)
+
+    def _medir(self, nome: str, funcao):
+        inicio = time.perf_counter()
+        quantidade = funcao()
+        segundos = time.perf_counter() - inicio
+        print(f"  {nome:<22} {quantidade:>11,} linhas em {segundos:6.1f}s ({quantidade / max(segundos, 1e-9):,.0f}/s)")
+        return quantidade
+
+    def _data_historico(self, fracao: float) -> datetime:
+        # sqrt: mais compras nos meses recentes (base de usuários crescendo)
+        dia = self.inicio + (self.agora - self.inicio) * (fracao ** 0.5)
+        quando = dia.replace(hour=self.rnd.randint(8, 21), minute=self.rnd.randint(0, 59), second=self.rnd.randint(0, 59))
+        return min(quando, self.agora)
+
+    def gerar_usuarios(self) -> int:
+        primeiro = self.db.proximo_id(User.__tablename__)
+        hash_senha = get_password_hash(SENHA)
+        criado_em = self.db.data(self.inicio)
+        self.usuarios = list(range(primeiro, primeiro + self.args.usuarios))
+        return self.db.inserir(
+            User.__tablename__,
+            ["id", "email", "username", "hashed_password", "full_name", "is_active", "is_superuser", "created_at"],
+            (
+                (i, f"carga{i}@exemplo.com", f"carga{i}", hash_senha, f"Usuário Carga {i}", True, False, criado_em)
+                for i in self.usuarios
+            ),
+        )
+
+    def gerar_categorias(self) -> int:
+        primeiro = self.db.proximo_id(Categoria.__tablename__)
+        for n in range(self.args.categorias):
+            i = primeiro + n
+            # ID no nome: categorias.nome é único e o script pode rodar mais de uma vez
+            self.categorias.append((i, f"{CATEGORIAS[n % len(CATEGORIAS)]} {i}"))
+        return self.db.inserir(
+            Categoria.__tablename__,
+            ["id", "nome", "descricao"],
+            ((i, nome, f"Categoria sintética {nome}") for i, nome in self.categorias),
+        )
+
+    def gerar_produtos(self) -> int:
+        rnd = self.rnd
+        primeiro = self.db.proximo_id(Produto.__tablename__)
+        # Categorias também têm popularidade desigual
+        categorias = rnd.choices(
+            self.categorias, cum_weights=cumulativos_zipf(len(self.categorias), 1.0), k=self.args.produtos
+        )
+        linhas = []
+        for n, (categoria_id, categoria_nome) in enumerate(categorias):
+            i = primeiro + n
+            nome = f"{rnd.choice(TIPOS)} {rnd.choice(MARCAS)} {rnd.choice(VARIANTES)}"
+            preco = round(rnd.lognormvariate(3.3, 0.8), 2)
+            self.produtos.append((i, nome, preco, categoria_nome))
+            linhas.append((
+                i, nome, f"{nome} - produto sintético", preco, rnd.randint(0, 40),
+                rnd.choice([None, None, 2, 5]), categoria_id, f"789{i:010d}",
+                self.db.data(self.inicio + (self.agora - self.inicio) * rnd.random()),
+            ))
+        # Ranking de popularidade independente da ordem dos IDs
+        rnd.shuffle(self.produtos)
+        self.cum_produtos = cumulativos_zipf(len(self.produtos), self.args.zipf)
+        return self.db.inserir(
+            Produto.__tablename__,
+            ["id", "nome", "descricao", "preco", "quantidade_estoque", "estoque_minimo",
+             "categoria_id", "codigo_barras", "created_at"],
+            linhas,
+        )
+
+    def _sortear_produtos(self, k: int) -> list:
+        return self.rnd.choices(self.produtos, cum_weights=self.cum_produtos, k=k)
+
+    def gerar_listas(self) -> int:
+        rnd = self.rnd
+        lista_id = self.db.proximo_id(ListaCompras.__tablename__)
+        item_id = self.db.proximo_id(ItemListaCompras.__tablename__)
+        total_listas = self.args.usuarios * self.args.listas_por_usuario
+        media = self.args.itens_por_lista
+        listas, itens = [], []
+        for _ in range(total_listas):
+            concluida = rnd.random() < 0.3
+            criada = self.db.data(self._data_historico(rnd.random()))
+            usuario = rnd.choice(self.usuarios)
+            quantidade = rnd.randint(1, 2 * media - 1)
+            comprados, valor = 0, 0.0
+            for produto_id, nome, preco, _ in self._sortear_produtos(quantidade):
+                if rnd.random() < 0.1:
+                    produto_id, nome, preco = None, rnd.choice(ITENS_AVULSOS), None
+                comprado = concluida or rnd.random() < 0.4
+                qtd = rnd.choice(QUANTIDADES)
+                itens.append((item_id, lista_id, produto_id, nome, qtd, comprado, preco, criada))
+                comprados += comprado
+                valor += (preco or 0) * qtd
+                item_id += 1
+            listas.append((
+                lista_id, f"Lista {lista_id}", None, usuario, concluida, quantidade, comprados, valor, criada,
+            ))
+            lista_id += 1
+
+        self._itens_lista = itens
+        return self.db.inserir(
+            ListaCompras.__tablename__,
+            ["id", "nome", "descricao", "user_id", "concluida", "total_itens", "itens_comprados",
+             "valor_estimado_total", "created_at"],
+            listas,
+        )
+
+    def gerar_itens_lista(self) -> int:
+        itens, self._itens_lista = self._itens_lista, None
+        return self.db.inserir(
+            ItemListaCompras.__tablename__,
+            ["id", "lista_id", "produto_id", "nome_item", "quantidade", "comprado", "preco_estimado", "created_at"],
+            itens,
+        )
+
+    def _lotes_compras(self):
+        """Gera (compras, itens) em lotes, com as datas em ordem crescente de ID"""
+        rnd = self.rnd
+        args = self.args
+        compra_id = self.db.proximo_id(Compra.__tablename__)
+        item_id = self.db.proximo_id(ItemCompra.__tablename__)
+        cum_usuarios = cumulativos_zipf(len(self.usuarios), 0.7)
+        usuarios = self.usuarios[:]
+        rnd.shuffle(usuarios)
+        media = args.itens_por_compra
+        total_compras = max(1, args.itens_compra // media)
+        por_lote = max(1, args.lote // media)
+
+        for lote_inicio in range(0, total_compras, por_lote):
+            n = min(por_lote, total_compras - lote_inicio)
+            fracoes = sorted(
+                (lote_inicio + rnd.random() * n) / total_compras for _ in range(n)
+            )
+            donos = rnd.choices(usuarios, cum_weights=cum_usuarios, k=n)
+            tamanhos = [rnd.randint(1, 2 * media - 1) for _ in range(n)]
+            sorteados = iter(self._sortear_produtos(sum(tamanhos)))
+
+            compras, itens = [], []
+            for fracao, user_id, tamanho in zip(fracoes, donos, tamanhos):
+                quando = self.db.data(self._data_historico(fracao))
+                total = 0.0
+                for produto_id, nome, preco, categoria in itertools.islice(sorteados, tamanho):
+                    if rnd.random() < 0.05:
+                        produto_id, nome, categoria = None, rnd.choice(ITENS_AVULSOS), None
+                    quantidade = rnd.choice(QUANTIDADES)
+                    unitario = round(preco * rnd.uniform(0.85, 1.15), 2)
+                    preco_total = round(unitario * quantidade, 2)
+                    total += preco_total
+                    itens.append((item_id, compra_id, produto_id, nome, quantidade, unitario, preco_total, categoria, quando))
+                    item_id += 1
+                compras.append((compra_id, user_id, None, quando, round(total, 2), rnd.choice(LOJAS), None, quando))
+                compra_id += 1
+            yield compras, itens
+
+    def gerar_compras(self) -> int:
+        """Compras e itens_compra, intercalados por lote; retorna o total de itens"""
+        total_compras = total_itens = 0
+        inicio = time.perf_counter()
+        for compras, itens in self._lotes_compras():
+            total_compras += self.db.inserir(
+                Compra.__tablename__,
+                ["id", "user_id", "lista_id", "data_compra", "valor_total", "local_compra", "observacao", "created_at"],
+                compras,
+            )
+            total_itens += self.db.inserir(
+                ItemCompra.__tablename__,
+                ["id", "compra_id", "produto_id", "nome_item", "quantidade", "preco_unitario",
+                 "preco_total", "categoria", "created_at"],
+                itens,
+            )
+            segundos = time.perf_counter() - inicio
+            print(f"    {total_itens:,} itens de compra ({total_itens / segundos:,.0f}/s)", end="\r", flush=True)
+        print(" " * 60, end="\r")
+        print(f"  {'compras':<22} {total_compras:>11,} linhas")
+        return total_itens
+
+    def executar(self):
+        print(f"Gerando dados em {self.db.dialeto} ({'COPY' if self.db.copy else 'executemany'}, lotes de {self.args.lote:,})")
+        self._medir("users", self.gerar_usuarios)
+        self._medir("categorias", self.gerar_categorias)
+        self._medir("produtos", self.gerar_produtos)
+        self._medir("listas_compras", self.gerar_listas)
+        self._medir("itens_lista_compras", self.gerar_itens_lista)
+        self._medir("compras + itens_compra", self.gerar_compras)
+
+
+TABELAS = [User, Categoria, Produto, ListaCompras, ItemListaCompras, Compra, ItemCompra]
+
+
+def finalizar(args):
+    with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            # IDs vieram do script: sequências passam a continuar do maior ID
+            for modelo in TABELAS:
+                tabela = modelo.__tablename__
+                conn.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('{tabela}', 'id'), "
+                    f"(SELECT COALESCE(MAX(id), 1) FROM {tabela}))"
+                ))
+        if not args.sem_resumos:
+            inicio = time.perf_counter()
+            reconstruir_resumos(conn)
+            print(f"  resumos diários recalculados em {time.perf_counter() - inicio:.1f}s")
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        inicio = time.perf_counter()
+        conn.execute(text("ANALYZE"))
+        print(f"  ANALYZE em {time.perf_counter() - inicio:.1f}s")
+
+
+def run(args):
+    inicio = time.perf_counter()
+    carregador = Carregador(engine, args.lote)
+    try:
+        Gerador(args, carregador).executar()
+    finally:
+        carregador.fechar()
+    finalizar(args)
+    print(f"Concluído em {time.perf_counter() - inicio:.1f}s.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--usuarios", type=int, default=1000)
+    parser.add_argument("--categorias", type=int, default=30)
+    parser.add_argument("--produtos", type=int, default=5000)
+    parser.add_argument("--listas-por-usuario", type=int, default=3)
+    parser.add_argument("--itens-por-lista", type=int, default=12, help="média de itens por lista")
+    parser.add_argument("--itens-compra", type=int, default=1_000_000, help="total aproximado de itens de compra")
+    parser.add_argument("--itens-por-compra", type=int, default=8, help="média de itens por compra")
+    parser.add_argument("--anos", type=float, default=3, help="anos de histórico de compras")
+    parser.add_argument("--zipf", type=float, default=1.1, help="expoente de Zipf da popularidade dos produtos")
+    parser.add_argument("--lote", type=int, default=50_000, help="linhas por COPY/executemany")
+    parser.add_argument("--seed", type=int, default=None, help="semente para repetir a mesma base")
+    parser.add_argument("--sem-resumos", action="store_true", help="não recalcula os resumos diários de compras")
+    run(parser.parse_args())
@@ -0,0 +1,92 @@
+"""
+Testes da API contra um banco SQLite temporário, com as migrações de app/migracoes.
+
+app.database lê DATABASE_URL no import, então o ambiente é configurado aqui, antes de
+qualquer import do pacote app. Rode a partir da raiz do backend:
+  python -m pytest -q
+"""
+import itertools
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_DIRETORIO = tempfile.mkdtemp(prefix="testes_api_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_DIRETORIO, 'testes.db')}"
+os.environ.pop("ASYNC_DATABASE_URL", None)
+os.environ["EMAIL_WORKER_ATIVO"] = "0"
+os.environ["CONSULTA_LENTA_MS"] = "0"
+
+import httpx
+import pytest
+from sqlalchemy import event
+
+from app.auth import create_access_token, get_password_hash
+from app.database import SessionLocal, async_engine, engine
+from app.main import app
+from app.migracoes import migrar
+from app.models import User
+
+_usuarios = itertools.count(1)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def banco():
+    migrar(engine)
+    yield
+    engine.dispose()
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def cliente():
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://testes") as c:
+            yield c
+
+
+@pytest.fixture
+def criar_usuario():
+    """Cria usuários direto no banco; retorna os cabeçalhos de autenticação de cada um"""
+    def criar() -> dict:
+        username = f"usuario{next(_usuarios)}"
+        db = SessionLocal()
+        try:
+            db.add(User(
+                email=f"{username}@testes.com",
+                username=username,
+                hashed_password=get_password_hash("segredo123"),
+                full_name=username
+            ))
+            db.commit()
+        finally:
+            db.close()
+        return {"Authorization": f"Bearer {create_access_token({'sub': username})}"}
+    return criar
+
+
+@pytest.fixture
+def usuario(criar_usuario) -> dict:
+    return criar_usuario()
+
+
+class ContadorConsultas:
+    def __init__(self):
+        self.total = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.total += 1
+
+
+@pytest.fixture
+def contar_consultas():
+    """Conta os comandos SQL enviados pelo engine assíncrono (rotas de listas, compras e produtos)"""
+    contador = ContadorConsultas()
+    event.listen(async_engine.sync_engine, "before_cursor_execute", contador)
+    yield contador
+    event.remove(async_engine.sync_engine, "before_cursor_execute", contador)
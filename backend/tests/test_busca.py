@@ -0,0 +1,71 @@
+"""
+Busca de produtos no SQLite (FTS5 da migração 4, trigger ajustado pela migração 9) e
+índice em memória do autocompletar
+"""
+import pytest
+from sqlalchemy import text
+
+from app.database import engine
+from app.indice_produtos import IndicePrefixos
+
+pytestmark = pytest.mark.anyio
+
+
+async def _buscar(cliente, usuario, termo: str) -> list:
+    resposta = await cliente.get("/produtos/", params={"search": termo}, headers=usuario)
+    assert resposta.status_code == 200, resposta.text
+    return [p["nome"] for p in resposta.json()]
+
+
+async def test_fts_casa_prefixo_de_palavra(cliente, usuario):
+    await cliente.post("/produtos/", json={"nome": "Pomada Assadura", "preco": 12}, headers=usuario)
+
+    assert await _buscar(cliente, usuario, "assad") == ["Pomada Assadura"]
+    # FTS5 casa o início das palavras; substring no meio só casa no PostgreSQL
+    assert await _buscar(cliente, usuario, "ssadura") == []
+
+
+def test_trigger_fts_so_nas_colunas_indexadas():
+    with engine.connect() as conn:
+        sql = conn.execute(text(
+            "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = 'produtos_fts_au'"
+        )).scalar()
+    # Atualizações de estoque/preço não reescrevem a linha do FTS
+    assert "AFTER UPDATE OF nome, descricao, codigo_barras, categoria_id ON produtos" in sql
+
+
+async def test_fts_acompanha_nome(cliente, usuario):
+    produto = (await cliente.post(
+        "/produtos/", json={"nome": "Mamadeira Vidro", "preco": 30}, headers=usuario
+    )).json()
+
+    await cliente.put(f"/produtos/{produto['id']}", json={"quantidade_estoque": 7}, headers=usuario)
+    assert await _buscar(cliente, usuario, "vidro") == ["Mamadeira Vidro"]
+
+    await cliente.put(f"/produtos/{produto['id']}", json={"nome": "Mamadeira Plástico"}, headers=usuario)
+    assert await _buscar(cliente, usuario, "plast") == ["Mamadeira Plástico"]
+    assert await _buscar(cliente, usuario, "vidro") == []
+
+
+class _ConsultaComAlteracao:
+    """Leitura de produtos durante a qual o CRUD inclui um produto e remove outro"""
+    def __init__(self, indice):
+        self.indice = indice
+
+    def query(self, *colunas):
+        return self
+
+    def all(self):
+        self.indice.adicionar(3, "Mamadeira Anticólica", "789")
+        self.indice.remover(2)
+        return [(1, "Fralda Pampers", None), (2, "Lenço Umedecido", None)]
+
+
+def test_recarga_do_indice_preserva_alteracoes_feitas_durante_a_leitura():
+    indice = IndicePrefixos()
+    indice.carregar(_ConsultaComAlteracao(indice))
+
+    assert [p["id"] for p in indice.buscar("anticol")] == [3]
+    assert [p["id"] for p in indice.buscar("789")] == [3]
+    assert indice.buscar("lenco") == []
+    assert [p["id"] for p in indice.buscar("pamp")] == [1]
@@ -0,0 +1,80 @@
+"""
+Número fixo de consultas por endpoint de listagem/detalhe: os itens de listas e compras
+vêm em lote (selectinload), então o custo não cresce com o tamanho da página.
+"""
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def _criar_listas(cliente, usuario, quantidade: int, itens_por_lista: int = 3) -> list:
+    ids = []
+    for n in range(quantidade):
+        lista = (await cliente.post("/listas-compras/", json={"nome": f"Lista {n}"}, headers=usuario)).json()
+        for i in range(itens_por_lista):
+            await cliente.post(
+                f"/listas-compras/{lista['id']}/itens",
+                json={"nome_item": f"item {n}-{i}", "preco_estimado": 2.5},
+                headers=usuario
+            )
+        ids.append(lista["id"])
+    return ids
+
+
+async def _finalizar(cliente, usuario, lista_id: int) -> dict:
+    lista = (await cliente.get(f"/listas-compras/{lista_id}", headers=usuario)).json()
+    for item in lista["itens"]:
+        await cliente.patch(f"/listas-compras/itens/{item['id']}/toggle-comprado", headers=usuario)
+    resposta = await cliente.post(f"/compras/finalizar-lista/{lista_id}", json={}, headers=usuario)
+    assert resposta.status_code == 200, resposta.text
+    return resposta.json()
+
+
+async def _consultas(cliente, usuario, contar_consultas, url: str) -> int:
+    contar_consultas.total = 0
+    resposta = await cliente.get(url, headers=usuario)
+    assert resposta.status_code == 200, resposta.text
+    return contar_consultas.total
+
+
+async def _aquecer_autenticacao(cliente, usuario):
+    # A primeira requisição carrega o usuário no cache de autenticação (uma consulta a mais)
+    await cliente.get("/listas-compras/resumos", headers=usuario)
+
+
+@pytest.mark.parametrize("quantidade", [1, 10])
+async def test_listar_listas_consultas_fixas(cliente, usuario, contar_consultas, quantidade):
+    await _criar_listas(cliente, usuario, quantidade)
+    await _aquecer_autenticacao(cliente, usuario)
+
+    # Versão (ETag) + listas + itens de todas as listas
+    assert await _consultas(cliente, usuario, contar_consultas, "/listas-compras/") == 3
+
+
+@pytest.mark.parametrize("quantidade", [1, 10])
+async def test_detalhe_lista_consultas_fixas(cliente, usuario, contar_consultas, quantidade):
+    [lista_id] = await _criar_listas(cliente, usuario, 1, itens_por_lista=quantidade)
+    await _aquecer_autenticacao(cliente, usuario)
+
+    # Versão (ETag) + lista + itens
+    assert await _consultas(cliente, usuario, contar_consultas, f"/listas-compras/{lista_id}") == 3
+
+
+@pytest.mark.parametrize("quantidade", [1, 5])
+async def test_listar_compras_consultas_fixas(cliente, usuario, contar_consultas, quantidade):
+    for lista_id in await _criar_listas(cliente, usuario, quantidade):
+        await _finalizar(cliente, usuario, lista_id)
+    await _aquecer_autenticacao(cliente, usuario)
+
+    # Versão (ETag) + compras + itens de todas as compras
+    assert await _consultas(cliente, usuario, contar_consultas, "/compras/") == 3
+
+
+@pytest.mark.parametrize("quantidade", [1, 10])
+async def test_detalhe_compra_consultas_fixas(cliente, usuario, contar_consultas, quantidade):
+    [lista_id] = await _criar_listas(cliente, usuario, 1, itens_por_lista=quantidade)
+    compra = await _finalizar(cliente, usuario, lista_id)
+    await _aquecer_autenticacao(cliente, usuario)
+
+    # Versão (ETag) + compra + itens
+    assert await _consultas(cliente, usuario, contar_consultas, f"/compras/{compra['id']}") == 3
@@ -0,0 +1,55 @@
+"""
+Finalizações concorrentes que tocam os mesmos produtos: os incrementos de estoque são
+feitos no servidor (quantidade_estoque = quantidade_estoque + :n), então nenhum se perde.
+"""
+import asyncio
+
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+FINALIZACOES = 12
+
+
+async def _lista_comprada(cliente, usuario, itens: list) -> int:
+    lista = (await cliente.post("/listas-compras/", json={"nome": "Concorrente"}, headers=usuario)).json()
+    for item in itens:
+        criado = (await cliente.post(f"/listas-compras/{lista['id']}/itens", json=item, headers=usuario)).json()
+        await cliente.patch(f"/listas-compras/itens/{criado['id']}/toggle-comprado", headers=usuario)
+    return lista["id"]
+
+
+async def test_finalizacoes_concorrentes_somam_estoque_exato(cliente, criar_usuario):
+    usuarios = [criar_usuario() for _ in range(3)]
+    dono = usuarios[0]
+    arroz = (await cliente.post(
+        "/produtos/", json={"nome": "Arroz concorrente", "preco": 10, "quantidade_estoque": 5}, headers=dono
+    )).json()
+    feijao = (await cliente.post(
+        "/produtos/", json={"nome": "Feijão concorrente", "preco": 8, "quantidade_estoque": 0}, headers=dono
+    )).json()
+
+    listas = []
+    for n in range(FINALIZACOES):
+        usuario = usuarios[n % len(usuarios)]
+        itens = [
+            {"nome_item": "Arroz", "produto_id": arroz["id"], "quantidade": n + 1},
+            # Sem produto_id: casado com o produto existente pelo nome
+            {"nome_item": "feijão CONCORRENTE", "quantidade": 2},
+        ]
+        listas.append((usuario, await _lista_comprada(cliente, usuario, itens)))
+
+    respostas = await asyncio.gather(*(
+        cliente.post(f"/compras/finalizar-lista/{lista_id}", json={}, headers=usuario)
+        for usuario, lista_id in listas
+    ))
+    assert [r.status_code for r in respostas] == [200] * FINALIZACOES
+
+    arroz_final = (await cliente.get(f"/produtos/{arroz['id']}", headers=dono)).json()
+    feijao_final = (await cliente.get(f"/produtos/{feijao['id']}", headers=dono)).json()
+    assert arroz_final["quantidade_estoque"] == 5 + sum(range(1, FINALIZACOES + 1))
+    assert feijao_final["quantidade_estoque"] == 2 * FINALIZACOES
+
+    # Nenhum produto duplicado pelo casamento por nome
+    busca = (await cliente.get("/produtos/", params={"search": "concorrente"}, headers=dono)).json()
+    assert sorted(p["id"] for p in busca) == sorted([arroz["id"], feijao["id"]])
@@ -0,0 +1,58 @@
+"""Validação das atualizações de itens (rota individual e lote) e adição de produtos à lista"""
+import asyncio
+
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.mark.parametrize("campo", ["quantidade", "nome_item", "comprado"])
+async def test_null_em_campo_obrigatorio_retorna_422(cliente, usuario, campo):
+    lista = (await cliente.post("/listas-compras/", json={"nome": "Validação"}, headers=usuario)).json()
+    item = (await cliente.post(
+        f"/listas-compras/{lista['id']}/itens", json={"nome_item": "arroz", "preco_estimado": 2}, headers=usuario
+    )).json()
+
+    resposta = await cliente.put(f"/listas-compras/itens/{item['id']}", json={campo: None}, headers=usuario)
+    assert resposta.status_code == 422
+
+    resposta = await cliente.post(f"/listas-compras/{lista['id']}/itens/lote", headers=usuario, json={
+        "operacoes": [{"op": "atualizar", "item_id": item["id"], "dados": {campo: None}}]
+    })
+    assert resposta.status_code == 422
+
+    # Campos opcionais continuam aceitando null
+    resposta = await cliente.put(f"/listas-compras/itens/{item['id']}", json={"observacao": None}, headers=usuario)
+    assert resposta.status_code == 200
+
+
+async def test_adicoes_concorrentes_do_mesmo_produto(cliente, usuario):
+    produto = (await cliente.post(
+        "/produtos/", json={"nome": "Fralda adicionada", "preco": 3, "quantidade_estoque": 0}, headers=usuario
+    )).json()
+    lista = (await cliente.post("/listas-compras/", json={"nome": "Adições"}, headers=usuario)).json()
+
+    respostas = await asyncio.gather(*(
+        cliente.post(
+            f"/listas-compras/{lista['id']}/adicionar-produto/{produto['id']}",
+            params={"quantidade": n}, headers=usuario
+        )
+        for n in range(1, 6)
+    ))
+    assert [r.status_code for r in respostas] == [200] * 5
+
+    # Um único item com a soma das quantidades, e contadores coerentes com ele
+    itens = (await cliente.get(f"/listas-compras/{lista['id']}", headers=usuario)).json()["itens"]
+    assert [(i["produto_id"], i["quantidade"]) for i in itens] == [(produto["id"], 15)]
+    resumo = (await cliente.get(f"/listas-compras/{lista['id']}/resumo", headers=usuario)).json()
+    assert resumo["total_itens"] == 1
+    assert resumo["valor_estimado_total"] == 45
+
+
+async def test_adicionar_produto_em_lista_de_outro_usuario(cliente, criar_usuario):
+    dono, outro = criar_usuario(), criar_usuario()
+    produto = (await cliente.post("/produtos/", json={"nome": "Lenço", "preco": 1}, headers=dono)).json()
+    lista = (await cliente.post("/listas-compras/", json={"nome": "Privada"}, headers=dono)).json()
+
+    resposta = await cliente.post(f"/listas-compras/{lista['id']}/adicionar-produto/{produto['id']}", headers=outro)
+    assert resposta.status_code == 404
@@ -0,0 +1,26 @@
+"""Alterações globais (produtos) cuja numeração falhou depois do commit"""
+from unittest import mock
+
+import pytest
+
+from app.crud import alteracao
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_sync_numera_pendentes_de_numeracao_que_falhou(cliente, usuario):
+    watermark = (await cliente.get("/sync/", headers=usuario)).json()["watermark"]
+    with mock.patch.object(alteracao, "_atribuir_sequencias", side_effect=RuntimeError("falha simulada")):
+        resposta = await cliente.post("/produtos/", json={"nome": "Pomada pendente", "preco": 9}, headers=usuario)
+    # A escrita foi confirmada; só a numeração ficou para depois
+    assert resposta.status_code in (200, 201), resposta.text
+
+    metricas = (await cliente.get("/metrics")).text
+    assert any(
+        linha.startswith("sync_numeracoes_adiadas_total ") and float(linha.split()[1]) >= 1
+        for linha in metricas.splitlines()
+    )
+
+    sync = (await cliente.get("/sync/", params={"desde": watermark}, headers=usuario)).json()
+    assert [p["nome"] for p in sync["produtos"]] == ["Pomada pendente"]
+    assert sync["watermark"] != watermark